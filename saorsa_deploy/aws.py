@@ -0,0 +1,73 @@
+"""Shared AWS session and clients.
+
+Creating a boto3 client re-resolves credentials, loads the botocore service
+model and starts with an empty connection pool, so every module that talks to
+S3 uses the clients from here: one lazily created session for the process and
+one client per region, reused (and thread-safe) across calls.
+"""
+
+import threading
+
+import boto3
+from botocore.config import Config
+
+# Enough pooled connections for the thread pools that fan out S3 requests
+MAX_POOL_CONNECTIONS = 50
+MAX_RETRY_ATTEMPTS = 10
+
+CLIENT_CONFIG = Config(
+    max_pool_connections=MAX_POOL_CONNECTIONS,
+    retries={"mode": "adaptive", "max_attempts": MAX_RETRY_ATTEMPTS},
+    tcp_keepalive=True,
+)
+
+_lock = threading.Lock()
+_session: boto3.session.Session | None = None
+_clients: dict[tuple[str, str, str | None], object] = {}
+
+
+def get_session() -> boto3.session.Session:
+    """Return the process-wide boto3 session, creating it on first use."""
+    global _session
+    with _lock:
+        if _session is None:
+            _session = boto3.session.Session()
+        return _session
+
+
+def s3_client(region: str):
+    """Return the shared S3 client for a region, creating it on first use."""
+    return _client("s3", region)
+
+
+def s3_client_with_credentials(region: str, access_key_id: str, secret_access_key: str):
+    """Return a shared S3 client for a region that uses the given access key."""
+    return _client(
+        "s3",
+        region,
+        aws_access_key_id=access_key_id,
+        aws_secret_access_key=secret_access_key,
+    )
+
+
+def _client(service: str, region: str, **credentials):
+    key = (service, region, credentials.get("aws_access_key_id"))
+    client = _clients.get(key)
+    if client is not None:
+        return client
+    session = get_session()
+    # Sessions are not thread-safe, so clients are created under the lock
+    with _lock:
+        if key not in _clients:
+            _clients[key] = session.client(
+                service, region_name=region, config=CLIENT_CONFIG, **credentials
+            )
+        return _clients[key]
+
+
+def reset_clients():
+    """Drop the shared session and clients, e.g. after credentials change."""
+    global _session
+    with _lock:
+        _session = None
+        _clients.clear()
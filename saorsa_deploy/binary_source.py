@@ -1,7 +1,13 @@
-import boto3
+import hashlib
+import json
+import subprocess
+from datetime import datetime, timezone
+
 import botocore.exceptions
 import requests
 
+from saorsa_deploy.aws import s3_client, s3_client_with_credentials
+
 GITHUB_REPO = "saorsa-labs/saorsa-node"
 RELEASE_ASSET_NAME = "saorsa-node-cli-linux-x64.tar.gz"
 
@@ -9,6 +15,17 @@ BUILDS_BUCKET = "saorsa-node-builds"
 BUILDS_REGION = "eu-west-2"
 BUILDS_KEY_PREFIX = "builds"
 
+# Custom builds are stored per commit:
+#   builds/{owner}/commits/{sha}/saorsa-node     the binary
+#   builds/{owner}/commits/{sha}/manifest.json   its sha256 and provenance
+#   builds/{owner}/branches/{branch}.json        the commit a branch was last built at
+# The manifest is written after the binary and the pointer after the manifest,
+# so a pointer or manifest never refers to an incomplete upload. Builds from
+# before this layout live at builds/{owner}/{branch}/saorsa-node.
+
+# Where baked node images keep downloaded binaries (see saorsa_deploy.images)
+DOWNLOAD_CACHE_DIR = "/var/cache/saorsa-node"
+
 
 def get_release_url(version: str | None = None) -> str:
     """Get the download URL for a saorsa-node release from GitHub.
@@ -33,12 +50,153 @@ def get_release_url(version: str | None = None) -> str:
     )
 
 
-def get_custom_build_url(repo_owner: str, branch_name: str) -> str:
-    """Return the S3 URL for a custom-built binary."""
-    key = f"{BUILDS_KEY_PREFIX}/{repo_owner}/{branch_name}/saorsa-node"
+def cached_download_path(url: str) -> str:
+    """Path a download of url is cached at on a host booted from a baked image."""
+    return f"{DOWNLOAD_CACHE_DIR}/{hashlib.sha256(url.encode()).hexdigest()[:16]}"
+
+
+def fetch_command(url: str, dest: str) -> str:
+    """Shell command that copies url to dest from the download cache, or downloads it."""
+    return f"(cp {cached_download_path(url)} {dest} 2>/dev/null || wget -q {url} -O {dest})"
+
+
+def repo_url(repo_owner: str) -> str:
+    return f"https://github.com/{repo_owner}/saorsa-node.git"
+
+
+def resolve_branch_head(repo_owner: str, branch_name: str) -> str:
+    """Return the commit SHA at the head of a branch, using git ls-remote.
+
+    Raises RuntimeError if the branch does not exist or the repo cannot be read.
+    """
+    ref = f"refs/heads/{branch_name}"
+    result = subprocess.run(
+        ["git", "ls-remote", repo_url(repo_owner), ref],
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"git ls-remote {repo_url(repo_owner)} failed: {result.stderr.strip()}")
+    for line in result.stdout.splitlines():
+        sha, _, name = line.partition("\t")
+        if name == ref:
+            return sha
+    raise RuntimeError(f"Branch {branch_name} not found in {repo_owner}/saorsa-node")
+
+
+def build_key(repo_owner: str, commit: str) -> str:
+    return f"{BUILDS_KEY_PREFIX}/{repo_owner}/commits/{commit}/saorsa-node"
+
+
+def manifest_key(repo_owner: str, commit: str) -> str:
+    return f"{BUILDS_KEY_PREFIX}/{repo_owner}/commits/{commit}/manifest.json"
+
+
+def branch_pointer_key(repo_owner: str, branch_name: str) -> str:
+    return f"{BUILDS_KEY_PREFIX}/{repo_owner}/branches/{branch_name}.json"
+
+
+def _legacy_build_key(repo_owner: str, branch_name: str) -> str:
+    return f"{BUILDS_KEY_PREFIX}/{repo_owner}/{branch_name}/saorsa-node"
+
+
+def _builds_url(key: str) -> str:
     return f"https://{BUILDS_BUCKET}.s3.{BUILDS_REGION}.amazonaws.com/{key}"
 
 
+def build_url(repo_owner: str, commit: str) -> str:
+    """Return the S3 URL of the binary built from a commit."""
+    return _builds_url(build_key(repo_owner, commit))
+
+
+def _get_json(key: str) -> dict | None:
+    s3 = s3_client(BUILDS_REGION)
+    try:
+        resp = s3.get_object(Bucket=BUILDS_BUCKET, Key=key)
+    except botocore.exceptions.ClientError as e:
+        if e.response["Error"]["Code"] in ("NoSuchKey", "404"):
+            return None
+        raise
+    return json.loads(resp["Body"].read())
+
+
+def load_build_manifest(repo_owner: str, commit: str) -> dict | None:
+    """Return the manifest of a commit's build, or None if it has not been built."""
+    return _get_json(manifest_key(repo_owner, commit))
+
+
+def load_branch_pointer(repo_owner: str, branch_name: str) -> dict | None:
+    """Return the branch pointer (commit, sha256, updated_at), or None if never built."""
+    return _get_json(branch_pointer_key(repo_owner, branch_name))
+
+
+def record_build(
+    repo_owner: str,
+    branch_name: str,
+    commit: str,
+    sha256: str,
+    access_key_id: str,
+    secret_access_key: str,
+) -> dict:
+    """Write the manifest of an uploaded build, then point the branch at it.
+
+    Writes with the build uploader's credentials. Returns the manifest.
+    """
+    s3 = s3_client_with_credentials(BUILDS_REGION, access_key_id, secret_access_key)
+    now = datetime.now(timezone.utc).isoformat()
+    manifest = {
+        "repo_owner": repo_owner,
+        "branch": branch_name,
+        "commit": commit,
+        "key": build_key(repo_owner, commit),
+        "sha256": sha256,
+        "built_at": now,
+    }
+    s3.put_object(
+        Bucket=BUILDS_BUCKET,
+        Key=manifest_key(repo_owner, commit),
+        Body=json.dumps(manifest, indent=2),
+        ContentType="application/json",
+    )
+    point_branch(repo_owner, branch_name, manifest, access_key_id, secret_access_key)
+    return manifest
+
+
+def point_branch(
+    repo_owner: str,
+    branch_name: str,
+    manifest: dict,
+    access_key_id: str,
+    secret_access_key: str,
+) -> None:
+    """Point a branch at an already built commit."""
+    s3 = s3_client_with_credentials(BUILDS_REGION, access_key_id, secret_access_key)
+    pointer = {
+        "commit": manifest["commit"],
+        "sha256": manifest["sha256"],
+        "updated_at": datetime.now(timezone.utc).isoformat(),
+    }
+    s3.put_object(
+        Bucket=BUILDS_BUCKET,
+        Key=branch_pointer_key(repo_owner, branch_name),
+        Body=json.dumps(pointer, indent=2),
+        ContentType="application/json",
+    )
+
+
+def get_custom_build_url(repo_owner: str, branch_name: str) -> str:
+    """Return the S3 URL for a branch's custom-built binary.
+
+    Resolves the commit through the branch pointer; a branch last built before
+    builds were stored per commit resolves to its legacy key.
+    """
+    pointer = load_branch_pointer(repo_owner, branch_name)
+    if pointer is None:
+        return _builds_url(_legacy_build_key(repo_owner, branch_name))
+    return build_url(repo_owner, pointer["commit"])
+
+
 def check_release_exists(version: str) -> bool:
     """Check if a specific release version exists on GitHub."""
     url = f"https://api.github.com/repos/{GITHUB_REPO}/releases/tags/v{version}"
@@ -47,11 +205,16 @@ def check_release_exists(version: str) -> bool:
 
 
 def check_custom_build_exists(repo_owner: str, branch_name: str) -> bool:
-    """Check if a custom-built binary exists in S3."""
-    key = f"{BUILDS_KEY_PREFIX}/{repo_owner}/{branch_name}/saorsa-node"
-    s3 = boto3.client("s3", region_name=BUILDS_REGION)
+    """Check if a custom-built binary of a branch exists in S3.
+
+    True if the branch has a pointer (only written once its build is
+    complete), or a build under the legacy key.
+    """
+    if load_branch_pointer(repo_owner, branch_name) is not None:
+        return True
+    s3 = s3_client(BUILDS_REGION)
     try:
-        s3.head_object(Bucket=BUILDS_BUCKET, Key=key)
+        s3.head_object(Bucket=BUILDS_BUCKET, Key=_legacy_build_key(repo_owner, branch_name))
         return True
     except botocore.exceptions.ClientError:
         return False
@@ -1,194 +1,152 @@
-import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 
-import requests
+from saorsa_deploy.do_bulk import VOLUME_BUSY_STATUSES
+from saorsa_deploy.do_client import SSH_KEY_IDS, get_client, get_public_ip, poll_delays
 
-DO_API_URL = "https://api.digitalocean.com/v2"
 BOOTSTRAP_REGION = "lon1"
 BOOTSTRAP_SIZE = "s-2vcpu-4gb"
 BOOTSTRAP_IMAGE = "ubuntu-24-04-x64"
 BOOTSTRAP_VOLUME_SIZE_GB = 35
-SSH_KEY_IDS = [
-    36971688,
-    30643816,
-    30113222,
-    42022675,
-    30878672,
-    31216015,
-    34183228,
-    38596814,
-    54385801,
-]
-
-
-def _get_headers():
-    token = os.environ.get("DO_TOKEN")
-    if not token:
-        raise RuntimeError("DO_TOKEN environment variable is not set")
-    return {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-    }
-
-
-def _find_droplet_by_name(droplet_name, headers):
-    """Find an existing droplet by exact name. Returns the droplet dict or None."""
-    resp = requests.get(f"{DO_API_URL}/droplets", headers=headers, params={"name": droplet_name})
-    resp.raise_for_status()
-    for droplet in resp.json()["droplets"]:
-        if droplet["name"] == droplet_name:
-            return droplet
-    return None
+# How long to keep retrying the volume delete after a failed detach
+VOLUME_RELEASE_TIMEOUT = 120
 
 
-def _find_volume_by_name(volume_name, headers):
-    """Find an existing volume by name and region. Returns the volume dict or None."""
-    resp = requests.get(
-        f"{DO_API_URL}/volumes",
-        headers=headers,
-        params={"name": volume_name, "region": BOOTSTRAP_REGION},
+def _create_droplet(client, droplet_name, image):
+    body = client.post_json(
+        "/droplets",
+        {
+            "name": droplet_name,
+            "region": BOOTSTRAP_REGION,
+            "size": BOOTSTRAP_SIZE,
+            "image": image,
+            "ssh_keys": SSH_KEY_IDS,
+        },
     )
-    resp.raise_for_status()
-    for volume in resp.json()["volumes"]:
-        if volume["name"] == volume_name:
-            return volume
-    return None
-
-
-def _get_public_ip(droplet):
-    """Extract the public IP address from a droplet dict."""
-    ip_address = droplet["networks"]["v4"][0]["ip_address"]
-    for net in droplet["networks"]["v4"]:
-        if net["type"] == "public":
-            ip_address = net["ip_address"]
-            break
-    return ip_address
+    return body["droplet"]
 
 
-def _wait_for_droplet_active(droplet_id, headers, timeout=300):
-    """Poll until the droplet status is 'active'."""
-    start = time.monotonic()
-    while time.monotonic() - start < timeout:
-        resp = requests.get(f"{DO_API_URL}/droplets/{droplet_id}", headers=headers)
-        resp.raise_for_status()
-        status = resp.json()["droplet"]["status"]
-        if status == "active":
-            return resp.json()["droplet"]
-        time.sleep(5)
-    raise TimeoutError(f"Droplet {droplet_id} did not become active within {timeout}s")
+def _create_volume(client, volume_name):
+    body = client.post_json(
+        "/volumes",
+        {
+            "size_gigabytes": BOOTSTRAP_VOLUME_SIZE_GB,
+            "name": volume_name,
+            "region": BOOTSTRAP_REGION,
+            "filesystem_type": "ext4",
+        },
+    )
+    return body["volume"]
 
 
-def create_bootstrap_vm(name):
+def create_bootstrap_vm(name, image=BOOTSTRAP_IMAGE):
     """Create the bootstrap VM with an attached volume via the DO API.
 
     Idempotent: skips creation of droplet/volume if they already exist.
+    The droplet and volume are looked up, and created, concurrently; only
+    attaching the volume waits for the droplet to become active. A new droplet
+    boots from image (a slug or baked snapshot ID).
 
     Returns a dict with keys: droplet_id, droplet_name, ip_address, volume_id, created.
     The 'created' key is True if resources were newly created, False if they already existed.
     """
-    headers = _get_headers()
+    client = get_client()
     droplet_name = f"{name}-saorsa-bootstrap"
     volume_name = f"{name}-saorsa-bootstrap-storage".lower()
 
-    created = False
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        droplet_lookup = pool.submit(client.find_droplet_by_name, droplet_name)
+        volume_lookup = pool.submit(client.find_volume_by_name, volume_name, BOOTSTRAP_REGION)
+        droplet = droplet_lookup.result()
+        volume = volume_lookup.result()
+        created = not droplet or not volume
 
-    # Check for existing droplet
-    existing_droplet = _find_droplet_by_name(droplet_name, headers)
-    if existing_droplet:
-        droplet_id = existing_droplet["id"]
-        ip_address = _get_public_ip(existing_droplet)
-    else:
-        droplet_resp = requests.post(
-            f"{DO_API_URL}/droplets",
-            headers=headers,
-            json={
-                "name": droplet_name,
-                "region": BOOTSTRAP_REGION,
-                "size": BOOTSTRAP_SIZE,
-                "image": BOOTSTRAP_IMAGE,
-                "ssh_keys": SSH_KEY_IDS,
-            },
-        )
-        droplet_resp.raise_for_status()
-        droplet_id = droplet_resp.json()["droplet"]["id"]
-        droplet = _wait_for_droplet_active(droplet_id, headers)
-        ip_address = _get_public_ip(droplet)
-        created = True
-
-    # Check for existing volume
-    existing_volume = _find_volume_by_name(volume_name, headers)
-    if existing_volume:
-        volume_id = existing_volume["id"]
-        # Ensure it's attached to our droplet
-        if droplet_id not in existing_volume.get("droplet_ids", []):
-            attach_resp = requests.post(
-                f"{DO_API_URL}/volumes/{volume_id}/actions",
-                headers=headers,
-                json={
-                    "type": "attach",
-                    "droplet_id": droplet_id,
-                    "region": BOOTSTRAP_REGION,
-                },
-            )
-            attach_resp.raise_for_status()
-    else:
-        volume_resp = requests.post(
-            f"{DO_API_URL}/volumes",
-            headers=headers,
-            json={
-                "size_gigabytes": BOOTSTRAP_VOLUME_SIZE_GB,
-                "name": volume_name,
-                "region": BOOTSTRAP_REGION,
-                "filesystem_type": "ext4",
-            },
+        droplet_create = (
+            None if droplet else pool.submit(_create_droplet, client, droplet_name, image)
         )
-        volume_resp.raise_for_status()
-        volume_id = volume_resp.json()["volume"]["id"]
-        created = True
-
-        # Attach volume to droplet
-        attach_resp = requests.post(
-            f"{DO_API_URL}/volumes/{volume_id}/actions",
-            headers=headers,
-            json={
+        volume_create = None if volume else pool.submit(_create_volume, client, volume_name)
+        if droplet_create:
+            droplet = droplet_create.result()
+        if volume_create:
+            volume = volume_create.result()
+
+    if droplet["status"] != "active":
+        droplet = client.wait_for_droplet_active(droplet["id"])
+
+    # Ensure the volume is attached to our droplet
+    if droplet["id"] not in volume.get("droplet_ids", []):
+        client.post_json(
+            f"/volumes/{volume['id']}/actions",
+            {
                 "type": "attach",
-                "droplet_id": droplet_id,
+                "droplet_id": droplet["id"],
                 "region": BOOTSTRAP_REGION,
             },
         )
-        attach_resp.raise_for_status()
 
     return {
-        "droplet_id": droplet_id,
+        "droplet_id": droplet["id"],
         "droplet_name": droplet_name,
-        "ip_address": ip_address,
-        "volume_id": volume_id,
+        "ip_address": get_public_ip(droplet),
+        "volume_id": volume["id"],
         "created": created,
     }
 
 
 def destroy_bootstrap_vm(droplet_id, volume_id):
-    """Destroy the bootstrap VM and its volume."""
-    headers = _get_headers()
+    """Destroy the bootstrap VM and its attached volume.
 
-    # Detach volume first
-    requests.post(
-        f"{DO_API_URL}/volumes/{volume_id}/actions",
-        headers=headers,
+    The volume is detached and the droplet is deleted while the detach action
+    is polled; the volume is deleted once the detach has completed. If the
+    detach errors or does not complete, deleting the droplet releases the
+    volume instead, and deleting it is retried until that has happened.
+
+    Raises requests.HTTPError if Digital Ocean rejects a request and
+    TimeoutError if the volume is still attached VOLUME_RELEASE_TIMEOUT
+    seconds after the droplet has been deleted.
+    """
+    client = get_client()
+
+    resp = client.post(
+        f"/volumes/{volume_id}/actions",
         json={
             "type": "detach",
             "droplet_id": droplet_id,
             "region": BOOTSTRAP_REGION,
         },
     )
-    # Wait for detach
-    time.sleep(15)
+    # 404: the droplet or volume has gone since it was looked up
+    if resp.status_code != 404:
+        resp.raise_for_status()
 
-    # Delete droplet
-    requests.delete(f"{DO_API_URL}/droplets/{droplet_id}", headers=headers)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        droplet_deleted = pool.submit(client.delete_if_exists, f"/droplets/{droplet_id}")
+        if resp.ok:
+            try:
+                client.wait_for_action(resp.json()["action"]["id"])
+            except (RuntimeError, TimeoutError):
+                pass
+        droplet_deleted.result()
 
-    # Delete volume
-    requests.delete(f"{DO_API_URL}/volumes/{volume_id}", headers=headers)
+    _delete_volume_when_released(client, volume_id)
+
+
+def _delete_volume_when_released(client, volume_id):
+    """Delete a volume, retrying while Digital Ocean still reports it attached."""
+    start = time.monotonic()
+    for delay in poll_delays():
+        resp = client.delete(f"/volumes/{volume_id}")
+        if resp.status_code == 404:
+            return
+        if resp.status_code not in VOLUME_BUSY_STATUSES:
+            resp.raise_for_status()
+            return
+        if time.monotonic() - start >= VOLUME_RELEASE_TIMEOUT:
+            raise TimeoutError(
+                f"Volume {volume_id} was still attached {VOLUME_RELEASE_TIMEOUT}s "
+                "after its droplet was deleted"
+            )
+        time.sleep(delay)
 
 
 def find_and_destroy_bootstrap_vm(name):
@@ -199,12 +157,12 @@ def find_and_destroy_bootstrap_vm(name):
 
     If neither the droplet nor volume is found, returns found=False and does nothing.
     """
-    headers = _get_headers()
+    client = get_client()
     droplet_name = f"{name}-saorsa-bootstrap"
     volume_name = f"{name}-saorsa-bootstrap-storage".lower()
 
-    droplet = _find_droplet_by_name(droplet_name, headers)
-    volume = _find_volume_by_name(volume_name, headers)
+    droplet = client.find_droplet_by_name(droplet_name)
+    volume = client.find_volume_by_name(volume_name, BOOTSTRAP_REGION)
 
     if not droplet and not volume:
         return {"found": False, "droplet_name": droplet_name}
@@ -212,11 +170,12 @@ def find_and_destroy_bootstrap_vm(name):
     droplet_id = droplet["id"] if droplet else None
     volume_id = volume["id"] if volume else None
 
-    if droplet_id and volume_id:
+    if droplet_id and volume_id and droplet_id in volume.get("droplet_ids", []):
         destroy_bootstrap_vm(droplet_id, volume_id)
-    elif droplet_id:
-        requests.delete(f"{DO_API_URL}/droplets/{droplet_id}", headers=headers)
-    elif volume_id:
-        requests.delete(f"{DO_API_URL}/volumes/{volume_id}", headers=headers)
+    else:
+        if droplet_id:
+            client.delete_if_exists(f"/droplets/{droplet_id}")
+        if volume_id:
+            client.delete_if_exists(f"/volumes/{volume_id}")
 
     return {"found": True, "droplet_name": droplet_name}
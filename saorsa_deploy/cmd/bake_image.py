@@ -0,0 +1,93 @@
+import sys
+from datetime import datetime, timezone
+
+from rich.console import Console
+
+from saorsa_deploy.binary_source import get_release_url
+from saorsa_deploy.build_droplet import wait_for_ssh
+from saorsa_deploy.do_client import api_stats
+from saorsa_deploy.images import (
+    PROFILE_NODE,
+    create_bake_vm,
+    destroy_bake_vm,
+    record_image,
+    snapshot_droplet,
+    transfer_image,
+)
+from saorsa_deploy.providers import DEFAULT_PROVIDER, PROVIDERS
+from saorsa_deploy.provisioning.image import ImageBaker
+from saorsa_deploy.ssh import clear_known_hosts
+
+
+def cmd_bake_image(args):
+    """Execute the bake-image command: snapshot a provisioned droplet for reuse."""
+    console = Console()
+    profile = args.profile
+    if args.regions:
+        regions = [r.strip() for r in args.regions.split(",") if r.strip()]
+    else:
+        regions = PROVIDERS[DEFAULT_PROVIDER].regions
+
+    release_url = None
+    if profile == PROFILE_NODE:
+        release_url = get_release_url(args.node_version)
+        console.print(f"  Caching release: {release_url}")
+
+    now = datetime.now(timezone.utc)
+    snapshot_name = f"saorsa-{profile}-{now.strftime('%Y%m%d%H%M%S')}"
+    console.print(f"[bold]Baking {profile} image {snapshot_name}...[/bold]")
+    console.print()
+
+    droplet_id = None
+    try:
+        vm = create_bake_vm(profile)
+        droplet_id = vm["droplet_id"]
+        state = "Reusing" if vm["reused"] else "Created"
+        console.print(f"{state} bake droplet: {vm['droplet_name']} ({vm['ip_address']})")
+
+        console.print("Waiting for SSH...")
+        wait_for_ssh(vm["ip_address"])
+        clear_known_hosts([vm["ip_address"]], console)
+
+        ImageBaker(
+            ip=vm["ip_address"],
+            profile=profile,
+            ssh_key_path=args.ssh_key_path,
+            release_url=release_url,
+            console=console,
+        ).execute()
+
+        console.print("Snapshotting droplet...")
+        snapshot_id = snapshot_droplet(droplet_id, snapshot_name)
+        console.print(f"Transferring snapshot {snapshot_id} to {', '.join(regions)}...")
+        available = transfer_image(snapshot_id, regions)
+
+        image = {
+            "snapshot_id": snapshot_id,
+            "snapshot_name": snapshot_name,
+            "regions": available,
+            "created_at": now.isoformat(),
+        }
+        if release_url:
+            image["release_url"] = release_url
+        record_image(profile, image)
+
+        console.print()
+        console.print(f"[bold green]{profile} image baked: {snapshot_name}[/bold green]")
+        console.print(f"  Snapshot ID: {snapshot_id}")
+        console.print(f"  Regions: {', '.join(available)}")
+    except Exception as e:
+        console.print(f"[bold red]Baking failed:[/bold red] {e}")
+        sys.exit(1)
+    finally:
+        if droplet_id:
+            console.print()
+            console.print("Destroying bake droplet...")
+            try:
+                destroy_bake_vm(droplet_id)
+                console.print("[green]Bake droplet destroyed.[/green]")
+            except Exception as e:
+                console.print(f"[yellow]Warning: Failed to destroy bake droplet: {e}[/yellow]")
+        stats = api_stats()
+        if stats:
+            console.print(f"[dim]Digital Ocean API: {stats.summary()}[/dim]")
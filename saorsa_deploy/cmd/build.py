@@ -3,8 +3,23 @@ import sys
 
 from rich.console import Console
 
-from saorsa_deploy.build_droplet import create_build_vm, destroy_build_vm, wait_for_ssh
-from saorsa_deploy.provisioning.build import SaorsaNodeBuilder
+from saorsa_deploy.binary_source import (
+    build_url,
+    load_branch_pointer,
+    load_build_manifest,
+    point_branch,
+    resolve_branch_head,
+)
+from saorsa_deploy.build_droplet import (
+    BUILD_IMAGE,
+    BUILD_REGION,
+    create_build_vm,
+    destroy_build_vm,
+    wait_for_ssh,
+)
+from saorsa_deploy.do_client import api_stats
+from saorsa_deploy.images import PROFILE_BUILD, resolve_image
+from saorsa_deploy.provisioning.build import LocalSaorsaNodeBuilder, SaorsaNodeBuilder
 from saorsa_deploy.ssh import clear_known_hosts
 
 
@@ -17,16 +32,46 @@ def cmd_build(args):
             console.print(f"[bold red]Error:[/bold red] {var} environment variable is not set")
             sys.exit(1)
 
+    local = getattr(args, "local", False)
+    if getattr(args, "container", False) and not local:
+        console.print("[bold red]Error:[/bold red] --container requires --local")
+        sys.exit(1)
+    if getattr(args, "baked_image", False) and local:
+        console.print("[bold red]Error:[/bold red] --baked-image cannot be used with --local")
+        sys.exit(1)
+
+    try:
+        commit = resolve_branch_head(args.repo_owner, args.branch_name)
+    except RuntimeError as e:
+        console.print(f"[bold red]Error:[/bold red] {e}")
+        sys.exit(1)
+
+    if not getattr(args, "force", False) and _reuse_existing_build(console, args, commit):
+        return
+
     console.print(
         f"[bold]Building saorsa-node from {args.repo_owner}/saorsa-node "
-        f"(branch: {args.branch_name})...[/bold]"
+        f"(branch: {args.branch_name}, commit: {commit[:12]})...[/bold]"
     )
     console.print()
 
+    if local:
+        _build_locally(console, args, commit)
+        return
+
+    image = BUILD_IMAGE
+    if getattr(args, "baked_image", False):
+        try:
+            image = resolve_image(PROFILE_BUILD, [BUILD_REGION])
+        except RuntimeError as e:
+            console.print(f"[bold red]Error:[/bold red] {e}")
+            sys.exit(1)
+        console.print(f"Booting the build droplet from baked build image {image}")
+
     droplet_id = None
     try:
         console.print("[bold]Creating build droplet...[/bold]")
-        vm = create_build_vm(args.repo_owner, args.branch_name)
+        vm = create_build_vm(args.repo_owner, args.branch_name, image=image)
         droplet_id = vm["droplet_id"]
         if vm.get("reused"):
             console.print(
@@ -50,13 +95,12 @@ def cmd_build(args):
             ssh_key_path=args.ssh_key_path,
             repo_owner=args.repo_owner,
             branch_name=args.branch_name,
+            commit=commit,
             console=console,
         )
         s3_url = builder.execute()
 
-        console.print()
-        console.print("[bold green]Build complete.[/bold green]")
-        console.print(f"  Binary URL: {s3_url}")
+        _report_build(console, s3_url, builder.manifest)
     except Exception as e:
         console.print(f"[bold red]Build failed:[/bold red] {e}")
         sys.exit(1)
@@ -69,3 +113,58 @@ def cmd_build(args):
                 console.print("[green]Build droplet destroyed.[/green]")
             except Exception as e:
                 console.print(f"[yellow]Warning: Failed to destroy build droplet: {e}[/yellow]")
+        stats = api_stats()
+        if stats:
+            console.print(f"[dim]Digital Ocean API: {stats.summary()}[/dim]")
+
+
+def _build_locally(console, args, commit):
+    """Build on this machine instead of a droplet, natively or in a container."""
+    where = "in a container" if getattr(args, "container", False) else "natively"
+    console.print(f"[bold]Building locally ({where})...[/bold]")
+    builder = LocalSaorsaNodeBuilder(
+        repo_owner=args.repo_owner,
+        branch_name=args.branch_name,
+        commit=commit,
+        container=getattr(args, "container", False),
+        console=console,
+    )
+    try:
+        s3_url = builder.execute()
+    except Exception as e:
+        console.print(f"[bold red]Build failed:[/bold red] {e}")
+        sys.exit(1)
+    _report_build(console, s3_url, builder.manifest)
+
+
+def _report_build(console, s3_url, manifest):
+    console.print()
+    console.print("[bold green]Build complete.[/bold green]")
+    console.print(f"  Binary URL: {s3_url}")
+    console.print(f"  SHA-256: {manifest['sha256']}")
+
+
+def _reuse_existing_build(console, args, commit):
+    """If commit has already been built, point the branch at it and report it.
+
+    Returns True if the build can be skipped.
+    """
+    manifest = load_build_manifest(args.repo_owner, commit)
+    if manifest is None:
+        return False
+    pointer = load_branch_pointer(args.repo_owner, args.branch_name)
+    if pointer is None or pointer["commit"] != commit:
+        point_branch(
+            args.repo_owner,
+            args.branch_name,
+            manifest,
+            os.environ["SAORSA_BUILD_AWS_ACCESS_KEY_ID"],
+            os.environ["SAORSA_BUILD_AWS_SECRET_ACCESS_KEY"],
+        )
+    console.print(
+        f"[bold green]{args.repo_owner}/{args.branch_name} at {commit[:12]} "
+        f"is already built.[/bold green]"
+    )
+    console.print(f"  Binary URL: {build_url(args.repo_owner, commit)}")
+    console.print(f"  SHA-256: {manifest['sha256']}")
+    return True
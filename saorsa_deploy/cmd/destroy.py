@@ -1,15 +1,25 @@
 import shutil
 import sys
-from pathlib import Path
 
 from rich.console import Console
 
 from saorsa_deploy.bootstrap import find_and_destroy_bootstrap_vm
+from saorsa_deploy.deployment import Deployment
+from saorsa_deploy.do_bulk import destroy_node_vms
+from saorsa_deploy.do_client import api_stats
+from saorsa_deploy.engines import (
+    DEFAULT_ENGINE,
+    ENGINE_DO_API,
+    ENGINE_PER_REGION,
+    build_run_configs,
+    migrate_legacy_state,
+)
 from saorsa_deploy.executor import execute_terraform_runs
-from saorsa_deploy.providers import PROVIDERS
-from saorsa_deploy.resources import get_resources_dir
-from saorsa_deploy.state import delete_deployment_state, load_deployment_state
-from saorsa_deploy.terraform import TerraformRunConfig
+from saorsa_deploy.state import (
+    delete_deployment_state,
+    delete_terraform_states,
+    load_deployment_state,
+)
 
 
 def cmd_destroy(args):
@@ -42,44 +52,31 @@ def cmd_destroy(args):
             sys.exit(0)
         console.print()
 
-    # Build Terraform configs for each region
-    resources_dir = get_resources_dir()
-    workspace_base = Path.cwd() / ".saorsa" / "workspaces"
-
-    configs = []
-    for provider_name, region in region_pairs:
-        provider = PROVIDERS[provider_name]
-        tf_source = resources_dir / provider.tf_dir
-        workspace_dir = workspace_base / f"{provider_name}-{region}"
-        state_key = f"{provider.state_key_prefix}-{region}.tfstate"
-
-        variables = dict(terraform_variables)
-        variables["region"] = region
-
-        config = TerraformRunConfig(
-            provider=provider_name,
-            region=region,
-            tf_source_dir=tf_source,
-            workspace_dir=workspace_dir,
-            state_key=state_key,
-            variables=variables,
+    # Destroy node VMs with the engine the deployment was created with
+    engine = state.get("engine", DEFAULT_ENGINE)
+    if engine == ENGINE_DO_API:
+        configs = []
+        _destroy_with_do_api(console, args)
+    else:
+        configs = build_run_configs(
+            args.name,
+            region_pairs,
+            terraform_variables,
+            engine,
+            parallelism=getattr(args, "parallelism", None),
         )
-        configs.append(config)
-
-    # Run terraform destroy in parallel
-    console.print(f"[bold]Destroying infrastructure across {len(configs)} region(s)...[/bold]")
-    console.print()
-
-    results = execute_terraform_runs(configs, action="destroy")
-
-    failures = [r for r in results if not r.success]
-    if failures:
-        console.print(f"[bold red]{len(failures)} region(s) failed to destroy.[/bold red]")
-        console.print("[yellow]Bootstrap VM was NOT destroyed due to Terraform failures.[/yellow]")
-        sys.exit(1)
-
-    console.print(f"[bold green]All {len(results)} region(s) destroyed successfully.[/bold green]")
-    console.print()
+        # Deployments saved before state keys included the deployment name
+        if engine == ENGINE_PER_REGION and "state_keys" not in state:
+            for label in migrate_legacy_state(configs):
+                console.print(
+                    f"[dim]Migrated Terraform state for {label} to a per-deployment key.[/dim]"
+                )
+        if getattr(args, "fast", False):
+            expected = len(Deployment(state).hosts)
+            _destroy_with_do_api(console, args, expected_droplets=expected)
+            _delete_terraform_states(console, configs)
+        else:
+            _destroy_with_terraform(console, configs, region_pairs, engine)
 
     # Destroy bootstrap VM
     console.print(f"[bold]Destroying bootstrap VM ({args.name}-saorsa-bootstrap)...[/bold]")
@@ -112,3 +109,54 @@ def cmd_destroy(args):
 
     console.print()
     console.print(f"[bold green]Deployment '{args.name}' fully destroyed.[/bold green]")
+    stats = api_stats()
+    if stats:
+        console.print(f"[dim]Digital Ocean API: {stats.summary()}[/dim]")
+
+
+def _destroy_with_terraform(console, configs, region_pairs, engine):
+    """Run terraform destroy in parallel, exiting if any run fails."""
+    console.print(
+        f"[bold]Destroying infrastructure across {len(region_pairs)} region(s) "
+        f"({engine} engine)...[/bold]"
+    )
+    console.print()
+
+    results = execute_terraform_runs(configs, action="destroy")
+
+    failures = [r for r in results if not r.success]
+    if failures:
+        console.print(f"[bold red]{len(failures)} Terraform run(s) failed to destroy.[/bold red]")
+        console.print("[yellow]Bootstrap VM was NOT destroyed due to Terraform failures.[/yellow]")
+        sys.exit(1)
+
+    console.print(
+        f"[bold green]All {len(region_pairs)} region(s) destroyed successfully.[/bold green]"
+    )
+    console.print()
+
+
+def _destroy_with_do_api(console, args, expected_droplets=None):
+    """Delete the deployment's tagged droplets and volumes, exiting on failure."""
+    console.print("[bold]Destroying node VMs by tag via the Digital Ocean API...[/bold]")
+    try:
+        deleted = destroy_node_vms(args.name, expected_droplets=expected_droplets)
+    except Exception as e:
+        console.print(f"[bold red]Failed to destroy node VMs:[/bold red] {e}")
+        console.print("[yellow]Bootstrap VM was NOT destroyed due to the failure.[/yellow]")
+        sys.exit(1)
+
+    console.print(
+        f"[bold green]Deleted {deleted['droplets']} droplet(s) and "
+        f"{deleted['volumes']} volume(s).[/bold green]"
+    )
+    console.print()
+
+
+def _delete_terraform_states(console, configs):
+    """Remove the Terraform state objects of resources deleted outside Terraform."""
+    try:
+        delete_terraform_states([config.state_key for config in configs])
+        console.print(f"[dim]Removed {len(configs)} Terraform state object(s) from S3.[/dim]")
+    except Exception as e:
+        console.print(f"[yellow]Warning: Failed to delete Terraform state: {e}[/yellow]")
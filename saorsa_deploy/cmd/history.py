@@ -0,0 +1,38 @@
+import json
+import sys
+
+from rich.console import Console
+from rich.table import Table
+
+from saorsa_deploy.state import load_deployment_events
+
+
+def cmd_history(args):
+    """Execute the history command: show the journal of state changes of a deployment."""
+    console = Console()
+
+    try:
+        events = load_deployment_events(args.name)
+    except Exception as e:
+        console.print(f"[bold red]Error:[/bold red] Failed to read history: {e}")
+        sys.exit(1)
+
+    if args.json:
+        print(json.dumps(events, indent=2))
+        return
+
+    if not events:
+        console.print(f"[yellow]No recorded history for '{args.name}'.[/yellow]")
+        return
+
+    table = Table(title=f"History: {args.name}")
+    table.add_column("Time", style="cyan")
+    table.add_column("Command")
+    table.add_column("Fields")
+    for event in events:
+        table.add_row(
+            event.get("at", ""),
+            event.get("command") or "",
+            ", ".join(sorted(event.get("updates", {}))),
+        )
+    console.print(table)
@@ -1,39 +1,38 @@
 import sys
-from pathlib import Path
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 from rich.console import Console
 
-from saorsa_deploy.bootstrap import create_bootstrap_vm
-from saorsa_deploy.executor import execute_terraform_runs
-from saorsa_deploy.providers import PROVIDERS, resolve_regions
-from saorsa_deploy.resources import get_resources_dir
-from saorsa_deploy.state import save_deployment_state
-from saorsa_deploy.terraform import TerraformRunConfig
+from saorsa_deploy.bootstrap import BOOTSTRAP_IMAGE, BOOTSTRAP_REGION, create_bootstrap_vm
+from saorsa_deploy.deployment import Host
+from saorsa_deploy.do_bulk import create_node_vms
+from saorsa_deploy.do_client import api_stats
+from saorsa_deploy.engines import (
+    DEFAULT_ENGINE,
+    ENGINE_DO_API,
+    ENGINE_PER_REGION,
+    build_run_configs,
+    collect_hosts,
+    migrate_legacy_state,
+)
+from saorsa_deploy.executor import ExecutorTask, execute_terraform_runs, run_task
+from saorsa_deploy.images import PROFILE_NODE, resolve_image
+from saorsa_deploy.providers import resolve_regions
+from saorsa_deploy.state import load_deployment_state, save_deployment_state
 
+BOOTSTRAP_ROW = "digitalocean/bootstrap"
 
-def cmd_infra(args):
-    """Execute the infra command: provision VMs using Terraform."""
-    console = Console()
 
-    # Create the bootstrap VM first (idempotent)
-    console.print(f"[bold]Bootstrap VM ({args.name}-saorsa-bootstrap)...[/bold]")
-    try:
-        bootstrap = create_bootstrap_vm(args.name)
-        if bootstrap["created"]:
-            console.print(
-                f"[green]Bootstrap VM created: {bootstrap['droplet_name']} "
-                f"({bootstrap['ip_address']})[/green]"
-            )
-        else:
-            console.print(
-                f"[green]Bootstrap VM already exists: {bootstrap['droplet_name']} "
-                f"({bootstrap['ip_address']})[/green]"
-            )
-    except Exception as e:
-        console.print(f"[bold red]Failed to create bootstrap VM:[/bold red] {e}")
-        sys.exit(1)
+def cmd_infra(args):
+    """Execute the infra command: provision VMs using Terraform.
 
-    console.print()
+    The bootstrap VM is created at the same time as the node VMs, and the
+    deployment state is saved once both have finished. If only the bootstrap
+    VM failed, the state is still saved, so the node VMs can be destroyed or
+    the command re-run, and the command then exits non-zero.
+    """
+    console = Console()
 
     # Resolve regions for the main deployment
     if args.testnet and args.region_counts:
@@ -50,64 +49,158 @@ def cmd_infra(args):
         console.print(f"[bold red]Error:[/bold red] {e}")
         sys.exit(1)
 
-    resources_dir = get_resources_dir()
-    workspace_base = Path.cwd() / ".saorsa" / "workspaces"
-
-    configs = []
-    for provider_name, region in region_pairs:
-        provider = PROVIDERS[provider_name]
-        tf_source = resources_dir / provider.tf_dir
-        workspace_dir = workspace_base / f"{provider_name}-{region}"
-        state_key = f"{provider.state_key_prefix}-{region}.tfstate"
-
-        config = TerraformRunConfig(
-            provider=provider_name,
-            region=region,
-            tf_source_dir=tf_source,
-            workspace_dir=workspace_dir,
-            state_key=state_key,
-            variables={
-                "name": args.name,
-                "region": region,
-                "vm_count": str(args.vm_count),
-                "attached_volume_size": str(args.attached_volume_size),
-            },
+    terraform_variables = {
+        "name": args.name,
+        "vm_count": str(args.vm_count),
+        "attached_volume_size": str(args.attached_volume_size),
+    }
+    image = BOOTSTRAP_IMAGE
+    if getattr(args, "baked_image", False):
+        regions = sorted({region for _, region in region_pairs} | {BOOTSTRAP_REGION})
+        try:
+            image = resolve_image(PROFILE_NODE, regions)
+        except RuntimeError as e:
+            console.print(f"[bold red]Error:[/bold red] {e}")
+            sys.exit(1)
+        console.print(f"Booting VMs from baked node image {image}")
+        terraform_variables["image"] = str(image)
+    # Creating the bootstrap VM is idempotent
+    bootstrap_task = ExecutorTask(
+        BOOTSTRAP_ROW, lambda: create_bootstrap_vm(args.name, image=image), label="creating..."
+    )
+    engine = getattr(args, "engine", DEFAULT_ENGINE)
+    if engine == ENGINE_DO_API:
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            pool.submit(run_task, bootstrap_task)
+            hosts = _provision_with_do_api(console, args, region_pairs, image)
+        state_keys = []
+    else:
+        hosts, state_keys = _provision_with_terraform(
+            console, args, region_pairs, terraform_variables, engine, bootstrap_task
+        )
+    bootstrap = _report_bootstrap(console, args.name, bootstrap_task)
+
+    try:
+        save_deployment_state(
+            args.name,
+            region_pairs,
+            terraform_variables,
+            bootstrap["ip_address"] if bootstrap else None,
+            hosts=hosts,
+            engine=engine,
+            state_keys=state_keys,
         )
-        configs.append(config)
+        console.print("[dim]Deployment state saved to S3.[/dim]")
+    except Exception as e:
+        console.print(f"[yellow]Warning: Failed to save deployment state: {e}[/yellow]")
+    stats = api_stats()
+    if stats:
+        console.print(f"[dim]Digital Ocean API: {stats.summary()}[/dim]")
+    if bootstrap is None:
+        sys.exit(1)
+
+
+def _report_bootstrap(console, name, task):
+    """Report the bootstrap VM task's outcome. Returns the VM dict, or None if it failed."""
+    if task.error is not None:
+        console.print(f"[bold red]Failed to create bootstrap VM:[/bold red] {task.error}")
+        return None
+    bootstrap = task.result
+    verb = "created" if bootstrap["created"] else "already exists"
+    console.print(
+        f"[green]Bootstrap VM {verb}: {bootstrap['droplet_name']} "
+        f"({bootstrap['ip_address']})[/green]"
+    )
+    return bootstrap
 
-    console.print(f"[bold]Provisioning infrastructure across {len(configs)} region(s)...[/bold]")
+
+def _provision_with_terraform(
+    console, args, region_pairs, terraform_variables, engine, bootstrap_task
+):
+    """Run the Terraform engine across all regions, with the bootstrap VM task alongside.
+
+    Returns the hosts created and the state keys of the runs.
+    """
+    try:
+        configs = build_run_configs(
+            args.name,
+            region_pairs,
+            terraform_variables,
+            engine,
+            parallelism=getattr(args, "parallelism", None),
+        )
+    except ValueError as e:
+        console.print(f"[bold red]Error:[/bold red] {e}")
+        sys.exit(1)
+
+    if engine == ENGINE_PER_REGION:
+        _migrate_legacy_state(console, args.name, configs)
+
+    console.print(
+        f"[bold]Provisioning infrastructure across {len(region_pairs)} region(s) "
+        f"({engine} engine)...[/bold]"
+    )
     console.print()
 
-    results = execute_terraform_runs(configs)
+    results = execute_terraform_runs(configs, tasks=[bootstrap_task], prewarm_init=True)
 
     failures = [r for r in results if not r.success]
     if failures:
-        console.print(f"[bold red]{len(failures)} region(s) failed.[/bold red]")
+        console.print(f"[bold red]{len(failures)} Terraform run(s) failed.[/bold red]")
         sys.exit(1)
     else:
         console.print(
-            f"[bold green]All {len(results)} region(s) provisioned successfully.[/bold green]"
+            f"[bold green]All {len(region_pairs)} region(s) provisioned successfully.[/bold green]"
         )
 
-    vm_ips = {}
-    for result in results:
-        if result.success and result.outputs.get("droplet_ips"):
-            key = f"{result.provider}/{result.region}"
-            vm_ips[key] = result.outputs["droplet_ips"]
+    return collect_hosts(results), [config.state_key for config in configs]
 
-    terraform_variables = {
-        "name": args.name,
-        "vm_count": str(args.vm_count),
-        "attached_volume_size": str(args.attached_volume_size),
-    }
+
+def _migrate_legacy_state(console, name, configs):
+    """Move an existing deployment's per-region state to per-deployment keys."""
     try:
-        save_deployment_state(
+        existing = load_deployment_state(name)
+    except RuntimeError:
+        return
+    if "state_keys" in existing:
+        return
+    for label in migrate_legacy_state(configs):
+        console.print(f"[dim]Migrated Terraform state for {label} to a per-deployment key.[/dim]")
+
+
+def _provision_with_do_api(console, args, region_pairs, image):
+    """Bulk-create node VMs via the Digital Ocean API. Returns the hosts created."""
+    unsupported = sorted({provider for provider, _ in region_pairs if provider != "digitalocean"})
+    if unsupported:
+        console.print(
+            f"[bold red]Error:[/bold red] The {ENGINE_DO_API} engine only supports Digital Ocean "
+            f"(got: {', '.join(unsupported)})"
+        )
+        sys.exit(1)
+
+    console.print(
+        f"[bold]Creating {args.vm_count} VM(s) in each of {len(region_pairs)} region(s) "
+        f"({ENGINE_DO_API} engine)...[/bold]"
+    )
+    start = time.monotonic()
+    try:
+        vms = create_node_vms(
             args.name,
-            region_pairs,
-            terraform_variables,
-            bootstrap["ip_address"],
-            vm_ips=vm_ips,
+            [region for _, region in region_pairs],
+            args.vm_count,
+            args.attached_volume_size,
+            image=image,
         )
-        console.print("[dim]Deployment state saved to S3.[/dim]")
     except Exception as e:
-        console.print(f"[yellow]Warning: Failed to save deployment state: {e}[/yellow]")
+        console.print(f"[bold red]Failed to create VMs:[/bold red] {e}")
+        sys.exit(1)
+
+    console.print(
+        f"[bold green]All {len(region_pairs)} region(s) provisioned successfully "
+        f"in {time.monotonic() - start:.0f}s.[/bold green]"
+    )
+    return [
+        Host(vm["ip_address"], key, vm["droplet_id"], vm["volume_id"])
+        for key, region_vms in vms.items()
+        for vm in region_vms
+    ]
@@ -0,0 +1,43 @@
+import json
+import sys
+
+from rich.console import Console
+from rich.table import Table
+
+from saorsa_deploy.state import list_deployments
+
+
+def cmd_list(args):
+    """Execute the list command: show every deployment recorded in the deployment index."""
+    console = Console()
+
+    try:
+        deployments = list_deployments()
+    except Exception as e:
+        console.print(f"[bold red]Error:[/bold red] Failed to list deployments: {e}")
+        sys.exit(1)
+
+    if args.json:
+        print(json.dumps(deployments, indent=2))
+        return
+
+    if not deployments:
+        console.print("[yellow]No deployments found.[/yellow]")
+        return
+
+    table = Table(title="Deployments")
+    table.add_column("Name", style="cyan")
+    table.add_column("Regions", justify="right")
+    table.add_column("VMs", justify="right")
+    table.add_column("Created")
+    table.add_column("Binary")
+    for name in sorted(deployments):
+        entry = deployments[name]
+        table.add_row(
+            name,
+            str(entry.get("regions", "")),
+            str(entry.get("vms", "")),
+            entry.get("created_at") or "",
+            entry.get("binary_source") or "",
+        )
+    console.print(table)
@@ -0,0 +1,95 @@
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from rich.console import Console
+from rich.table import Table
+
+from saorsa_deploy.engines import (
+    DEFAULT_ENGINE,
+    ENGINE_DO_API,
+    ENGINE_MULTI_REGION,
+    ENGINE_PER_REGION,
+    MULTI_REGION_LABEL,
+    build_run_configs,
+    collect_vm_ips,
+    legacy_state_key,
+)
+from saorsa_deploy.executor import MAX_CONCURRENT
+from saorsa_deploy.state import load_deployment_state, load_terraform_outputs
+from saorsa_deploy.terraform import TerraformResult
+
+
+def cmd_outputs(args):
+    """Execute the outputs command: show Terraform outputs read directly from S3 state."""
+    console = Console()
+
+    try:
+        state = load_deployment_state(args.name)
+    except RuntimeError as e:
+        console.print(f"[bold red]Error:[/bold red] {e}")
+        sys.exit(1)
+
+    engine = state.get("engine", DEFAULT_ENGINE)
+    if engine == ENGINE_DO_API:
+        console.print(
+            f"[bold red]Error:[/bold red] '{args.name}' was created with the {ENGINE_DO_API} "
+            "engine and has no Terraform state"
+        )
+        sys.exit(1)
+    state_objects = _state_objects(args.name, state, engine)
+
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT) as pool:
+        outputs = list(pool.map(lambda o: load_terraform_outputs(o[2]), state_objects))
+
+    if args.json:
+        print(
+            json.dumps(
+                {f"{p}/{r}": o for (p, r, _), o in zip(state_objects, outputs)},
+                indent=2,
+            )
+        )
+        return
+
+    results = [
+        TerraformResult(success=True, provider=p, region=r, outputs=o)
+        for (p, r, _), o in zip(state_objects, outputs)
+    ]
+    vm_ips = collect_vm_ips(results)
+    if not vm_ips:
+        console.print(f"[yellow]No Terraform outputs found for '{args.name}'.[/yellow]")
+        return
+
+    table = Table(title=f"Deployment: {args.name}")
+    table.add_column("Provider", style="cyan")
+    table.add_column("Region", style="cyan")
+    table.add_column("VMs", justify="right")
+    table.add_column("IPs")
+    for key, ips in vm_ips.items():
+        provider, region = key.split("/", 1)
+        table.add_row(provider, region, str(len(ips)), ", ".join(ips))
+    console.print(table)
+
+
+def _state_objects(name, state, engine):
+    """The (provider, region, state key) of each Terraform state object of a deployment.
+
+    The keys are the ones recorded when the deployment was applied. Per-region
+    deployments saved before keys were recorded still use the legacy
+    per-region keys.
+    """
+    region_pairs = [(r[0], r[1]) for r in state["regions"]]
+    if engine == ENGINE_MULTI_REGION:
+        providers = dict.fromkeys(provider for provider, _ in region_pairs)
+        labels = [(provider, MULTI_REGION_LABEL) for provider in providers]
+    else:
+        labels = region_pairs
+
+    if "state_keys" in state:
+        keys = state["state_keys"]
+    elif engine == ENGINE_PER_REGION:
+        keys = [legacy_state_key(provider, region) for provider, region in region_pairs]
+    else:
+        configs = build_run_configs(name, region_pairs, state["terraform_variables"], engine)
+        keys = [config.state_key for config in configs]
+    return [(provider, region, key) for (provider, region), key in zip(labels, keys)]
@@ -1,8 +1,10 @@
 import sys
+from datetime import datetime, timezone
 
 from rich.console import Console
 
-from saorsa_deploy.cmd.provision_genesis import _resolve_binary_source
+from saorsa_deploy.cmd.provision_genesis import _binary_source_label, _resolve_binary_source
+from saorsa_deploy.deployment import Deployment
 from saorsa_deploy.provisioning.node import SaorsaNodeProvisioner
 from saorsa_deploy.ssh import clear_known_hosts
 from saorsa_deploy.state import load_deployment_state, update_deployment_state
@@ -19,20 +21,20 @@ def cmd_provision(args):
         console.print(f"[bold red]Error:[/bold red] {e}")
         sys.exit(1)
 
-    vm_ips = state.get("vm_ips")
-    if not vm_ips:
+    deployment = Deployment(state)
+    if not deployment.hosts:
         console.print(
             "[bold red]Error:[/bold red] No VM IPs found in deployment state. "
             "Was this deployment created with a recent version of the infra command?"
         )
         sys.exit(1)
 
-    bootstrap_ip = state.get("bootstrap_ip")
+    bootstrap_ip = deployment.bootstrap_ip
     if not bootstrap_ip:
         console.print("[bold red]Error:[/bold red] No bootstrap IP found in deployment state.")
         sys.exit(1)
 
-    bootstrap_port = state.get("bootstrap_port")
+    bootstrap_port = deployment.bootstrap_port
     if not bootstrap_port:
         console.print(
             "[bold red]Error:[/bold red] No bootstrap port found in deployment state. "
@@ -43,22 +45,24 @@ def cmd_provision(args):
     binary_url, binary_is_archive = _resolve_binary_source(args, console)
 
     if args.region:
-        if args.region not in vm_ips:
-            available = ", ".join(sorted(vm_ips.keys()))
+        hosts = deployment.hosts_in_region(args.region)
+        if not hosts:
+            available = ", ".join(sorted(deployment.region_keys))
             console.print(
                 f"[bold red]Error:[/bold red] Region '{args.region}' not found. "
                 f"Available regions: {available}"
             )
             sys.exit(1)
-        all_ips = vm_ips[args.region]
-        console.print(f"[bold]Provisioning {len(all_ips)} VM(s) in {args.region}...[/bold]")
+        console.print(f"[bold]Provisioning {len(hosts)} VM(s) in {args.region}...[/bold]")
     else:
-        all_ips = []
-        for region_key in sorted(vm_ips.keys()):
-            all_ips.extend(vm_ips[region_key])
+        hosts = []
+        for region_key in sorted(deployment.region_keys):
+            hosts.extend(deployment.hosts_in_region(region_key))
         console.print(
-            f"[bold]Provisioning {len(all_ips)} VM(s) across {len(vm_ips)} region(s)...[/bold]"
+            f"[bold]Provisioning {len(hosts)} VM(s) across "
+            f"{len(deployment.region_keys)} region(s)...[/bold]"
         )
+    all_ips = [host.ip for host in hosts]
 
     console.print(f"  Bootstrap: {bootstrap_ip}:{bootstrap_port}")
     console.print(f"  Node count per VM: {args.node_count}")
@@ -102,7 +106,31 @@ def cmd_provision(args):
         sys.exit(1)
 
     try:
-        update_deployment_state(args.name, {"node_count": args.node_count})
+        update_deployment_state(
+            args.name, _provisioned_updates(args, hosts, provisioner), command="provision"
+        )
         console.print("[dim]Node count saved to deployment state.[/dim]")
     except Exception as e:
         console.print(f"[yellow]Warning: Failed to save node count to state: {e}[/yellow]")
+
+
+def _provisioned_updates(args, hosts, provisioner):
+    """Build the state update recording what was provisioned on each host.
+
+    Everything is keyed by region (and host), so provisioning regions from
+    separate jobs merges cleanly.
+    """
+    provisioned_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    node_ports = (
+        list(range(args.port, args.port + args.node_count)) if args.port is not None else None
+    )
+    updates = {"node_counts": {}, "hosts": {}, "binary_source": _binary_source_label(args)}
+    for host in hosts:
+        host.node_ports = node_ports
+        host.binary_sha256 = provisioner.binary_hashes.get(host.ip, host.binary_sha256)
+        host.provisioned_at = provisioned_at
+        updates["node_counts"][host.region] = args.node_count
+        updates["hosts"].setdefault(host.region, {})[host.ip] = host.to_row()
+    if not args.region:
+        updates["node_count"] = args.node_count
+    return updates
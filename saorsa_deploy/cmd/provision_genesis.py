@@ -65,6 +65,15 @@ def _resolve_binary_source(args, console):
     return None, True
 
 
+def _binary_source_label(args) -> str:
+    """Describe the binary chosen by the CLI args, for the deployment index."""
+    if getattr(args, "node_version", None):
+        return f"v{args.node_version}"
+    if getattr(args, "branch_name", None) and getattr(args, "repo_owner", None):
+        return f"{args.repo_owner}/{args.branch_name}"
+    return "latest release"
+
+
 def cmd_provision_genesis(args):
     """Execute the provision-genesis command: provision the genesis node."""
     console = Console()
@@ -123,7 +132,9 @@ def cmd_provision_genesis(args):
         sys.exit(1)
 
     try:
-        update_deployment_state(args.name, {"bootstrap_port": args.port})
+        update_deployment_state(
+            args.name, {"bootstrap_port": args.port}, command="provision-genesis"
+        )
         console.print("[dim]Bootstrap port saved to deployment state.[/dim]")
     except Exception as e:
         console.print(f"[yellow]Warning: Failed to save bootstrap port to state: {e}[/yellow]")
@@ -0,0 +1,159 @@
+"""In-memory model of a deployment's saved state.
+
+Version 2 of the state document holds one record per host, grouped by region
+and keyed by IP, with each record stored as a compact row whose columns are
+named once in host_fields:
+
+    {
+        "schema_version": 2,
+        "name": "DEV-01",
+        ...,
+        "host_fields": ["droplet_id", "volume_id", "node_ports", ...],
+        "hosts": {"digitalocean/lon1": {"203.0.113.1": [1234, "vol-1", ...]}},
+    }
+
+Keying hosts by region and IP keeps updates to different hosts independent
+when state updates are merged. Version 1 documents (a vm_ips list per region)
+are upgraded when read.
+"""
+
+STATE_SCHEMA_VERSION = 2
+HOST_FIELDS = ["droplet_id", "volume_id", "node_ports", "binary_sha256", "provisioned_at"]
+
+
+class Host:
+    """One VM of a deployment."""
+
+    __slots__ = (
+        "ip",
+        "region",
+        "droplet_id",
+        "volume_id",
+        "node_ports",
+        "binary_sha256",
+        "provisioned_at",
+    )
+
+    def __init__(
+        self,
+        ip: str,
+        region: str,
+        droplet_id: int | str | None = None,
+        volume_id: str | None = None,
+        node_ports: list[int] | None = None,
+        binary_sha256: str | None = None,
+        provisioned_at: str | None = None,
+    ):
+        self.ip = ip
+        self.region = region
+        self.droplet_id = droplet_id
+        self.volume_id = volume_id
+        self.node_ports = node_ports
+        self.binary_sha256 = binary_sha256
+        self.provisioned_at = provisioned_at
+
+    @classmethod
+    def from_row(cls, ip: str, region: str, row: list, fields: list[str] = HOST_FIELDS) -> "Host":
+        """Build a host from a stored row whose columns are named by fields."""
+        host = cls(ip, region)
+        for field, value in zip(fields, row):
+            if field in HOST_FIELDS:
+                setattr(host, field, value)
+        return host
+
+    def to_row(self) -> list:
+        return [getattr(self, field) for field in HOST_FIELDS]
+
+    def __eq__(self, other):
+        if not isinstance(other, Host):
+            return NotImplemented
+        return all(getattr(self, s) == getattr(other, s) for s in Host.__slots__)
+
+    def __repr__(self):
+        return f"Host({self.ip!r}, {self.region!r}, droplet_id={self.droplet_id!r})"
+
+
+def hosts_to_state(hosts: list[Host]) -> dict[str, dict[str, list]]:
+    """Return the stored form of hosts: rows keyed by region, then IP."""
+    stored: dict[str, dict[str, list]] = {}
+    for host in hosts:
+        stored.setdefault(host.region, {})[host.ip] = host.to_row()
+    return stored
+
+
+def upgrade_state(state: dict) -> dict:
+    """Return a state document in the current schema.
+
+    Raises RuntimeError for documents written by a newer saorsa-deploy.
+    """
+    version = state.get("schema_version", 1)
+    if version > STATE_SCHEMA_VERSION:
+        raise RuntimeError(
+            f"Deployment state uses schema version {version}, but this saorsa-deploy only "
+            f"understands up to version {STATE_SCHEMA_VERSION}; please upgrade saorsa-deploy"
+        )
+    if version == STATE_SCHEMA_VERSION:
+        return state
+    upgraded = {k: v for k, v in state.items() if k != "vm_ips"}
+    upgraded["schema_version"] = STATE_SCHEMA_VERSION
+    upgraded["host_fields"] = list(HOST_FIELDS)
+    upgraded["hosts"] = {
+        region: {ip: [None] * len(HOST_FIELDS) for ip in ips}
+        for region, ips in state.get("vm_ips", {}).items()
+    }
+    return upgraded
+
+
+class Deployment:
+    """A deployment's state, with its hosts indexed by region and by IP."""
+
+    __slots__ = (
+        "name",
+        "regions",
+        "terraform_variables",
+        "bootstrap_ip",
+        "bootstrap_port",
+        "engine",
+        "state_keys",
+        "hosts",
+        "_by_region",
+        "_by_ip",
+    )
+
+    def __init__(self, state: dict):
+        """Build the model from a state document of any supported schema version."""
+        state = upgrade_state(state)
+        self.name = state.get("name")
+        self.regions = [(r[0], r[1]) for r in state.get("regions", [])]
+        self.terraform_variables = state.get("terraform_variables", {})
+        self.bootstrap_ip = state.get("bootstrap_ip")
+        self.bootstrap_port = state.get("bootstrap_port")
+        self.engine = state.get("engine")
+        self.state_keys = state.get("state_keys")
+        fields = state.get("host_fields", HOST_FIELDS)
+        self.hosts: list[Host] = []
+        self._by_region: dict[str, list[Host]] = {}
+        self._by_ip: dict[str, Host] = {}
+        for region, rows in state.get("hosts", {}).items():
+            region_hosts = self._by_region.setdefault(region, [])
+            for ip, row in rows.items():
+                host = Host.from_row(ip, region, row, fields)
+                self.hosts.append(host)
+                region_hosts.append(host)
+                self._by_ip[ip] = host
+
+    @property
+    def region_keys(self) -> list[str]:
+        """The 'provider/region' keys that have hosts, in stored order."""
+        return list(self._by_region)
+
+    def hosts_in_region(self, region: str) -> list[Host]:
+        """Hosts of one 'provider/region', in VM index order; empty if there are none."""
+        return self._by_region.get(region, [])
+
+    def host(self, ip: str) -> Host | None:
+        return self._by_ip.get(ip)
+
+    def vm_ips(self) -> dict[str, list[str]]:
+        """VM IPs keyed by 'provider/region'."""
+        return {region: [h.ip for h in hosts] for region, hosts in self._by_region.items()}
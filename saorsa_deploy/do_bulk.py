@@ -0,0 +1,331 @@
+"""Create and destroy node VMs directly through the Digital Ocean API.
+
+This is the backend of the do-api engine: droplets are created up to
+DROPLET_BATCH_SIZE per request, volumes are created alongside them, and the
+whole deployment is waited on together instead of resource by resource.
+Every droplet and volume is tagged with the deployment (and region) so the
+deployment can be listed and deleted by tag.
+"""
+
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from saorsa_deploy.do_client import SSH_KEY_IDS, get_client, get_public_ip
+
+NODE_SIZE = "s-2vcpu-4gb"
+NODE_IMAGE = "ubuntu-24-04-x64"
+
+# The droplets endpoint accepts at most 10 names per create request
+DROPLET_BATCH_SIZE = 10
+MAX_CONCURRENT_REQUESTS = 10
+PAGE_SIZE = 200
+POLL_INTERVAL = 3
+# Status codes returned when deleting a volume that is still attached
+VOLUME_BUSY_STATUSES = (409, 422)
+
+
+def deployment_tag(name: str) -> str:
+    """Tag applied to every droplet and volume of a deployment.
+
+    The name is the last colon-separated field, so no other deployment's
+    deployment or region tag can be equal to it.
+    """
+    return f"saorsa-deploy:{name.lower()}"
+
+
+def region_tag(name: str, region: str) -> str:
+    """Tag applied to every droplet and volume of a deployment in one region."""
+    return f"saorsa-region:{name.lower()}:{region}"
+
+
+def droplet_name(name: str, region: str, index: int) -> str:
+    """Droplet name for the index'th (1-based) VM, matching the Terraform manifests."""
+    return f"{name}-saorsa-node-{region}-{index}"
+
+
+def volume_name(name: str, region: str, index: int) -> str:
+    """Volume name for the index'th (1-based) VM, matching the Terraform manifests."""
+    return f"{name.lower()}-saorsa-storage-{region}-{index}"
+
+
+def _droplet_name_pattern(name: str) -> re.Pattern:
+    return re.compile(rf"{re.escape(name)}-saorsa-node-[a-z0-9]+-\d+")
+
+
+def _volume_name_pattern(name: str) -> re.Pattern:
+    return re.compile(rf"{re.escape(name.lower())}-saorsa-storage-[a-z0-9]+-\d+")
+
+
+def _list_all(client, path, key, params=None):
+    return client.list_all(path, key, params, page_size=PAGE_SIZE)
+
+
+def _batches(items, size):
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+def _create_droplets(client, names, region, tags, image):
+    body = client.post_json(
+        "/droplets",
+        {
+            "names": names,
+            "region": region,
+            "size": NODE_SIZE,
+            "image": image,
+            "ssh_keys": SSH_KEY_IDS,
+            "tags": tags,
+        },
+    )
+    return body["droplets"]
+
+
+def _create_volume(client, name, region, size_gb, tags):
+    body = client.post_json(
+        "/volumes",
+        {
+            "size_gigabytes": size_gb,
+            "name": name,
+            "region": region,
+            "filesystem_type": "ext4",
+            "tags": tags,
+        },
+    )
+    return body["volume"]
+
+
+def _attach_volume(client, volume, droplet):
+    client.post_json(
+        f"/volumes/{volume['id']}/actions",
+        {
+            "type": "attach",
+            "droplet_id": droplet["id"],
+            "region": volume["region"]["slug"],
+        },
+    )
+
+
+def _wait_for_droplets_active(client, name, expected_names, timeout):
+    """Poll the deployment's droplets (one listing per poll) until all are active."""
+    start = time.monotonic()
+    while True:
+        droplets = {
+            d["name"]: d
+            for d in _list_all(client, "/droplets", "droplets", {"tag_name": deployment_tag(name)})
+        }
+        pending = [n for n in expected_names if droplets.get(n, {}).get("status") != "active"]
+        if not pending:
+            return droplets
+        if time.monotonic() - start >= timeout:
+            raise TimeoutError(
+                f"{len(pending)} droplet(s) did not become active within {timeout}s "
+                f"(e.g. {pending[0]})"
+            )
+        time.sleep(POLL_INTERVAL)
+
+
+def _wait_for_attachments(client, attachments, timeout):
+    """Poll volumes (one listing per region per poll) until every attachment is visible."""
+    start = time.monotonic()
+    regions = sorted({volume["region"]["slug"] for volume, _ in attachments})
+    while True:
+        volumes = {}
+        for region in regions:
+            for volume in _list_all(client, "/volumes", "volumes", {"region": region}):
+                volumes[volume["id"]] = volume
+        pending = [
+            volume["name"]
+            for volume, droplet in attachments
+            if droplet["id"] not in volumes.get(volume["id"], {}).get("droplet_ids", [])
+        ]
+        if not pending:
+            return
+        if time.monotonic() - start >= timeout:
+            raise TimeoutError(
+                f"{len(pending)} volume(s) were not attached within {timeout}s (e.g. {pending[0]})"
+            )
+        time.sleep(POLL_INTERVAL)
+
+
+def create_node_vms(
+    name: str,
+    regions: list[str],
+    vm_count: int,
+    volume_size_gb: int,
+    timeout: int = 600,
+    image: str | int = NODE_IMAGE,
+) -> dict[str, list[dict]]:
+    """Create vm_count droplets with attached volumes in each region.
+
+    Idempotent: droplets and volumes that already exist (by name) are reused.
+    Droplet creates are batched and, like volume creates and attachments, issued
+    with at most MAX_CONCURRENT_REQUESTS requests in flight.
+
+    Returns a dict keyed by 'digitalocean/<region>' with one dict per VM holding
+    droplet_id, droplet_name, ip_address and volume_id.
+    """
+    client = get_client()
+    expected_names = [
+        droplet_name(name, region, index) for region in regions for index in range(1, vm_count + 1)
+    ]
+    existing_droplets = {
+        d["name"]: d
+        for d in _list_all(client, "/droplets", "droplets", {"tag_name": deployment_tag(name)})
+        if d["name"] in expected_names
+    }
+
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as pool:
+        listed = pool.map(
+            lambda region: _list_all(client, "/volumes", "volumes", {"region": region}), regions
+        )
+        volumes = {
+            region: {v["name"]: v for v in region_volumes}
+            for region, region_volumes in zip(regions, listed)
+        }
+
+        droplet_futures = []
+        volume_futures = {}
+        for region in regions:
+            tags = [deployment_tag(name), region_tag(name, region)]
+            missing = [
+                droplet_name(name, region, index)
+                for index in range(1, vm_count + 1)
+                if droplet_name(name, region, index) not in existing_droplets
+            ]
+            for batch in _batches(missing, DROPLET_BATCH_SIZE):
+                droplet_futures.append(
+                    pool.submit(_create_droplets, client, batch, region, tags, image)
+                )
+            for index in range(1, vm_count + 1):
+                vol_name = volume_name(name, region, index)
+                if vol_name not in volumes[region]:
+                    volume_futures[(region, vol_name)] = pool.submit(
+                        _create_volume, client, vol_name, region, volume_size_gb, tags
+                    )
+
+        for future in droplet_futures:
+            future.result()
+        for (region, vol_name), future in volume_futures.items():
+            volumes[region][vol_name] = future.result()
+
+        droplets = _wait_for_droplets_active(client, name, expected_names, timeout)
+
+        attachments = []
+        for region in regions:
+            for index in range(1, vm_count + 1):
+                volume = volumes[region][volume_name(name, region, index)]
+                droplet = droplets[droplet_name(name, region, index)]
+                if droplet["id"] not in volume.get("droplet_ids", []):
+                    attachments.append((volume, droplet))
+        for future in [pool.submit(_attach_volume, client, v, d) for v, d in attachments]:
+            future.result()
+
+    if attachments:
+        _wait_for_attachments(client, attachments, timeout)
+
+    vms = {}
+    for region in regions:
+        vms[f"digitalocean/{region}"] = [
+            {
+                "droplet_id": droplets[droplet_name(name, region, index)]["id"],
+                "droplet_name": droplet_name(name, region, index),
+                "ip_address": get_public_ip(droplets[droplet_name(name, region, index)]),
+                "volume_id": volumes[region][volume_name(name, region, index)]["id"],
+            }
+            for index in range(1, vm_count + 1)
+        ]
+    return vms
+
+
+def _delete_volume_when_detached(client, volume, timeout):
+    """Delete a volume, retrying while it is still attached to a deleting droplet."""
+    start = time.monotonic()
+    while True:
+        resp = client.delete(f"/volumes/{volume['id']}")
+        if resp.status_code == 404:
+            return
+        if resp.status_code not in VOLUME_BUSY_STATUSES:
+            resp.raise_for_status()
+            return
+        if time.monotonic() - start >= timeout:
+            raise TimeoutError(f"Volume {volume['name']} could not be deleted within {timeout}s")
+        time.sleep(POLL_INTERVAL)
+
+
+def _detach_volume(client, volume):
+    """Request detaching a volume from its droplet.
+
+    Failures are tolerated: the volume is then detached when its droplet is
+    deleted, and deleting it is retried until that has happened.
+    """
+    for droplet_id in volume.get("droplet_ids", []):
+        client.post(
+            f"/volumes/{volume['id']}/actions",
+            json={
+                "type": "detach",
+                "droplet_id": droplet_id,
+                "region": volume["region"]["slug"],
+            },
+        )
+
+
+def destroy_node_vms(name: str, timeout: int = 300, expected_droplets: int | None = None) -> dict:
+    """Delete every droplet and volume tagged with the deployment.
+
+    Only resources whose names are the deployment's droplet and volume names
+    are deleted. Attached volumes are detached in parallel, droplets are
+    deleted with a single delete-by-tag request (or one request per droplet if
+    the tag also covers droplets with other names), and volumes are then
+    deleted concurrently (retrying any that Digital Ocean still reports as
+    attached).
+
+    If expected_droplets is given and a different number of the deployment's
+    droplets is found, raises RuntimeError before deleting anything: the
+    deployment was probably created before its resources were tagged.
+
+    Returns a dict with keys: droplets, volumes (the number of each deleted).
+    """
+    client = get_client()
+    tag = deployment_tag(name)
+    droplet_pattern = _droplet_name_pattern(name)
+    volume_pattern = _volume_name_pattern(name)
+    tagged = _list_all(client, "/droplets", "droplets", {"tag_name": tag})
+    droplets = [d for d in tagged if droplet_pattern.fullmatch(d["name"])]
+    volumes = [
+        v
+        for v in _list_all(client, "/volumes", "volumes")
+        if tag in v.get("tags", []) and volume_pattern.fullmatch(v["name"])
+    ]
+
+    if expected_droplets is not None and len(droplets) != expected_droplets:
+        raise RuntimeError(
+            f"Found {len(droplets)} droplet(s) tagged '{tag}' but the deployment has "
+            f"{expected_droplets} VM(s); nothing was deleted (they may predate tagging)"
+        )
+
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as pool:
+        detaches = [
+            pool.submit(_detach_volume, client, volume)
+            for volume in volumes
+            if volume.get("droplet_ids")
+        ]
+        for future in detaches:
+            future.result()
+
+        if droplets and len(droplets) == len(tagged):
+            resp = client.delete("/droplets", params={"tag_name": tag})
+            resp.raise_for_status()
+        else:
+            for future in [
+                pool.submit(client.delete_if_exists, f"/droplets/{droplet['id']}")
+                for droplet in droplets
+            ]:
+                future.result()
+
+        deletes = [
+            pool.submit(_delete_volume_when_detached, client, volume, timeout) for volume in volumes
+        ]
+        for future in deletes:
+            future.result()
+
+    return {"droplets": len(droplets), "volumes": len(volumes)}
@@ -0,0 +1,298 @@
+"""Shared Digital Ocean API client.
+
+Every module that talks to the Digital Ocean API goes through DoClient: one
+pooled requests.Session per token (so connections are kept alive across
+calls and threads), a timeout on every request, and retries of rate-limited
+(429) and failed (5xx) requests with backoff driven by the ratelimit-* headers
+DO returns. Each client counts the calls it made and the rate-limit headroom
+it last saw, so commands can report them.
+"""
+
+import os
+import random
+import threading
+import time
+from collections import Counter
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DO_API_URL = "https://api.digitalocean.com/v2"
+SSH_KEY_IDS = [
+    36971688,
+    30643816,
+    30113222,
+    42022675,
+    30878672,
+    31216015,
+    34183228,
+    38596814,
+    54385801,
+]
+
+# (connect, read) timeout in seconds
+REQUEST_TIMEOUT = (10, 60)
+POOL_SIZE = 32
+MAX_RETRIES = 5
+RETRY_BASE_DELAY = 0.5
+MAX_RETRY_DELAY = 60
+# Requests the API rejected before acting on them, so any method can be retried
+RATE_LIMITED_STATUSES = (429,)
+# Server errors: only retried for methods that are safe to repeat
+SERVER_ERROR_STATUSES = (500, 502, 503, 504)
+IDEMPOTENT_METHODS = ("GET", "HEAD", "DELETE")
+# Polling of actions and resources starts fast and backs off exponentially
+POLL_INITIAL_DELAY = 0.5
+POLL_MAX_DELAY = 5
+
+_lock = threading.Lock()
+_clients: dict[tuple[str, str], "DoClient"] = {}
+
+
+def poll_delays(initial: float = POLL_INITIAL_DELAY, maximum: float = POLL_MAX_DELAY):
+    """Yield exponentially growing delays between polls, capped at maximum."""
+    delay = initial
+    while True:
+        yield delay
+        delay = min(maximum, delay * 2)
+
+
+def get_public_ip(droplet: dict) -> str:
+    """Extract the public IP address from a droplet dict."""
+    ip_address = droplet["networks"]["v4"][0]["ip_address"]
+    for net in droplet["networks"]["v4"]:
+        if net["type"] == "public":
+            ip_address = net["ip_address"]
+            break
+    return ip_address
+
+
+class ApiStats:
+    """Counters of the calls a client made and the rate-limit headroom it saw."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls: Counter[str] = Counter()
+        self.retries = 0
+        self.rate_limited = 0
+        self.ratelimit_limit: int | None = None
+        self.ratelimit_remaining: int | None = None
+
+    def record(self, method: str, resp: requests.Response | None) -> None:
+        with self._lock:
+            self.calls[method] += 1
+            if resp is None:
+                return
+            if resp.status_code in RATE_LIMITED_STATUSES:
+                self.rate_limited += 1
+            limit = _int_header(resp, "ratelimit-limit")
+            remaining = _int_header(resp, "ratelimit-remaining")
+            if limit is not None:
+                self.ratelimit_limit = limit
+            if remaining is not None:
+                self.ratelimit_remaining = remaining
+
+    def record_retry(self) -> None:
+        with self._lock:
+            self.retries += 1
+
+    @property
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+    def summary(self) -> str:
+        """One-line description, e.g. for printing at the end of a command."""
+        parts = [f"{self.total_calls} call(s)"]
+        if self.calls:
+            parts[0] += " (" + ", ".join(f"{m} {n}" for m, n in sorted(self.calls.items())) + ")"
+        if self.retries:
+            parts.append(f"{self.retries} retried, {self.rate_limited} rate-limited")
+        if self.ratelimit_remaining is not None:
+            parts.append(
+                f"rate-limit headroom {self.ratelimit_remaining}/{self.ratelimit_limit or '?'}"
+            )
+        return ", ".join(parts)
+
+
+def _int_header(resp, name):
+    value = resp.headers.get(name)
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class DoClient:
+    """Digital Ocean API client over a pooled, keep-alive session.
+
+    request() returns the final response without raising for its status, so
+    callers can handle expected errors (such as 404) themselves; the helpers
+    built on it raise requests.HTTPError for unexpected ones.
+    """
+
+    def __init__(self, token: str, base_url: str | None = None):
+        self.base_url = base_url or DO_API_URL
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(
+            {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
+        )
+        self.stats = ApiStats()
+
+    def request(self, method: str, path: str, **kwargs) -> requests.Response:
+        """Make a request, retrying rate-limited and (when safe) failed ones.
+
+        path is relative to the API root (e.g. '/droplets') unless it is a
+        full URL, as in the pagination links DO returns.
+        """
+        url = path if path.startswith("http") else f"{self.base_url}{path}"
+        kwargs.setdefault("timeout", REQUEST_TIMEOUT)
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                resp = self.session.request(method, url, **kwargs)
+            except requests.ConnectionError:
+                self.stats.record(method, None)
+                if method not in IDEMPOTENT_METHODS or attempt == MAX_RETRIES:
+                    raise
+                self.stats.record_retry()
+                time.sleep(_backoff(attempt))
+                continue
+            self.stats.record(method, resp)
+            retryable = resp.status_code in RATE_LIMITED_STATUSES or (
+                resp.status_code in SERVER_ERROR_STATUSES and method in IDEMPOTENT_METHODS
+            )
+            if not retryable or attempt == MAX_RETRIES:
+                return resp
+            self.stats.record_retry()
+            time.sleep(_retry_delay(resp, attempt))
+        raise AssertionError("unreachable")
+
+    def get(self, path: str, **kwargs) -> requests.Response:
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path: str, **kwargs) -> requests.Response:
+        return self.request("POST", path, **kwargs)
+
+    def delete(self, path: str, **kwargs) -> requests.Response:
+        return self.request("DELETE", path, **kwargs)
+
+    def get_json(self, path: str, **kwargs) -> dict:
+        resp = self.get(path, **kwargs)
+        resp.raise_for_status()
+        return resp.json()
+
+    def post_json(self, path: str, body: dict) -> dict:
+        resp = self.post(path, json=body)
+        resp.raise_for_status()
+        return resp.json()
+
+    def list_all(self, path: str, key: str, params: dict | None = None, page_size: int = 200):
+        """List every item of a paginated collection endpoint."""
+        items = []
+        url = path
+        params = {"per_page": page_size, **(params or {})}
+        while url:
+            body = self.get_json(url, params=params)
+            items.extend(body[key])
+            url = body.get("links", {}).get("pages", {}).get("next")
+            # The next link already carries the query string
+            params = None
+        return items
+
+    def delete_if_exists(self, path: str) -> bool:
+        """Delete a resource. Returns False if it did not exist."""
+        resp = self.delete(path)
+        if resp.status_code == 404:
+            return False
+        resp.raise_for_status()
+        return True
+
+    def find_droplet_by_name(self, name: str) -> dict | None:
+        """Find an existing droplet by exact name. Returns the droplet dict or None."""
+        for droplet in self.get_json("/droplets", params={"name": name})["droplets"]:
+            if droplet["name"] == name:
+                return droplet
+        return None
+
+    def find_volume_by_name(self, name: str, region: str) -> dict | None:
+        """Find an existing volume by name and region. Returns the volume dict or None."""
+        body = self.get_json("/volumes", params={"name": name, "region": region})
+        for volume in body["volumes"]:
+            if volume["name"] == name:
+                return volume
+        return None
+
+    def wait_for_droplet_active(self, droplet_id: int, timeout: float = 300) -> dict:
+        """Poll, with backoff, until the droplet status is 'active'. Returns the droplet dict."""
+        start = time.monotonic()
+        for delay in poll_delays():
+            droplet = self.get_json(f"/droplets/{droplet_id}")["droplet"]
+            if droplet["status"] == "active":
+                return droplet
+            if time.monotonic() - start >= timeout:
+                raise TimeoutError(f"Droplet {droplet_id} did not become active within {timeout}s")
+            time.sleep(delay)
+
+    def wait_for_action(self, action_id: int, timeout: float = 120) -> dict:
+        """Poll an action until it completes. Returns the action dict.
+
+        Raises RuntimeError if the action errored and TimeoutError if it is
+        still in progress after timeout seconds.
+        """
+        start = time.monotonic()
+        for delay in poll_delays():
+            action = self.get_json(f"/actions/{action_id}")["action"]
+            if action["status"] == "completed":
+                return action
+            if action["status"] == "errored":
+                raise RuntimeError(f"Action {action_id} ({action['type']}) errored")
+            if time.monotonic() - start >= timeout:
+                raise TimeoutError(f"Action {action_id} did not complete within {timeout}s")
+            time.sleep(delay)
+
+
+def _backoff(attempt: int) -> float:
+    return random.uniform(0, min(MAX_RETRY_DELAY, RETRY_BASE_DELAY * 2**attempt))
+
+
+def _retry_delay(resp: requests.Response, attempt: int) -> float:
+    """Delay before retrying a response: until the rate limit resets if exhausted."""
+    retry_after = _int_header(resp, "retry-after")
+    if retry_after is not None:
+        return min(MAX_RETRY_DELAY, retry_after)
+    reset = _int_header(resp, "ratelimit-reset")
+    if resp.status_code in RATE_LIMITED_STATUSES and reset is not None:
+        if _int_header(resp, "ratelimit-remaining") in (0, None):
+            return min(MAX_RETRY_DELAY, max(0.0, reset - time.time()) + random.uniform(0, 1))
+    return _backoff(attempt)
+
+
+def get_client() -> DoClient:
+    """Return the shared client for the DO_TOKEN in the environment.
+
+    Raises RuntimeError if DO_TOKEN is not set.
+    """
+    token = os.environ.get("DO_TOKEN")
+    if not token:
+        raise RuntimeError("DO_TOKEN environment variable is not set")
+    key = (token, DO_API_URL)
+    with _lock:
+        if key not in _clients:
+            _clients[key] = DoClient(token, DO_API_URL)
+        return _clients[key]
+
+
+def api_stats() -> ApiStats | None:
+    """Stats of the shared client for the current DO_TOKEN, if it has been used."""
+    token = os.environ.get("DO_TOKEN")
+    with _lock:
+        client = _clients.get((token, DO_API_URL))
+    return client.stats if client else None
+
+
+def reset_clients():
+    """Drop the shared clients, e.g. after DO_API_URL or the token changes."""
+    with _lock:
+        _clients.clear()
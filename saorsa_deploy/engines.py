@@ -0,0 +1,188 @@
+import json
+import shutil
+from pathlib import Path
+
+from saorsa_deploy.deployment import Host
+from saorsa_deploy.executor import MAX_CONCURRENT
+from saorsa_deploy.providers import PROVIDERS
+from saorsa_deploy.resources import get_resources_dir
+from saorsa_deploy.state import move_terraform_state
+from saorsa_deploy.terraform import TerraformResult, TerraformRunConfig, resolve_parallelism
+
+ENGINE_PER_REGION = "per-region"
+ENGINE_MULTI_REGION = "multi-region"
+# Creates node VMs directly through the Digital Ocean API, without Terraform
+ENGINE_DO_API = "do-api"
+TERRAFORM_ENGINES = [ENGINE_PER_REGION, ENGINE_MULTI_REGION]
+ENGINES = [*TERRAFORM_ENGINES, ENGINE_DO_API]
+DEFAULT_ENGINE = ENGINE_PER_REGION
+
+MULTI_REGION_LABEL = "multi-region"
+
+# Each VM is a droplet, a volume and a volume attachment
+RESOURCES_PER_VM = 3
+
+
+def build_run_configs(
+    name: str,
+    region_pairs: list[tuple[str, str]],
+    terraform_variables: dict[str, str],
+    engine: str = DEFAULT_ENGINE,
+    workspace_base: Path | None = None,
+    parallelism: int | None = None,
+) -> list[TerraformRunConfig]:
+    """Build the Terraform runs needed to apply or destroy a deployment.
+
+    The per-region engine produces one run (workspace, init and state object) per
+    provider/region pair. The multi-region engine produces one run per provider
+    whose root module creates every region's resources in a single graph. With
+    both, workspaces and state keys include the deployment name, so deployments
+    sharing a region never share state.
+
+    Unless parallelism is given, each run's -parallelism is sized from the number
+    of resources it manages, bounded by the provider's API budget shared across
+    the runs that will execute concurrently.
+    """
+    if parallelism is not None and parallelism < 1:
+        raise ValueError(f"Terraform parallelism must be at least 1, got {parallelism}")
+
+    resources_dir = get_resources_dir()
+    if workspace_base is None:
+        workspace_base = Path.cwd() / ".saorsa" / "workspaces"
+
+    vm_count = int(terraform_variables.get("vm_count", 1))
+
+    if engine == ENGINE_PER_REGION:
+        concurrent_runs = min(len(region_pairs), MAX_CONCURRENT)
+        configs = []
+        for provider_name, region in region_pairs:
+            provider = PROVIDERS[provider_name]
+            variables = dict(terraform_variables)
+            variables["region"] = region
+            configs.append(
+                TerraformRunConfig(
+                    provider=provider_name,
+                    region=region,
+                    tf_source_dir=resources_dir / provider.tf_dir,
+                    workspace_dir=workspace_base / f"{provider_name}-{name}-{region}",
+                    state_key=f"{provider.state_key_prefix}-{name}-{region}.tfstate",
+                    variables=variables,
+                    parallelism=parallelism
+                    if parallelism is not None
+                    else resolve_parallelism(
+                        RESOURCES_PER_VM * vm_count,
+                        concurrent_runs,
+                        provider.api_parallelism_budget,
+                    ),
+                )
+            )
+        return configs
+
+    if engine == ENGINE_MULTI_REGION:
+        regions_by_provider: dict[str, list[str]] = {}
+        for provider_name, region in region_pairs:
+            regions_by_provider.setdefault(provider_name, []).append(region)
+
+        concurrent_runs = min(len(regions_by_provider), MAX_CONCURRENT)
+        configs = []
+        for provider_name, regions in regions_by_provider.items():
+            provider = PROVIDERS[provider_name]
+            if not provider.multi_region_tf_dir:
+                raise ValueError(
+                    f"Provider '{provider_name}' does not support the {ENGINE_MULTI_REGION} engine"
+                )
+            variables = dict(terraform_variables)
+            variables["regions"] = json.dumps(regions)
+            configs.append(
+                TerraformRunConfig(
+                    provider=provider_name,
+                    region=MULTI_REGION_LABEL,
+                    tf_source_dir=resources_dir / provider.multi_region_tf_dir,
+                    workspace_dir=workspace_base / f"{provider_name}-{MULTI_REGION_LABEL}-{name}",
+                    state_key=f"{provider.state_key_prefix}-{MULTI_REGION_LABEL}-{name}.tfstate",
+                    variables=variables,
+                    parallelism=parallelism
+                    if parallelism is not None
+                    else resolve_parallelism(
+                        RESOURCES_PER_VM * vm_count * len(regions),
+                        concurrent_runs,
+                        provider.api_parallelism_budget,
+                    ),
+                )
+            )
+        return configs
+
+    if engine == ENGINE_DO_API:
+        raise ValueError(f"The {ENGINE_DO_API} engine does not use Terraform")
+
+    raise ValueError(f"Unknown engine '{engine}'. Expected one of: {', '.join(ENGINES)}")
+
+
+def legacy_state_key(provider_name: str, region: str) -> str:
+    """State key used by per-region runs before keys included the deployment name."""
+    return f"{PROVIDERS[provider_name].state_key_prefix}-{region}.tfstate"
+
+
+def migrate_legacy_state(configs: list[TerraformRunConfig]) -> list[str]:
+    """Move per-region state objects and workspaces to their per-deployment names.
+
+    Only call this for a deployment known to predate per-deployment state keys:
+    the legacy keys are shared by every deployment in a region. State is moved
+    only if the new key does not exist yet, so this is safe to repeat. Returns
+    the 'provider/region' labels whose state was moved.
+    """
+    migrated = []
+    for config in configs:
+        if config.region == MULTI_REGION_LABEL:
+            continue
+        if move_terraform_state(legacy_state_key(config.provider, config.region), config.state_key):
+            migrated.append(f"{config.provider}/{config.region}")
+            legacy_workspace = config.workspace_dir.parent / f"{config.provider}-{config.region}"
+            if legacy_workspace.exists():
+                shutil.rmtree(legacy_workspace)
+    return migrated
+
+
+def collect_vm_ips(results: list[TerraformResult]) -> dict[str, list[str]]:
+    """Collect VM IPs keyed by 'provider/region' from successful Terraform results.
+
+    Per-region runs output a list of IPs; multi-region runs output a map of
+    region to list of IPs.
+    """
+    vm_ips = {}
+    for result in results:
+        droplet_ips = result.outputs.get("droplet_ips") if result.success else None
+        if not droplet_ips:
+            continue
+        if isinstance(droplet_ips, dict):
+            for region, ips in droplet_ips.items():
+                vm_ips[f"{result.provider}/{region}"] = ips
+        else:
+            vm_ips[f"{result.provider}/{result.region}"] = droplet_ips
+    return vm_ips
+
+
+def collect_hosts(results: list[TerraformResult]) -> list[Host]:
+    """Collect one Host per VM from successful Terraform results.
+
+    Droplet and volume IDs come from the droplet_ids and volume_ids outputs,
+    which have the same shape as droplet_ips (see collect_vm_ips).
+    """
+    hosts = []
+    for result in results:
+        if not result.success or not result.outputs.get("droplet_ips"):
+            continue
+        by_region = {}
+        for output in ("droplet_ips", "droplet_ids", "volume_ids"):
+            value = result.outputs.get(output) or []
+            if not isinstance(value, dict):
+                value = {result.region: value}
+            for region, values in value.items():
+                by_region.setdefault(region, {})[output] = values
+        for region, values in by_region.items():
+            ips = values.get("droplet_ips", [])
+            droplet_ids = values.get("droplet_ids") or [None] * len(ips)
+            volume_ids = values.get("volume_ids") or [None] * len(ips)
+            for ip, droplet_id, volume_id in zip(ips, droplet_ids, volume_ids):
+                hosts.append(Host(ip, f"{result.provider}/{region}", droplet_id, volume_id))
+    return hosts
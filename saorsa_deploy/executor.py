@@ -1,23 +1,46 @@
 import re
+import threading
 import time
-from concurrent.futures import ThreadPoolExecutor
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
 
 from rich.console import Console
 from rich.live import Live
 from rich.table import Table
 
 from saorsa_deploy.terraform import (
+    TerraformProgress,
     TerraformResult,
     TerraformRunConfig,
+    prewarm_workspace,
     run_terraform,
     run_terraform_destroy,
 )
 
 MAX_CONCURRENT = 5
+RENDER_FPS = 8
+SLOWEST_RESOURCES_SHOWN = 5
 
 SPINNER_FRAMES = ["⠋", "⠙", "⠹", "⠸", "⠼", "⠴", "⠦", "⠧", "⠇", "⠏"]
 
 
+@dataclass
+class ExecutorTask:
+    """A non-Terraform task run alongside the Terraform runs, shown as its own row.
+
+    key is the 'provider/name' of its row and label its status while running.
+    After the runs finish, result holds what fn returned, or error the
+    exception it raised.
+    """
+
+    key: str
+    fn: Callable[[], object]
+    label: str = "running..."
+    result: object = None
+    error: Exception | None = None
+
+
 def _format_elapsed(seconds: float) -> str:
     """Format elapsed seconds as mm:ss."""
     m, s = divmod(int(seconds), 60)
@@ -29,33 +52,148 @@ def _build_status_table(
     start_times: dict[str, float],
     spinner_tick: int,
     action_label: str = "applying...",
+    end_times: dict[str, float] | None = None,
+    progress: dict[str, TerraformProgress] | None = None,
+    labels: dict[str, str] | None = None,
 ) -> Table:
     """Build a rich table showing the status of each region."""
     table = Table(show_header=True, header_style="bold")
     table.add_column("Provider")
     table.add_column("Region")
     table.add_column("Status")
+    table.add_column("Resources")
+    table.add_column("Slowest")
     table.add_column("Elapsed")
     now = time.monotonic()
+    end_times = end_times or {}
+    progress = progress or {}
+    labels = labels or {}
     for key in sorted(statuses.keys()):
         status = statuses[key]
         provider, region = key.split("/", 1)
         start = start_times.get(key, now)
-        elapsed = _format_elapsed(now - start)
+        elapsed = _format_elapsed(end_times.get(key, now) - start)
         if status == "running":
             frame = SPINNER_FRAMES[spinner_tick % len(SPINNER_FRAMES)]
-            symbol = f"[yellow]{frame} {action_label}[/yellow]"
+            symbol = f"[yellow]{frame} {labels.get(key, action_label)}[/yellow]"
         elif status == "done":
             symbol = "[green]done[/green]"
+        elif status == "unchanged":
+            symbol = "[cyan]unchanged[/cyan]"
         elif status == "pending":
             symbol = "[dim]pending[/dim]"
             elapsed = ""
         else:
             symbol = "[red]FAILED[/red]"
-        table.add_row(provider, region, symbol, elapsed)
+        resources = ""
+        slowest = ""
+        region_progress = progress.get(key)
+        if region_progress and region_progress.planned:
+            resources = f"{region_progress.completed}/{region_progress.planned}"
+        if region_progress and region_progress.slowest_resource:
+            slowest = (
+                f"{region_progress.slowest_resource} "
+                f"({_format_elapsed(region_progress.slowest_seconds)})"
+            )
+        table.add_row(provider, region, symbol, resources, slowest, elapsed)
     return table
 
 
+class _StatusBoard:
+    """Thread-safe status for each run, shared by the workers and the render ticker.
+
+    Workers update their own row as they start and finish; the Live display
+    pulls a fresh table from render() on its own refresh thread, so neither
+    completion handling nor redraws depend on the other.
+    """
+
+    def __init__(self, keys: list[str], action_label: str):
+        self._lock = threading.Lock()
+        self._statuses = {key: "pending" for key in keys}
+        self._start_times: dict[str, float] = {}
+        self._end_times: dict[str, float] = {}
+        self._progress: dict[str, TerraformProgress] = {}
+        self._labels: dict[str, str] = {}
+        self._action_label = action_label
+
+    def mark_running(self, key: str, label: str | None = None) -> None:
+        with self._lock:
+            self._statuses[key] = "running"
+            self._start_times[key] = time.monotonic()
+            if label:
+                self._labels[key] = label
+
+    def update_progress(self, key: str, progress: TerraformProgress) -> None:
+        with self._lock:
+            self._progress[key] = progress
+
+    def mark_finished(self, key: str, result: TerraformResult) -> None:
+        if not result.success:
+            self._finish(key, "failed")
+        elif result.unchanged:
+            self._finish(key, "unchanged")
+        else:
+            self._finish(key, "done")
+
+    def mark_task_finished(self, key: str, success: bool) -> None:
+        self._finish(key, "done" if success else "failed")
+
+    def _finish(self, key: str, status: str) -> None:
+        with self._lock:
+            self._statuses[key] = status
+            self._end_times[key] = time.monotonic()
+
+    def render(self) -> Table:
+        spinner_tick = int(time.monotonic() * RENDER_FPS)
+        with self._lock:
+            return _build_status_table(
+                dict(self._statuses),
+                dict(self._start_times),
+                spinner_tick,
+                self._action_label,
+                dict(self._end_times),
+                dict(self._progress),
+                dict(self._labels),
+            )
+
+
+def _run_tracked(run_fn, config: TerraformRunConfig, board: _StatusBoard) -> TerraformResult:
+    """Run a single Terraform operation, recording its progress on the status board."""
+    key = f"{config.provider}/{config.region}"
+    board.mark_running(key)
+    try:
+        result = run_fn(config, on_progress=lambda p: board.update_progress(key, p))
+    except Exception as e:
+        result = TerraformResult(
+            success=False,
+            provider=config.provider,
+            region=config.region,
+            stderr=str(e),
+        )
+    board.mark_finished(key, result)
+    return result
+
+
+def run_task(task: ExecutorTask, board: _StatusBoard | None = None) -> None:
+    """Run a non-Terraform task, recording its outcome on the task (and status board)."""
+    if board:
+        board.mark_running(task.key, task.label)
+    try:
+        task.result = task.fn()
+    except Exception as e:
+        task.error = e
+    if board:
+        board.mark_task_finished(task.key, task.error is None)
+
+
+def _prewarm(config: TerraformRunConfig) -> None:
+    try:
+        prewarm_workspace(config)
+    except Exception:
+        # The run repeats the init and reports the failure
+        pass
+
+
 def _parse_resource_summary(stdout: str) -> dict[str, int]:
     """Parse terraform apply output for resource counts.
 
@@ -76,6 +214,8 @@ def _parse_resource_summary(stdout: str) -> dict[str, int]:
 def execute_terraform_runs(
     configs: list[TerraformRunConfig],
     action: str = "apply",
+    tasks: list[ExecutorTask] | None = None,
+    prewarm_init: bool = False,
 ) -> list[TerraformResult]:
     """Execute multiple Terraform runs in parallel with progress display.
 
@@ -83,9 +223,14 @@ def execute_terraform_runs(
         configs: List of TerraformRunConfig for each region.
         action: Either "apply" or "destroy". Determines which terraform
                 command to run and the status label shown during execution.
+        tasks: Other tasks to run at the same time, each with its own row in
+               the table. They do not take up Terraform run slots.
+        prewarm_init: Run terraform init for runs waiting for a slot, so they
+                      start straight into plan once one frees up.
 
-    Runs up to MAX_CONCURRENT Terraform operations at once.
-    Displays a live-updating table with spinners and elapsed time.
+    Runs up to MAX_CONCURRENT Terraform operations at once, collecting each
+    result as soon as it completes. Displays a live-updating table with
+    spinners and elapsed time, redrawn at RENDER_FPS on the Live refresh thread.
     On failure, prints the full error output for failed regions.
     Returns results and prints a summary of resources affected.
     """
@@ -96,51 +241,35 @@ def execute_terraform_runs(
         run_fn = run_terraform
         action_label = "applying..."
 
+    tasks = tasks or []
     console = Console()
-    statuses: dict[str, str] = {}
-    start_times: dict[str, float] = {}
+    board = _StatusBoard(
+        [f"{c.provider}/{c.region}" for c in configs] + [t.key for t in tasks], action_label
+    )
     results: list[TerraformResult] = []
-    spinner_tick = 0
-
-    for config in configs:
-        statuses[f"{config.provider}/{config.region}"] = "pending"
+    queued = configs[MAX_CONCURRENT:] if prewarm_init else []
 
+    # The Live refresh thread is the render ticker: it redraws the board at a
+    # fixed frame rate while this thread only wakes up when a run completes.
     with Live(
-        _build_status_table(statuses, start_times, spinner_tick, action_label),
         console=console,
-        refresh_per_second=4,
-    ) as live:
-        with ThreadPoolExecutor(max_workers=MAX_CONCURRENT) as pool:
-            future_to_key = {}
-            for config in configs:
-                key = f"{config.provider}/{config.region}"
-                statuses[key] = "running"
-                start_times[key] = time.monotonic()
-                future = pool.submit(run_fn, config)
-                future_to_key[future] = key
-
-            while future_to_key:
-                # Update display with spinner animation
-                spinner_tick += 1
-                live.update(_build_status_table(statuses, start_times, spinner_tick, action_label))
-
-                # Check for completed futures (non-blocking)
-                done = set()
-                for future in future_to_key:
-                    if future.done():
-                        done.add(future)
-
+        refresh_per_second=RENDER_FPS,
+        get_renderable=board.render,
+    ):
+        with (
+            ThreadPoolExecutor(max_workers=MAX_CONCURRENT) as pool,
+            ThreadPoolExecutor(max_workers=len(tasks) + len(queued) or 1) as side_pool,
+        ):
+            # A queued run that gets a slot mid-prewarm waits on the workspace lock
+            for task in tasks:
+                side_pool.submit(run_task, task, board)
+            for config in queued:
+                side_pool.submit(_prewarm, config)
+            pending = {pool.submit(_run_tracked, run_fn, config, board) for config in configs}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
                 for future in done:
-                    key = future_to_key.pop(future)
-                    result = future.result()
-                    results.append(result)
-                    statuses[key] = "done" if result.success else "failed"
-                    live.update(
-                        _build_status_table(statuses, start_times, spinner_tick, action_label)
-                    )
-
-                if future_to_key:
-                    time.sleep(0.25)
+                    results.append(future.result())
 
     # Print resource summary
     total_added = 0
@@ -159,10 +288,26 @@ def execute_terraform_runs(
             f"[bold]Resources: {total_added} added, "
             f"{total_changed} changed, {total_destroyed} destroyed[/bold]"
         )
+    unchanged = [r for r in results if r.success and r.unchanged]
+    if unchanged:
+        keys = ", ".join(sorted(f"{r.provider}/{r.region}" for r in unchanged))
+        console.print(f"[cyan]{len(unchanged)} unchanged (apply skipped): {keys}[/cyan]")
+
+    # Print the slowest resources so long applies can be explained
+    timings = [
+        (seconds, f"{result.provider}/{result.region}", addr)
+        for result in results
+        for addr, seconds in result.resource_timings.items()
+    ]
+    if timings:
+        console.print("[dim]Slowest resources:[/dim]")
+        for seconds, key, addr in sorted(timings, reverse=True)[:SLOWEST_RESOURCES_SHOWN]:
+            console.print(f"  [dim]{key} {addr}: {_format_elapsed(seconds)}[/dim]")
 
     # Print error details for any failures
     failures = [r for r in results if not r.success]
-    if failures:
+    failed_tasks = [t for t in tasks if t.error is not None]
+    if failures or failed_tasks:
         console.print()
         for result in failures:
             console.print(f"[bold red]FAILED: {result.provider}/{result.region}[/bold red]")
@@ -171,5 +316,9 @@ def execute_terraform_runs(
             if result.stdout:
                 console.print(result.stdout)
             console.print()
+        for task in failed_tasks:
+            console.print(f"[bold red]FAILED: {task.key}[/bold red]")
+            console.print(str(task.error))
+            console.print()
 
     return results
@@ -0,0 +1,172 @@
+"""Baked Digital Ocean images.
+
+A baked image is a snapshot of a droplet that already has everything a
+profile needs installed, so droplets booted from it skip that work:
+
+- node: the runtime packages and the saorsa-node release tarball, cached
+  where node provisioning looks for it before downloading.
+- build: the apt packages, AWS CLI and Rust toolchain the build droplet needs.
+
+bake-image creates the snapshot and transfers it to the regions it will be
+used in. The latest snapshot of each profile is recorded in the deployment
+state bucket (saorsa-deploy/images/<profile>.json), where infra and
+build-saorsa-node-binary look it up.
+"""
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from saorsa_deploy.aws import s3_client
+from saorsa_deploy.do_client import SSH_KEY_IDS, get_client, get_public_ip
+from saorsa_deploy.state import S3_BUCKET, S3_REGION
+
+PROFILE_NODE = "node"
+PROFILE_BUILD = "build"
+PROFILES = (PROFILE_NODE, PROFILE_BUILD)
+
+BASE_IMAGE = "ubuntu-24-04-x64"
+BAKE_REGION = "lon1"
+BAKE_SIZES = {PROFILE_NODE: "s-2vcpu-4gb", PROFILE_BUILD: "s-4vcpu-8gb"}
+S3_IMAGES_PREFIX = "saorsa-deploy/images"
+
+# Snapshots and transfers of a few GB take minutes
+SNAPSHOT_TIMEOUT = 1800
+TRANSFER_TIMEOUT = 1800
+
+
+def _image_key(profile: str) -> str:
+    return f"{S3_IMAGES_PREFIX}/{profile}.json"
+
+
+def bake_droplet_name(profile: str) -> str:
+    return f"saorsa-bake-{profile}"
+
+
+def load_image(profile: str) -> dict | None:
+    """Return the recorded image of a profile, or None if none has been baked."""
+    client = s3_client(S3_REGION)
+    try:
+        resp = client.get_object(Bucket=S3_BUCKET, Key=_image_key(profile))
+    except client.exceptions.NoSuchKey:
+        return None
+    return json.loads(resp["Body"].read())
+
+
+def record_image(profile: str, image: dict) -> None:
+    """Record the image a profile's droplets should boot from."""
+    s3_client(S3_REGION).put_object(
+        Bucket=S3_BUCKET,
+        Key=_image_key(profile),
+        Body=json.dumps(image, indent=2),
+        ContentType="application/json",
+    )
+
+
+def resolve_image(profile: str, regions: list[str]) -> int:
+    """Return the snapshot ID of a profile's baked image, available in every region.
+
+    Raises RuntimeError if no image has been baked or it is missing a region.
+    """
+    image = load_image(profile)
+    if image is None:
+        raise RuntimeError(
+            f"No {profile} image has been baked; run: saorsa-deploy bake-image --profile {profile}"
+        )
+    missing = sorted(set(regions) - set(image["regions"]))
+    if missing:
+        raise RuntimeError(
+            f"The {profile} image ({image['snapshot_name']}) is not available in "
+            f"{', '.join(missing)}; bake it again with those regions"
+        )
+    return image["snapshot_id"]
+
+
+def create_bake_vm(profile: str) -> dict:
+    """Create (or reuse) the droplet an image is baked on.
+
+    Returns a dict with keys: droplet_id, droplet_name, ip_address, reused.
+    """
+    client = get_client()
+    droplet_name = bake_droplet_name(profile)
+    droplet = client.find_droplet_by_name(droplet_name)
+    reused = droplet is not None
+    if not reused:
+        droplet = client.post_json(
+            "/droplets",
+            {
+                "name": droplet_name,
+                "region": BAKE_REGION,
+                "size": BAKE_SIZES[profile],
+                "image": BASE_IMAGE,
+                "ssh_keys": SSH_KEY_IDS,
+            },
+        )["droplet"]
+    if droplet["status"] != "active":
+        droplet = client.wait_for_droplet_active(droplet["id"])
+    return {
+        "droplet_id": droplet["id"],
+        "droplet_name": droplet_name,
+        "ip_address": get_public_ip(droplet),
+        "reused": reused,
+    }
+
+
+def _droplet_action(client, droplet_id: int, body: dict, timeout: float) -> dict:
+    action = client.post_json(f"/droplets/{droplet_id}/actions", body)["action"]
+    return client.wait_for_action(action["id"], timeout=timeout)
+
+
+def snapshot_droplet(droplet_id: int, snapshot_name: str) -> int:
+    """Power off a droplet and snapshot it. Returns the snapshot (image) ID.
+
+    A snapshot with the same name that already exists is reused.
+    """
+    client = get_client()
+    existing = _find_snapshot(client, droplet_id, snapshot_name)
+    if existing:
+        return existing["id"]
+    droplet = client.get_json(f"/droplets/{droplet_id}")["droplet"]
+    # A powered-off droplet gives a consistent filesystem
+    if droplet["status"] != "off":
+        _droplet_action(client, droplet_id, {"type": "shutdown"}, timeout=120)
+    _droplet_action(
+        client, droplet_id, {"type": "snapshot", "name": snapshot_name}, timeout=SNAPSHOT_TIMEOUT
+    )
+    snapshot = _find_snapshot(client, droplet_id, snapshot_name)
+    if snapshot is None:
+        raise RuntimeError(f"Snapshot {snapshot_name} of droplet {droplet_id} was not found")
+    return snapshot["id"]
+
+
+def _find_snapshot(client, droplet_id: int, snapshot_name: str) -> dict | None:
+    for snapshot in client.list_all(f"/droplets/{droplet_id}/snapshots", "snapshots"):
+        if snapshot["name"] == snapshot_name:
+            return snapshot
+    return None
+
+
+def transfer_image(image_id: int, regions: list[str]) -> list[str]:
+    """Copy an image to every region it is not yet in, concurrently.
+
+    Returns the regions the image is available in afterwards.
+    """
+    client = get_client()
+    present = client.get_json(f"/images/{image_id}")["image"]["regions"]
+    missing = [region for region in regions if region not in present]
+
+    def transfer(region):
+        action = client.post_json(
+            f"/images/{image_id}/actions", {"type": "transfer", "region": region}
+        )["action"]
+        client.wait_for_action(action["id"], timeout=TRANSFER_TIMEOUT)
+
+    if missing:
+        with ThreadPoolExecutor(max_workers=len(missing)) as pool:
+            for future in [pool.submit(transfer, region) for region in missing]:
+                future.result()
+    return sorted(set(present) | set(missing))
+
+
+def destroy_bake_vm(droplet_id: int) -> None:
+    """Delete the droplet an image was baked on."""
+    get_client().delete_if_exists(f"/droplets/{droplet_id}")
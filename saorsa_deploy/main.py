@@ -3,6 +3,17 @@ import sys
 from importlib.metadata import version
 
 
+def positive_int(value: str) -> int:
+    """argparse type for options that must be a whole number of at least 1."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: '{value}'") from None
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
 def main():
     parser = argparse.ArgumentParser(
         prog="saorsa-deploy",
@@ -15,16 +26,66 @@ def main():
     )
     subparsers = parser.add_subparsers(dest="command")
 
+    # === bake-image ===
+    bake_parser = subparsers.add_parser(
+        "bake-image", help="Bake a Digital Ocean snapshot with a profile's dependencies installed"
+    )
+    bake_parser.add_argument(
+        "--node-version",
+        type=str,
+        default=None,
+        help="saorsa-node release to cache in node images (default: latest)",
+    )
+    bake_parser.add_argument(
+        "--profile",
+        type=str,
+        choices=["node", "build"],
+        required=True,
+        help="Image profile: node VMs or the build VM",
+    )
+    bake_parser.add_argument(
+        "--regions",
+        type=str,
+        default=None,
+        help="Comma-separated regions to make the image available in (default: all)",
+    )
+    bake_parser.add_argument(
+        "--ssh-key-path",
+        type=str,
+        default="~/.ssh/id_rsa",
+        help="Path to SSH key for provisioning the bake VM (default: ~/.ssh/id_rsa)",
+    )
+
     # === build-saorsa-node-binary ===
     build_parser = subparsers.add_parser(
         "build-saorsa-node-binary", help="Build saorsa-node from source and upload to S3"
     )
+    build_parser.add_argument(
+        "--baked-image",
+        action="store_true",
+        help="Boot the build VM from the baked build image (see bake-image)",
+    )
     build_parser.add_argument(
         "--branch-name",
         type=str,
         required=True,
         help="Git branch to build from",
     )
+    build_parser.add_argument(
+        "--container",
+        action="store_true",
+        help="With --local, build inside a Rust container with a persistent cargo cache",
+    )
+    build_parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Build even if the branch head commit has already been built",
+    )
+    build_parser.add_argument(
+        "--local",
+        action="store_true",
+        help="Build on this machine instead of a build droplet",
+    )
     build_parser.add_argument(
         "--repo-owner",
         type=str,
@@ -40,6 +101,11 @@ def main():
 
     # === destroy ===
     destroy_parser = subparsers.add_parser("destroy", help="Destroy testnet infrastructure")
+    destroy_parser.add_argument(
+        "--fast",
+        action="store_true",
+        help="Delete VMs and volumes by tag via the Digital Ocean API instead of terraform destroy",
+    )
     destroy_parser.add_argument(
         "--force",
         action="store_true",
@@ -51,6 +117,28 @@ def main():
         required=True,
         help="Deployment name to destroy",
     )
+    destroy_parser.add_argument(
+        "--parallelism",
+        type=positive_int,
+        default=None,
+        help="Terraform -parallelism per run (default: sized from the deployment)",
+    )
+
+    # === history ===
+    history_parser = subparsers.add_parser(
+        "history", help="Show the recorded infra and provision steps of a deployment"
+    )
+    history_parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Print the journal events as JSON",
+    )
+    history_parser.add_argument(
+        "--name",
+        type=str,
+        required=True,
+        help="Deployment name",
+    )
 
     # === infra ===
     infra_parser = subparsers.add_parser("infra", help="Manage testnet infrastructure")
@@ -60,12 +148,33 @@ def main():
         default=20,
         help="Size of attached volume in GB (default: 20)",
     )
+    infra_parser.add_argument(
+        "--baked-image",
+        action="store_true",
+        help="Boot the VMs from the baked node image (see bake-image)",
+    )
+    infra_parser.add_argument(
+        "--engine",
+        type=str,
+        choices=["per-region", "multi-region", "do-api"],
+        default="per-region",
+        help=(
+            "Provisioning engine: one Terraform run per region, one multi-region Terraform run, "
+            "or bulk creation through the Digital Ocean API (default: per-region)"
+        ),
+    )
     infra_parser.add_argument(
         "--name",
         type=str,
         required=True,
         help="Deployment name (used as prefix in VM names, e.g. DEV-01)",
     )
+    infra_parser.add_argument(
+        "--parallelism",
+        type=positive_int,
+        default=None,
+        help="Terraform -parallelism per run (default: sized from VM count and region count)",
+    )
     infra_parser.add_argument(
         "--region-counts",
         type=str,
@@ -84,6 +193,30 @@ def main():
         help="Number of VMs per provider per region",
     )
 
+    # === list ===
+    list_parser = subparsers.add_parser("list", help="List deployments")
+    list_parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Print the deployment index as JSON",
+    )
+
+    # === outputs ===
+    outputs_parser = subparsers.add_parser(
+        "outputs", help="Show Terraform outputs for a deployment, read directly from S3 state"
+    )
+    outputs_parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Print the raw outputs of every Terraform run as JSON",
+    )
+    outputs_parser.add_argument(
+        "--name",
+        type=str,
+        required=True,
+        help="Deployment name",
+    )
+
     # === provision ===
     provision_parser = subparsers.add_parser("provision", help="Provision nodes on all VMs")
     provision_parser.add_argument(
@@ -206,7 +339,11 @@ def main():
         parser.print_help()
         sys.exit(1)
 
-    if args.command == "build-saorsa-node-binary":
+    if args.command == "bake-image":
+        from saorsa_deploy.cmd.bake_image import cmd_bake_image
+
+        cmd_bake_image(args)
+    elif args.command == "build-saorsa-node-binary":
         from saorsa_deploy.cmd.build import cmd_build
 
         cmd_build(args)
@@ -214,10 +351,22 @@ def main():
         from saorsa_deploy.cmd.destroy import cmd_destroy
 
         cmd_destroy(args)
+    elif args.command == "history":
+        from saorsa_deploy.cmd.history import cmd_history
+
+        cmd_history(args)
     elif args.command == "infra":
         from saorsa_deploy.cmd.infra import cmd_infra
 
         cmd_infra(args)
+    elif args.command == "list":
+        from saorsa_deploy.cmd.list import cmd_list
+
+        cmd_list(args)
+    elif args.command == "outputs":
+        from saorsa_deploy.cmd.outputs import cmd_outputs
+
+        cmd_outputs(args)
     elif args.command == "provision":
         from saorsa_deploy.cmd.provision import cmd_provision
 
@@ -8,6 +8,8 @@ class ProviderConfig:
     default_region: str
     tf_dir: str
     state_key_prefix: str
+    multi_region_tf_dir: str | None = None
+    api_parallelism_budget: int = 10
 
 
 PROVIDERS = {
@@ -17,6 +19,8 @@ PROVIDERS = {
         default_region="lon1",
         tf_dir="digitalocean",
         state_key_prefix="saorsa-deploy/do",
+        multi_region_tf_dir="digitalocean-multi",
+        api_parallelism_budget=50,
     ),
 }
 
@@ -1,4 +1,14 @@
+import json
 import os
+import platform
+import shlex
+import shutil
+import subprocess
+import sys
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from functools import partial
 
 from pyinfra.api import Config, Inventory, State
 from pyinfra.api.connect import connect_all, disconnect_all
@@ -7,10 +17,319 @@ from pyinfra.api.operations import run_ops
 from pyinfra.operations import server
 from rich.console import Console
 
-from saorsa_deploy.binary_source import BUILDS_BUCKET, BUILDS_KEY_PREFIX
+from saorsa_deploy.binary_source import (
+    BUILDS_BUCKET,
+    BUILDS_REGION,
+    build_key,
+    build_url,
+    record_build,
+    repo_url,
+)
 
+BUILD_PACKAGES = ["curl", "build-essential", "pkg-config", "libssl-dev", "git", "unzip"]
+CARGO_PATH = "/root/.cargo/bin/cargo"
+SOURCE_DIR = "/root/saorsa-node"
 
-class SaorsaNodeBuilder:
+# Compiled crates are cached in the builds bucket, so a build on a fresh droplet
+# only recompiles what changed since any earlier build of any branch.
+SCCACHE_VERSION = "0.10.0"
+SCCACHE_PATH = "/usr/local/bin/sccache"
+SCCACHE_KEY_PREFIX = "sccache/"
+
+# --local builds keep the checkout, target dir and (in a container) cargo home here
+LOCAL_BUILD_DIR = "~/.cache/saorsa-deploy/build"
+BUILD_CONTAINER_IMAGE = "rust:1-bookworm"
+CONTAINER_CARGO_PATH = "/usr/local/cargo/bin/cargo"
+CONTAINER_CARGO_HOME = "/cargo-home"
+# Native --local builds run their own sccache server and local cache, so a
+# server the developer runs (on the default port, 4226) is left alone
+LOCAL_SCCACHE_PORT = 4227
+
+# Each step checks whether it is already satisfied, so a droplet booted from a
+# baked build image (see saorsa_deploy.images) skips straight to the build.
+
+
+def install_packages_command(packages: list[str]) -> str:
+    """Install apt packages unless they are all installed already."""
+    names = " ".join(packages)
+    return (
+        f"dpkg -s {names} >/dev/null 2>&1 || (apt-get update -qq && apt-get install -y -qq {names})"
+    )
+
+
+def install_aws_cli_command() -> str:
+    return (
+        "command -v aws >/dev/null || "
+        '(curl -sSL "https://awscli.amazonaws.com/awscli-exe-linux-x86_64.zip" '
+        "-o /tmp/awscliv2.zip && "
+        "unzip -q /tmp/awscliv2.zip -d /tmp && "
+        "/tmp/aws/install && "
+        "rm -rf /tmp/awscliv2.zip /tmp/aws)"
+    )
+
+
+def install_rust_command() -> str:
+    return (
+        f"test -x {CARGO_PATH} || "
+        "(curl --proto '=https' --tlsv1.2 -sSf https://sh.rustup.rs | sh -s -- -y)"
+    )
+
+
+def install_sccache_command() -> str:
+    release = f"sccache-v{SCCACHE_VERSION}-x86_64-unknown-linux-musl"
+    return (
+        f"test -x {SCCACHE_PATH} || "
+        f"(curl -sSL https://github.com/mozilla/sccache/releases/download/v{SCCACHE_VERSION}/"
+        f"{release}.tar.gz | tar -xz -C /tmp && "
+        f"install -m 755 /tmp/{release}/sccache {SCCACHE_PATH} && rm -rf /tmp/{release})"
+    )
+
+
+@dataclass
+class BuildWorkspace:
+    """Where the build pipeline checks out the source, builds and finds the binary.
+
+    sccache is the path of the sccache binary to compile through, or None to
+    build without it.
+    """
+
+    source_dir: str = SOURCE_DIR
+    target_dir: str = f"{SOURCE_DIR}/target"
+    cargo: str = CARGO_PATH
+    sccache: str | None = SCCACHE_PATH
+
+    @property
+    def binary_path(self) -> str:
+        return f"{self.target_dir}/release/saorsa-node"
+
+
+REMOTE_WORKSPACE = BuildWorkspace()
+
+
+def _aws_credentials_env(aws_access_key: str | None, aws_secret_key: str | None) -> str:
+    """Inline AWS credentials for a command, or nothing to take them from the environment."""
+    if aws_access_key is None:
+        return ""
+    return f"AWS_ACCESS_KEY_ID={aws_access_key} AWS_SECRET_ACCESS_KEY={aws_secret_key} "
+
+
+def sccache_env(sccache: str, aws_access_key: str | None, aws_secret_key: str | None) -> str:
+    """Environment that makes cargo compile through sccache with the S3 cache."""
+    return (
+        f"RUSTC_WRAPPER={sccache} CARGO_INCREMENTAL=0 "
+        f"SCCACHE_BUCKET={BUILDS_BUCKET} SCCACHE_REGION={BUILDS_REGION} "
+        f"SCCACHE_S3_KEY_PREFIX={SCCACHE_KEY_PREFIX} "
+        f"{_aws_credentials_env(aws_access_key, aws_secret_key)}"
+    ).rstrip()
+
+
+def checkout_command(
+    repo_owner: str, commit: str, workspace: BuildWorkspace = REMOTE_WORKSPACE
+) -> str:
+    """Check out exactly commit into the workspace, reusing any earlier checkout.
+
+    Only the commit itself is fetched. Ignored files, such as a target dir
+    inside the checkout, are kept, so a rebuild is incremental.
+    """
+    source = workspace.source_dir
+    return (
+        f"mkdir -p {source} && cd {source} && (test -d .git || git init -q) && "
+        f"git fetch -q --depth 1 {repo_url(repo_owner)} {commit} && "
+        "git checkout -q --force FETCH_HEAD && git clean -q -f -d"
+    )
+
+
+def build_command(
+    aws_access_key: str | None,
+    aws_secret_key: str | None,
+    workspace: BuildWorkspace = REMOTE_WORKSPACE,
+) -> str:
+    """Build saorsa-node, printing the compile time as a marker line.
+
+    With sccache, its server is restarted so it picks up the cache settings
+    and its statistics cover this build only.
+    """
+    env = f"CARGO_TARGET_DIR={workspace.target_dir}"
+    restart = ""
+    if workspace.sccache:
+        env = f"{env} {sccache_env(workspace.sccache, aws_access_key, aws_secret_key)}"
+        restart = (
+            f"({workspace.sccache} --stop-server >/dev/null 2>&1 || true) && "
+            f"{env} {workspace.sccache} --start-server && "
+        )
+    return (
+        f"{restart}start=$(date +%s) && "
+        f"cd {workspace.source_dir} && "
+        f"{env} {workspace.cargo} build --release --bin saorsa-node && "
+        'echo "SAORSA_BUILD_SECONDS:$(($(date +%s) - start))"'
+    )
+
+
+def sccache_stats_command(sccache: str) -> str:
+    return (
+        f'echo "SCCACHE_STATS:$({sccache} --show-stats --stats-format json)" '
+        f"&& {sccache} --stop-server >/dev/null"
+    )
+
+
+def upload_command(
+    repo_owner: str,
+    commit: str,
+    aws_access_key: str | None,
+    aws_secret_key: str | None,
+    workspace: BuildWorkspace = REMOTE_WORKSPACE,
+) -> str:
+    """Upload the built binary under its commit's key, printing its SHA-256 as a marker line."""
+    binary = workspace.binary_path
+    return (
+        f"sha256sum {binary} | awk '{{print \"SAORSA_SHA256:\" $1}}' && "
+        f"{_aws_credentials_env(aws_access_key, aws_secret_key)}"
+        f"aws s3 cp {binary} s3://{BUILDS_BUCKET}/{build_key(repo_owner, commit)}"
+    )
+
+
+def pipeline_steps(
+    repo_owner: str,
+    commit: str,
+    aws_access_key: str | None,
+    aws_secret_key: str | None,
+    workspace: BuildWorkspace = REMOTE_WORKSPACE,
+    build_wrapper: Callable[[str], str] | None = None,
+) -> list[tuple[str, str]]:
+    """The (name, command) steps that check out, build and upload a commit.
+
+    Without AWS credentials the commands take them from their environment.
+    build_wrapper, if given, wraps the build command, e.g. to run it in a
+    container; the other steps always run as they are.
+    """
+    build = build_command(aws_access_key, aws_secret_key, workspace)
+    steps = [
+        (
+            f"Check out {repo_owner}/saorsa-node ({commit[:12]})",
+            checkout_command(repo_owner, commit, workspace),
+        ),
+        ("Build saorsa-node (release)", build_wrapper(build) if build_wrapper else build),
+    ]
+    if workspace.sccache:
+        steps.append(("Collect sccache statistics", sccache_stats_command(workspace.sccache)))
+    steps.append(
+        (
+            "Upload binary to S3",
+            upload_command(repo_owner, commit, aws_access_key, aws_secret_key, workspace),
+        )
+    )
+    return steps
+
+
+def in_container(command: str, workspace: BuildWorkspace, cargo_home: str) -> str:
+    """Run command in the build container, with the workspace and cargo home mounted.
+
+    The container runs as the calling user, so files it writes stay owned by
+    them, and as linux/amd64, the platform of the node VMs.
+    """
+    mounts = " ".join(
+        f"-v {path}:{path}" for path in sorted({workspace.source_dir, workspace.target_dir})
+    )
+    return (
+        f"docker run --rm --platform linux/amd64 --user $(id -u):$(id -g) -e HOME=/tmp "
+        f"-e CARGO_HOME={CONTAINER_CARGO_HOME} -v {cargo_home}:{CONTAINER_CARGO_HOME} "
+        f"{mounts} {BUILD_CONTAINER_IMAGE} bash -c {shlex.quote(command)}"
+    )
+
+
+def build_credentials() -> tuple[str, str]:
+    """Return the build uploader's AWS access key ID and secret from the environment."""
+    aws_access_key = os.environ.get("SAORSA_BUILD_AWS_ACCESS_KEY_ID")
+    aws_secret_key = os.environ.get("SAORSA_BUILD_AWS_SECRET_ACCESS_KEY")
+    if not aws_access_key or not aws_secret_key:
+        raise RuntimeError(
+            "SAORSA_BUILD_AWS_ACCESS_KEY_ID and SAORSA_BUILD_AWS_SECRET_ACCESS_KEY must be set"
+        )
+    return aws_access_key, aws_secret_key
+
+
+def parse_sha256(lines: list[str]) -> str | None:
+    for line in lines:
+        if line.startswith("SAORSA_SHA256:"):
+            return line.removeprefix("SAORSA_SHA256:").strip()
+    return None
+
+
+def parse_build_stats(lines: list[str]) -> dict:
+    """Extract compile time and sccache hits/misses from the build ops' output.
+
+    Returns a dict with build_seconds, cache_hits and cache_misses (each None
+    if not reported).
+    """
+    stats = {"build_seconds": None, "cache_hits": None, "cache_misses": None}
+    for line in lines:
+        if line.startswith("SAORSA_BUILD_SECONDS:"):
+            stats["build_seconds"] = int(line.removeprefix("SAORSA_BUILD_SECONDS:"))
+        elif line.startswith("SCCACHE_STATS:"):
+            try:
+                counters = json.loads(line.removeprefix("SCCACHE_STATS:"))["stats"]
+            except (ValueError, KeyError):
+                continue
+            stats["cache_hits"] = sum(counters.get("cache_hits", {}).get("counts", {}).values())
+            stats["cache_misses"] = sum(counters.get("cache_misses", {}).get("counts", {}).values())
+    return stats
+
+
+def format_build_stats(stats: dict, wall_seconds: float) -> str:
+    parts = [f"total {wall_seconds:.0f}s"]
+    if stats["build_seconds"] is not None:
+        parts.append(f"compile {stats['build_seconds']}s")
+    if stats["cache_hits"] is not None:
+        hits, misses = stats["cache_hits"], stats["cache_misses"]
+        requests = hits + misses
+        rate = f"{hits / requests:.0%}" if requests else "n/a"
+        parts.append(f"sccache {hits} hit(s), {misses} miss(es), {rate} hit rate")
+    return ", ".join(parts)
+
+
+class _PipelineBuilder:
+    """Runs the checkout, build and upload pipeline for one commit.
+
+    Subclasses decide where the pipeline runs; the binary is always stored
+    under the commit's key, then its manifest recorded and the branch pointed
+    at it.
+    """
+
+    def __init__(
+        self,
+        repo_owner: str,
+        branch_name: str,
+        commit: str,
+        console: Console | None = None,
+    ):
+        self.repo_owner = repo_owner
+        self.branch_name = branch_name
+        self.commit = commit
+        self.console = console or Console()
+        self.build_stats: dict | None = None
+        self.manifest: dict | None = None
+
+    def _finish(
+        self, lines: list[str], wall_seconds: float, aws_access_key: str, aws_secret_key: str
+    ) -> str:
+        """Report the build and record its manifest. Returns the binary's URL."""
+        self.build_stats = parse_build_stats(lines)
+        self.console.print(f"  Build: {format_build_stats(self.build_stats, wall_seconds)}")
+        sha256 = parse_sha256(lines)
+        if sha256 is None:
+            raise RuntimeError(f"Building {self.repo_owner}/{self.branch_name} failed")
+        self.manifest = record_build(
+            self.repo_owner,
+            self.branch_name,
+            self.commit,
+            sha256,
+            aws_access_key,
+            aws_secret_key,
+        )
+        return build_url(self.repo_owner, self.commit)
+
+
+class SaorsaNodeBuilder(_PipelineBuilder):
     """Builds saorsa-node from source on a remote host and uploads to S3."""
 
     def __init__(
@@ -19,23 +338,16 @@ class SaorsaNodeBuilder:
         ssh_key_path: str,
         repo_owner: str,
         branch_name: str,
+        commit: str,
         console: Console | None = None,
     ):
+        super().__init__(repo_owner, branch_name, commit, console)
         self.ip = ip
         self.ssh_key_path = ssh_key_path
-        self.repo_owner = repo_owner
-        self.branch_name = branch_name
-        self.console = console or Console()
-        self.s3_key = f"{BUILDS_KEY_PREFIX}/{repo_owner}/{branch_name}/saorsa-node"
 
     def execute(self) -> str:
         """Build saorsa-node and upload to S3. Returns the S3 URL of the uploaded binary."""
-        aws_access_key = os.environ.get("SAORSA_BUILD_AWS_ACCESS_KEY_ID")
-        aws_secret_key = os.environ.get("SAORSA_BUILD_AWS_SECRET_ACCESS_KEY")
-        if not aws_access_key or not aws_secret_key:
-            raise RuntimeError(
-                "SAORSA_BUILD_AWS_ACCESS_KEY_ID and SAORSA_BUILD_AWS_SECRET_ACCESS_KEY must be set"
-            )
+        aws_access_key, aws_secret_key = build_credentials()
 
         self.console.print(f"Connecting to {self.ip} as root...")
         inventory = Inventory(
@@ -64,71 +376,142 @@ class SaorsaNodeBuilder:
                 state,
                 server.shell,
                 name="Install build dependencies",
-                commands=[
-                    "apt-get update -qq && apt-get install -y -qq "
-                    "curl build-essential pkg-config libssl-dev git unzip"
-                ],
+                commands=[install_packages_command(BUILD_PACKAGES)],
             )
 
             add_op(
                 state,
                 server.shell,
                 name="Install AWS CLI v2",
-                commands=[
-                    'curl -sSL "https://awscli.amazonaws.com/awscli-exe-linux-x86_64.zip" '
-                    "-o /tmp/awscliv2.zip && "
-                    "unzip -q /tmp/awscliv2.zip -d /tmp && "
-                    "/tmp/aws/install && "
-                    "rm -rf /tmp/awscliv2.zip /tmp/aws"
-                ],
+                commands=[install_aws_cli_command()],
             )
 
             add_op(
                 state,
                 server.shell,
                 name="Install Rust toolchain",
-                commands=[
-                    "curl --proto '=https' --tlsv1.2 -sSf https://sh.rustup.rs | sh -s -- -y"
-                ],
+                commands=[install_rust_command()],
             )
 
             add_op(
                 state,
                 server.shell,
-                name=f"Clone {self.repo_owner}/saorsa-node ({self.branch_name})",
-                commands=[
-                    f"git clone --branch {self.branch_name} --depth 1 "
-                    f"https://github.com/{self.repo_owner}/saorsa-node.git /root/saorsa-node"
-                ],
-            )
-
-            add_op(
-                state,
-                server.shell,
-                name="Build saorsa-node (release)",
-                commands=[
-                    "cd /root/saorsa-node && "
-                    "/root/.cargo/bin/cargo build --release --bin saorsa-node"
-                ],
+                name="Install sccache",
+                commands=[install_sccache_command()],
             )
 
-            add_op(
-                state,
-                server.shell,
-                name="Upload binary to S3",
-                commands=[
-                    f"AWS_ACCESS_KEY_ID={aws_access_key} "
-                    f"AWS_SECRET_ACCESS_KEY={aws_secret_key} "
-                    f"aws s3 cp /root/saorsa-node/target/release/saorsa-node "
-                    f"s3://{BUILDS_BUCKET}/{self.s3_key}"
-                ],
-            )
+            pipeline_results = [
+                add_op(state, server.shell, name=name, commands=[command])
+                for name, command in pipeline_steps(
+                    self.repo_owner, self.commit, aws_access_key, aws_secret_key
+                )
+            ]
 
             self.console.print("Running build operations...")
+            start = time.monotonic()
             run_ops(state)
+            wall_seconds = time.monotonic() - start
+            lines = self._output_lines(pipeline_results)
         finally:
             disconnect_all(state)
 
-        from saorsa_deploy.binary_source import get_custom_build_url
+        if state.failed_hosts:
+            raise RuntimeError(f"Building {self.repo_owner}/{self.branch_name} failed")
+        return self._finish(lines, wall_seconds, aws_access_key, aws_secret_key)
+
+    def _output_lines(self, results) -> list[str]:
+        lines = []
+        for op_results in results:
+            try:
+                host = next(iter(op_results))
+            except (StopIteration, TypeError):
+                continue
+            lines.extend(op_results[host].stdout_lines)
+        return lines
+
+
+class LocalSaorsaNodeBuilder(_PipelineBuilder):
+    """Builds saorsa-node on this machine and uploads to S3.
+
+    Runs the same pipeline as SaorsaNodeBuilder, natively (through sccache if
+    it is installed) or in the BUILD_CONTAINER_IMAGE container. The checkout,
+    target dir and container cargo home persist under build_dir, so repeat
+    builds are incremental. The AWS credentials are passed to the commands in
+    their environment, never on a command line.
+    """
+
+    def __init__(
+        self,
+        repo_owner: str,
+        branch_name: str,
+        commit: str,
+        container: bool = False,
+        build_dir: str = LOCAL_BUILD_DIR,
+        console: Console | None = None,
+    ):
+        super().__init__(repo_owner, branch_name, commit, console)
+        self.container = container
+        self.build_dir = os.path.expanduser(build_dir)
+        if container:
+            self.workspace = BuildWorkspace(
+                source_dir=f"{self.build_dir}/saorsa-node",
+                target_dir=f"{self.build_dir}/target-container",
+                cargo=CONTAINER_CARGO_PATH,
+                sccache=None,
+            )
+        else:
+            self.workspace = BuildWorkspace(
+                source_dir=f"{self.build_dir}/saorsa-node",
+                target_dir=f"{self.build_dir}/target",
+                cargo=shutil.which("cargo") or "cargo",
+                sccache=shutil.which("sccache"),
+            )
+
+    def required_tools(self) -> list[str]:
+        return ["git", "sha256sum", "aws", "docker" if self.container else "cargo"]
+
+    def execute(self) -> str:
+        """Build saorsa-node and upload to S3. Returns the S3 URL of the uploaded binary."""
+        aws_access_key, aws_secret_key = build_credentials()
+        if not self.container and (sys.platform, platform.machine()) != ("linux", "x86_64"):
+            raise RuntimeError(
+                "Native local builds must run on x86_64 Linux, like the node VMs; "
+                "use --container elsewhere"
+            )
+        missing = [tool for tool in self.required_tools() if shutil.which(tool) is None]
+        if missing:
+            raise RuntimeError(f"Local builds need {', '.join(missing)} on the PATH")
+
+        cargo_home = f"{self.build_dir}/cargo-home"
+        for path in (self.workspace.target_dir, cargo_home):
+            os.makedirs(path, exist_ok=True)
+
+        env = {
+            **os.environ,
+            "AWS_ACCESS_KEY_ID": aws_access_key,
+            "AWS_SECRET_ACCESS_KEY": aws_secret_key,
+            "SCCACHE_SERVER_PORT": str(LOCAL_SCCACHE_PORT),
+            "SCCACHE_DIR": f"{self.build_dir}/sccache",
+        }
+        build_wrapper = None
+        if self.container:
+            build_wrapper = partial(in_container, workspace=self.workspace, cargo_home=cargo_home)
+        steps = pipeline_steps(
+            self.repo_owner, self.commit, None, None, self.workspace, build_wrapper
+        )
+        lines = []
+        start = time.monotonic()
+        for name, command in steps:
+            self.console.print(f"{name}...")
+            lines.extend(self._run(name, command, env))
+        wall_seconds = time.monotonic() - start
+        return self._finish(lines, wall_seconds, aws_access_key, aws_secret_key)
 
-        return get_custom_build_url(self.repo_owner, self.branch_name)
+    def _run(self, name: str, command: str, env: dict[str, str]) -> list[str]:
+        result = subprocess.run(["bash", "-c", command], capture_output=True, text=True, env=env)
+        if result.returncode != 0:
+            output = (result.stdout + result.stderr).strip().splitlines()
+            for line in output[-20:]:
+                self.console.print(f"  {line}", style="dim", markup=False, highlight=False)
+            raise RuntimeError(f"{name} failed (exit code {result.returncode})")
+        return result.stdout.splitlines()
@@ -7,7 +7,7 @@ from pyinfra.api.operations import run_ops
 from pyinfra.operations import files, server, systemd
 from rich.console import Console
 
-from saorsa_deploy.binary_source import RELEASE_ASSET_NAME, get_release_url
+from saorsa_deploy.binary_source import RELEASE_ASSET_NAME, fetch_command, get_release_url
 
 BINARY_INSTALL_PATH = "/usr/local/bin/saorsa-node"
 SERVICE_NAME = "saorsa-genesis-node"
@@ -111,7 +111,7 @@ class SaorsaGenesisNodeProvisioner:
                 install_cmd = (
                     f"test -f {BINARY_INSTALL_PATH} "
                     f"&& echo 'SAORSA_BINARY:SKIP' || "
-                    f"(wget -q {download_url} -O /tmp/{RELEASE_ASSET_NAME} && "
+                    f"({fetch_command(download_url, f'/tmp/{RELEASE_ASSET_NAME}')} && "
                     f"tar -xzf /tmp/{RELEASE_ASSET_NAME} -C /tmp/ && "
                     f"mv /tmp/saorsa-node {BINARY_INSTALL_PATH} && "
                     f"chmod +x {BINARY_INSTALL_PATH} && "
@@ -122,7 +122,7 @@ class SaorsaGenesisNodeProvisioner:
                 install_cmd = (
                     f"test -f {BINARY_INSTALL_PATH} "
                     f"&& echo 'SAORSA_BINARY:SKIP' || "
-                    f"(wget -q {download_url} -O {BINARY_INSTALL_PATH} && "
+                    f"({fetch_command(download_url, BINARY_INSTALL_PATH)} && "
                     f"chmod +x {BINARY_INSTALL_PATH} && "
                     f"echo 'SAORSA_BINARY:INSTALLED')"
                 )
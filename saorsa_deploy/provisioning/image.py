@@ -0,0 +1,104 @@
+from pyinfra.api import Config, Inventory, State
+from pyinfra.api.connect import connect_all, disconnect_all
+from pyinfra.api.operation import add_op
+from pyinfra.api.operations import run_ops
+from pyinfra.operations import server
+from rich.console import Console
+
+from saorsa_deploy.binary_source import DOWNLOAD_CACHE_DIR, cached_download_path
+from saorsa_deploy.images import PROFILE_BUILD, PROFILE_NODE
+from saorsa_deploy.provisioning.build import (
+    BUILD_PACKAGES,
+    install_aws_cli_command,
+    install_packages_command,
+    install_rust_command,
+    install_sccache_command,
+)
+
+NODE_PACKAGES = ["ca-certificates", "wget", "tar"]
+
+
+def cache_download_command(url: str) -> str:
+    """Download url into the image's download cache unless it is already there."""
+    path = cached_download_path(url)
+    return (
+        f"test -f {path} || "
+        f"(mkdir -p {DOWNLOAD_CACHE_DIR} && wget -q {url} -O {path}.part && mv {path}.part {path})"
+    )
+
+
+# Run last: the snapshot should not carry this droplet's identity, logs or apt lists
+PREPARE_SNAPSHOT_COMMAND = (
+    "apt-get clean && rm -rf /var/lib/apt/lists/* /tmp/* && cloud-init clean --logs --machine-id"
+)
+
+
+class ImageBaker:
+    """Installs a baked image profile on a remote host using Pyinfra.
+
+    Every step checks whether it is already satisfied, so baking again on the
+    same droplet only does what is missing.
+    """
+
+    def __init__(
+        self,
+        ip: str,
+        profile: str,
+        ssh_key_path: str = "~/.ssh/id_rsa",
+        release_url: str | None = None,
+        console: Console | None = None,
+    ):
+        self.ip = ip
+        self.profile = profile
+        self.ssh_key_path = ssh_key_path
+        self.release_url = release_url
+        self.console = console or Console()
+
+    def steps(self) -> list[tuple[str, str]]:
+        """The (name, command) steps of the profile, in order."""
+        steps = [("Wait for cloud-init to finish", "cloud-init status --wait")]
+        if self.profile == PROFILE_NODE:
+            steps.append(("Install runtime packages", install_packages_command(NODE_PACKAGES)))
+            if self.release_url:
+                steps.append(
+                    ("Cache saorsa-node release", cache_download_command(self.release_url))
+                )
+        elif self.profile == PROFILE_BUILD:
+            steps += [
+                ("Install build dependencies", install_packages_command(BUILD_PACKAGES)),
+                ("Install AWS CLI v2", install_aws_cli_command()),
+                ("Install Rust toolchain", install_rust_command()),
+                ("Install sccache", install_sccache_command()),
+            ]
+        else:
+            raise ValueError(f"Unknown image profile: {self.profile}")
+        steps.append(("Prepare for snapshot", PREPARE_SNAPSHOT_COMMAND))
+        return steps
+
+    def execute(self) -> None:
+        """Run the profile's steps on the host."""
+        self.console.print(f"Connecting to {self.ip} as root...")
+        inventory = Inventory(
+            (
+                [
+                    (
+                        self.ip,
+                        {"ssh_user": "root", "ssh_key": self.ssh_key_path},
+                    ),
+                ],
+                {},
+            ),
+        )
+        state = State(inventory=inventory, config=Config())
+        connect_all(state)
+
+        try:
+            for name, command in self.steps():
+                add_op(state, server.shell, name=name, commands=[command])
+            self.console.print(f"Running {self.profile} image operations...")
+            run_ops(state)
+        finally:
+            disconnect_all(state)
+
+        if state.failed_hosts:
+            raise RuntimeError(f"Baking the {self.profile} image on {self.ip} failed")
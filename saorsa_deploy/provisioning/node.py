@@ -5,7 +5,7 @@ from pyinfra.api.operations import run_ops
 from pyinfra.operations import server
 from rich.console import Console
 
-from saorsa_deploy.binary_source import RELEASE_ASSET_NAME, get_release_url
+from saorsa_deploy.binary_source import RELEASE_ASSET_NAME, fetch_command, get_release_url
 from saorsa_deploy.provisioning.genesis import BINARY_INSTALL_PATH
 from saorsa_deploy.provisioning.progress import (
     RichLiveProgressHandler,
@@ -85,6 +85,8 @@ class SaorsaNodeProvisioner:
         self.console = console or Console()
         self.binary_url = binary_url
         self.binary_is_archive = binary_is_archive
+        # SHA-256 of the installed binary, keyed by host IP, filled in by execute()
+        self.binary_hashes: dict[str, str] = {}
 
     def execute(self) -> None:
         """Provision all hosts with saorsa-node services."""
@@ -113,24 +115,29 @@ class SaorsaNodeProvisioner:
             self.console.print(f"Connecting to {len(self.host_ips)} host(s) as root...")
             connect_all(state)
 
+            report_hash = (
+                f' && echo "SAORSA_SHA256:$(sha256sum {BINARY_INSTALL_PATH} | cut -d" " -f1)"'
+            )
             if self.binary_is_archive:
                 install_cmd = (
                     f"test -f {BINARY_INSTALL_PATH} "
                     f"&& echo 'SAORSA_BINARY:SKIP' || "
-                    f"(wget -q {download_url} -O /tmp/{RELEASE_ASSET_NAME} && "
+                    f"({fetch_command(download_url, f'/tmp/{RELEASE_ASSET_NAME}')} && "
                     f"tar -xzf /tmp/{RELEASE_ASSET_NAME} -C /tmp/ && "
                     f"mv /tmp/saorsa-node {BINARY_INSTALL_PATH} && "
                     f"chmod +x {BINARY_INSTALL_PATH} && "
                     f"rm -f /tmp/{RELEASE_ASSET_NAME} && "
                     f"echo 'SAORSA_BINARY:INSTALLED')"
+                    f"{report_hash}"
                 )
             else:
                 install_cmd = (
                     f"test -f {BINARY_INSTALL_PATH} "
                     f"&& echo 'SAORSA_BINARY:SKIP' || "
-                    f"(wget -q {download_url} -O {BINARY_INSTALL_PATH} && "
+                    f"({fetch_command(download_url, BINARY_INSTALL_PATH)} && "
                     f"chmod +x {BINARY_INSTALL_PATH} && "
                     f"echo 'SAORSA_BINARY:INSTALLED')"
+                    f"{report_hash}"
                 )
             install_results = add_op(
                 state,
@@ -202,8 +209,20 @@ class SaorsaNodeProvisioner:
                 self.console.print(f"  [red]Failed: {host.name}[/red]")
             raise RuntimeError(f"{len(failed)} host(s) failed provisioning")
 
+        self._collect_binary_hashes(install_results)
         self._report_results(install_results, svc_results)
 
+    def _collect_binary_hashes(self, install_results):
+        """Record the SHA-256 each host reported for its installed binary."""
+        try:
+            hosts = list(install_results.keys())
+        except (TypeError, AttributeError):
+            return
+        for host in hosts:
+            for line in install_results[host].stdout_lines:
+                if line.startswith("SAORSA_SHA256:"):
+                    self.binary_hashes[host.name] = line.removeprefix("SAORSA_SHA256:").strip()
+
     def _report_results(self, install_results, svc_results):
         """Print post-execution summary with idempotency information."""
         try:
@@ -30,6 +30,25 @@ resource "aws_s3_bucket_policy" "builds_public_read" {
   })
 }
 
+# Expire compile cache entries rather than keep every crate version ever built;
+# an expired entry is just compiled and uploaded again on the next miss
+resource "aws_s3_bucket_lifecycle_configuration" "builds" {
+  bucket = aws_s3_bucket.builds.id
+
+  rule {
+    id     = "expire-sccache"
+    status = "Enabled"
+
+    filter {
+      prefix = "sccache/"
+    }
+
+    expiration {
+      days = 30
+    }
+  }
+}
+
 resource "aws_iam_user" "build_uploader" {
   name = "saorsa-build-uploader"
 }
@@ -46,6 +65,11 @@ resource "aws_iam_user_policy" "build_uploader" {
         Action = "s3:PutObject"
         Resource = "${aws_s3_bucket.builds.arn}/*"
       },
+      {
+        Effect = "Allow"
+        Action = "s3:GetObject"
+        Resource = "${aws_s3_bucket.builds.arn}/sccache/*"
+      },
     ]
   })
 }
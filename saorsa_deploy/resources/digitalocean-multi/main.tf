@@ -0,0 +1,39 @@
+locals {
+  vms = {
+    for pair in setproduct(var.regions, range(var.vm_count)) :
+    "${pair[0]}-${pair[1] + 1}" => {
+      region = pair[0]
+      index  = pair[1] + 1
+    }
+  }
+}
+
+resource "digitalocean_droplet" "node_vm" {
+  for_each = local.vms
+  name     = "${var.name}-saorsa-node-${each.value.region}-${each.value.index}"
+  region   = each.value.region
+  size     = "s-2vcpu-4gb"
+  image    = var.image
+  ssh_keys = var.ssh_key_ids
+  tags     = ["saorsa-deploy:${lower(var.name)}", "saorsa-region:${lower(var.name)}:${each.value.region}"]
+
+  # Re-baking the image must not replace existing droplets
+  lifecycle {
+    ignore_changes = [image]
+  }
+}
+
+resource "digitalocean_volume" "node_storage" {
+  for_each                = local.vms
+  region                  = each.value.region
+  name                    = "${lower(var.name)}-saorsa-storage-${each.value.region}-${each.value.index}"
+  size                    = var.attached_volume_size
+  initial_filesystem_type = "ext4"
+  tags                    = ["saorsa-deploy:${lower(var.name)}", "saorsa-region:${lower(var.name)}:${each.value.region}"]
+}
+
+resource "digitalocean_volume_attachment" "node_storage_attach" {
+  for_each   = local.vms
+  droplet_id = digitalocean_droplet.node_vm[each.key].id
+  volume_id  = digitalocean_volume.node_storage[each.key].id
+}
@@ -0,0 +1,23 @@
+output "droplet_ips" {
+  value = {
+    for region in var.regions : region => [
+      for i in range(var.vm_count) : digitalocean_droplet.node_vm["${region}-${i + 1}"].ipv4_address
+    ]
+  }
+}
+
+output "droplet_ids" {
+  value = {
+    for region in var.regions : region => [
+      for i in range(var.vm_count) : digitalocean_droplet.node_vm["${region}-${i + 1}"].id
+    ]
+  }
+}
+
+output "volume_ids" {
+  value = {
+    for region in var.regions : region => [
+      for i in range(var.vm_count) : digitalocean_volume.node_storage["${region}-${i + 1}"].id
+    ]
+  }
+}
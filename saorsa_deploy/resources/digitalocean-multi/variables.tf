@@ -0,0 +1,41 @@
+variable "do_token" {
+  type      = string
+  sensitive = true
+}
+
+variable "name" {
+  type = string
+}
+
+variable "regions" {
+  type = list(string)
+}
+
+variable "vm_count" {
+  type = number
+}
+
+variable "image" {
+  type    = string
+  default = "ubuntu-24-04-x64"
+}
+
+variable "attached_volume_size" {
+  type    = number
+  default = 20
+}
+
+variable "ssh_key_ids" {
+  type = list(number)
+  default = [
+    36971688, # David Irvine
+    30643816, # Anselme Grumbach
+    30113222, # Qi Ma
+    42022675, # Shu
+    30878672, # Chris O'Neil
+    31216015, # QA
+    34183228, # GH Actions Automation
+    38596814, # sn-testnet-workflows automation
+    54385801  # saorsa-deploy
+  ]
+}
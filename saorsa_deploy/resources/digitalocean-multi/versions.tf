@@ -0,0 +1,18 @@
+terraform {
+  required_version = ">= 1.10"
+
+  required_providers {
+    digitalocean = {
+      source  = "digitalocean/digitalocean"
+      version = "~> 2.0"
+    }
+  }
+
+  backend "s3" {
+    bucket = "maidsafe-org-infra-tfstate"
+    region = "eu-west-2"
+    # key is set at init time via -backend-config
+    # S3-native state locking (a <key>.tflock object), available from Terraform 1.10
+    use_lockfile = true
+  }
+}
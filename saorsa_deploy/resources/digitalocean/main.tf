@@ -3,8 +3,14 @@ resource "digitalocean_droplet" "node_vm" {
   name     = "${var.name}-saorsa-node-${var.region}-${count.index + 1}"
   region   = var.region
   size     = "s-2vcpu-4gb"
-  image    = "ubuntu-24-04-x64"
+  image    = var.image
   ssh_keys = var.ssh_key_ids
+  tags     = ["saorsa-deploy:${lower(var.name)}", "saorsa-region:${lower(var.name)}:${var.region}"]
+
+  # Re-baking the image must not replace existing droplets
+  lifecycle {
+    ignore_changes = [image]
+  }
 }
 
 resource "digitalocean_volume" "node_storage" {
@@ -13,6 +19,7 @@ resource "digitalocean_volume" "node_storage" {
   name                    = "${lower(var.name)}-saorsa-storage-${var.region}-${count.index + 1}"
   size                    = var.attached_volume_size
   initial_filesystem_type = "ext4"
+  tags                    = ["saorsa-deploy:${lower(var.name)}", "saorsa-region:${lower(var.name)}:${var.region}"]
 }
 
 resource "digitalocean_volume_attachment" "node_storage_attach" {
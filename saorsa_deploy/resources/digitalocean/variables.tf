@@ -15,6 +15,11 @@ variable "vm_count" {
   type = number
 }
 
+variable "image" {
+  type    = string
+  default = "ubuntu-24-04-x64"
+}
+
 variable "attached_volume_size" {
   type    = number
   default = 20
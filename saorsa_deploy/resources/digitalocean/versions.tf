@@ -1,5 +1,5 @@
 terraform {
-  required_version = ">= 1.0"
+  required_version = ">= 1.10"
 
   required_providers {
     digitalocean = {
@@ -12,5 +12,7 @@ terraform {
     bucket = "maidsafe-org-infra-tfstate"
     region = "eu-west-2"
     # key is set at init time via -backend-config
+    # S3-native state locking (a <key>.tflock object), available from Terraform 1.10
+    use_lockfile = true
   }
 }
@@ -1,77 +1,602 @@
+import gzip
 import json
+import random
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
 
-import boto3
+from botocore.exceptions import ClientError
+
+from saorsa_deploy.aws import s3_client
+from saorsa_deploy.deployment import (
+    HOST_FIELDS,
+    STATE_SCHEMA_VERSION,
+    Deployment,
+    Host,
+    hosts_to_state,
+    upgrade_state,
+)
 
 S3_BUCKET = "maidsafe-org-infra-tfstate"
 S3_REGION = "eu-west-2"
 S3_KEY_PREFIX = "saorsa-deploy/deployments"
+# One small object summarising every deployment, so listing them is one request
+S3_INDEX_KEY = "saorsa-deploy/deployment-index.json"
+INDEX_VERSION = 1
+# State fields summarised in the index (besides the hosts and regions)
+INDEX_FIELDS = {"binary_source", "created_at"}
+MAX_CONCURRENT_FETCHES = 16
+# Journal events replayed on load before they are folded into a new snapshot
+COMPACT_AFTER_EVENTS = 20
+
+MAX_WRITE_ATTEMPTS = 8
+WRITE_RETRY_BASE_DELAY = 0.1
+# Error codes S3 returns when a conditional write lost a race with another writer
+WRITE_CONFLICT_CODES = ("PreconditionFailed", "412", "ConditionalRequestConflict", "409")
 
 
 def _get_s3_client():
-    return boto3.client("s3", region_name=S3_REGION)
+    return s3_client(S3_REGION)
+
+
+def _state_key(name: str) -> str:
+    return f"{S3_KEY_PREFIX}/{name}.json.gz"
+
+
+def _legacy_state_key(name: str) -> str:
+    # Schema version 1 documents were stored as indented, uncompressed JSON
+    return f"{S3_KEY_PREFIX}/{name}.json"
+
+
+def _state_cache_path(name: str) -> Path:
+    return Path.cwd() / ".saorsa" / "state" / f"{name}.json"
+
+
+def _read_cached_state(name: str) -> dict | None:
+    """Return the cached {"etag", "state"} entry for a deployment, if any."""
+    try:
+        return json.loads(_state_cache_path(name).read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def _write_cached_state(name: str, etag: str, state: dict) -> None:
+    # The cache only saves downloads, so failing to write it is not an error
+    path = _state_cache_path(name)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({"etag": etag, "state": state}))
+    except OSError:
+        pass
+
+
+def _drop_cached_state(name: str) -> None:
+    _state_cache_path(name).unlink(missing_ok=True)
+
+
+def _put_deployment_state(name: str, state: dict, **conditions) -> None:
+    """Write deployment state to S3 and refresh the local cache from the returned ETag.
+
+    The document is stored as gzip-compressed, compact JSON. When it is first
+    created, any schema version 1 object it was upgraded from is removed.
+    """
+    client = _get_s3_client()
+    resp = client.put_object(
+        Bucket=S3_BUCKET,
+        Key=_state_key(name),
+        Body=gzip.compress(json.dumps(state, separators=(",", ":")).encode()),
+        ContentType="application/json",
+        ContentEncoding="gzip",
+        **conditions,
+    )
+    _write_cached_state(name, resp["ETag"], state)
+    if "IfNoneMatch" in conditions:
+        client.delete_object(Bucket=S3_BUCKET, Key=_legacy_state_key(name))
+
+
+def merge_state(base: dict, updates: dict) -> dict:
+    """Return base with updates merged in field by field.
+
+    Nested dicts are merged recursively and any other value is replaced, so
+    updates that touch different keys (for example different regions under
+    vm_ips) commute.
+    """
+    merged = dict(base)
+    for key, value in updates.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_state(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def _write_with_retry(
+    what: str,
+    fetch: Callable[[], tuple[dict | None, str | None]],
+    put: Callable[..., None],
+    build: Callable[[dict | None], dict],
+) -> dict:
+    """Read-modify-write an S3 document with optimistic concurrency.
+
+    fetch returns the current document (None if there is none) and its ETag;
+    build receives the current document and returns the one to write. The
+    write is conditional on the object being unchanged since it was read
+    (If-Match on its ETag, or If-None-Match: * when creating it); if another
+    writer got there first, the document is re-read, rebuilt and the write
+    retried with jittered backoff.
+    """
+    for attempt in range(MAX_WRITE_ATTEMPTS):
+        current, etag = fetch()
+        document = build(current)
+        conditions = {"IfMatch": etag} if etag else {"IfNoneMatch": "*"}
+        try:
+            put(document, **conditions)
+            return document
+        except ClientError as e:
+            if e.response["Error"]["Code"] not in WRITE_CONFLICT_CODES:
+                raise
+        time.sleep(random.uniform(0, WRITE_RETRY_BASE_DELAY * 2**attempt))
+    raise RuntimeError(
+        f"{what} kept changing during the update; gave up after {MAX_WRITE_ATTEMPTS} attempts"
+    )
+
+
+def _write_deployment_state(name: str, build: Callable[[dict | None], dict]) -> dict:
+    """Read-modify-write deployment state with optimistic concurrency (see _write_with_retry)."""
+
+    def put(state, **conditions):
+        try:
+            _put_deployment_state(name, state, **conditions)
+        except ClientError:
+            # The cached copy may be stale, so the next read must download the object
+            _drop_cached_state(name)
+            raise
+
+    return _write_with_retry(
+        f"Deployment state for '{name}'",
+        lambda: _fetch_deployment_state(name),
+        put,
+        build,
+    )
 
 
 def save_deployment_state(
     name: str,
     regions: list[tuple[str, str]],
     terraform_variables: dict[str, str],
-    bootstrap_ip: str,
-    vm_ips: dict[str, list[str]],
+    bootstrap_ip: str | None,
+    hosts: list[Host],
+    engine: str = "per-region",
+    state_keys: list[str] | None = None,
 ) -> None:
-    """Save deployment metadata to S3 for later use by other commands."""
-    state = {
+    """Save deployment metadata to S3 for later use by other commands.
+
+    The given fields replace those already saved; fields written by other
+    commands (such as bootstrap_port) are kept, as are the provisioning
+    details (node ports, binary hash, time) of hosts that still exist.
+    state_keys records the Terraform state objects of the deployment; its
+    presence also marks the deployment as using per-deployment state keys.
+    """
+    fields = {
+        "schema_version": STATE_SCHEMA_VERSION,
         "name": name,
         "regions": [[provider, region] for provider, region in regions],
         "terraform_variables": terraform_variables,
         "bootstrap_ip": bootstrap_ip,
-        "vm_ips": vm_ips,
+        "engine": engine,
+        "state_keys": state_keys or [],
+        "host_fields": list(HOST_FIELDS),
     }
-    client = _get_s3_client()
-    client.put_object(
-        Bucket=S3_BUCKET,
-        Key=f"{S3_KEY_PREFIX}/{name}.json",
-        Body=json.dumps(state, indent=2),
-        ContentType="application/json",
+
+    _append_event(name, "infra", {k: v for k, v in fields.items() if k != "host_fields"})
+
+    def build(current):
+        current = _fold_journal(name, current or {})
+        kept = _keep_provisioning(hosts, Deployment(current))
+        created_at = current.get("created_at") or _now()
+        return {
+            **current,
+            **fields,
+            "created_at": created_at,
+            "hosts": hosts_to_state(kept),
+        }
+
+    state = _write_deployment_state(name, build)
+    _update_index(lambda deployments: {**deployments, name: index_entry(state)})
+
+
+def _keep_provisioning(hosts: list[Host], previous: Deployment) -> list[Host]:
+    """Copy provisioning details of hosts unchanged since the previous save."""
+    kept = []
+    for host in hosts:
+        old = previous.host(host.ip)
+        if old is None or old.region != host.region or old.droplet_id != host.droplet_id:
+            kept.append(host)
+            continue
+        kept.append(
+            Host(
+                host.ip,
+                host.region,
+                host.droplet_id,
+                host.volume_id,
+                node_ports=old.node_ports,
+                binary_sha256=old.binary_sha256,
+                provisioned_at=old.provisioned_at,
+            )
+        )
+    return kept
+
+
+def update_deployment_state(name: str, updates: dict, command: str | None = None) -> None:
+    """Record updates to existing deployment state in S3.
+
+    Updates are appended to the deployment's journal as a small event object
+    (see _append_event) instead of rewriting the whole state document; loads
+    merge them in field by field (see merge_state), so concurrent updates from
+    other commands are not lost. command names the step for the audit trail.
+    The deployment index is refreshed when a field it lists changes.
+    Raises RuntimeError if the deployment state is not found.
+    """
+    snapshot, _ = _fetch_deployment_state(name)
+    if snapshot is None:
+        raise _not_found_error(name)
+    _append_event(name, command, updates, snapshot.get("journal_position"))
+    if INDEX_FIELDS.intersection(updates):
+        state = load_deployment_state(name)
+        _update_index(lambda deployments: {**deployments, name: index_entry(state)})
+
+
+def _journal_prefix(name: str) -> str:
+    return f"{S3_KEY_PREFIX}/{name}.journal/"
+
+
+def _event_key(name: str, number: int) -> str:
+    return f"{_journal_prefix(name)}{number:012d}.json"
+
+
+def _event_number(key: str | None) -> int:
+    """The sequence number of a journal event key; 0 for no event."""
+    return int(key.rsplit("/", 1)[1].removesuffix(".json")) if key else 0
+
+
+def _append_event(
+    name: str, command: str | None, updates: dict, position: str | None = None
+) -> None:
+    """Write one journal event recording updates to a deployment's state.
+
+    Events are numbered 1, 2, 3, ... without gaps: each is created with
+    IfNoneMatch at the number after the last event listed, so S3 rather than
+    the writer's clock decides the order, and a writer that loses the race
+    for a number lists the journal again and takes the next free one.
+    Appending needs no read of the state document; position, the
+    journal_position of a snapshot, only saves listing events folded into it.
+    """
+    event = {"at": _now(), "command": command, "updates": updates}
+    after = position
+    for _ in range(MAX_WRITE_ATTEMPTS):
+        keys = _list_journal(name, after)
+        key = _event_key(name, _event_number(keys[-1] if keys else after) + 1)
+        try:
+            _get_s3_client().put_object(
+                Bucket=S3_BUCKET,
+                Key=key,
+                Body=json.dumps(event, separators=(",", ":")),
+                ContentType="application/json",
+                IfNoneMatch="*",
+            )
+            return
+        except ClientError as e:
+            if e.response["Error"]["Code"] not in WRITE_CONFLICT_CODES:
+                raise
+        after = key
+    raise RuntimeError(
+        f"Journal of '{name}' kept growing during the update; "
+        f"gave up after {MAX_WRITE_ATTEMPTS} attempts"
     )
 
 
-def update_deployment_state(name: str, updates: dict) -> None:
-    """Merge updates into existing deployment state in S3."""
-    state = load_deployment_state(name)
-    state.update(updates)
+def _list_journal(name: str, after: str | None = None) -> list[str]:
+    """Return the keys of a deployment's journal events written after the given key."""
     client = _get_s3_client()
-    client.put_object(
-        Bucket=S3_BUCKET,
-        Key=f"{S3_KEY_PREFIX}/{name}.json",
-        Body=json.dumps(state, indent=2),
-        ContentType="application/json",
+    paginator = client.get_paginator("list_objects_v2")
+    params = {"Bucket": S3_BUCKET, "Prefix": _journal_prefix(name)}
+    if after:
+        params["StartAfter"] = after
+    return [obj["Key"] for page in paginator.paginate(**params) for obj in page.get("Contents", [])]
+
+
+def _pending_events(name: str, position: str | None) -> list[str]:
+    """Return the keys of the journal events not yet folded into a snapshot.
+
+    Events are numbered without gaps, so if the event after position does not
+    exist none is pending, and the journal is only listed when it does.
+    """
+    try:
+        _get_s3_client().head_object(
+            Bucket=S3_BUCKET, Key=_event_key(name, _event_number(position) + 1)
+        )
+    except ClientError as e:
+        if e.response["Error"]["Code"] in ("404", "NoSuchKey"):
+            return []
+        raise
+    return _list_journal(name, position)
+
+
+def _read_events(keys: list[str]) -> list[dict]:
+    """Fetch journal events concurrently, returned in the order of keys."""
+    client = _get_s3_client()
+
+    def read(key):
+        return json.loads(client.get_object(Bucket=S3_BUCKET, Key=key)["Body"].read())
+
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_FETCHES) as pool:
+        return list(pool.map(read, keys))
+
+
+def _replay(state: dict, keys: list[str]) -> dict:
+    for event in _read_events(keys):
+        state = merge_state(state, event["updates"])
+    return state
+
+
+def _fold_journal(name: str, snapshot: dict) -> dict:
+    """Return snapshot with the journal events written since it merged in.
+
+    The result records the last folded event as its journal_position, so
+    writing it as the new snapshot compacts the journal.
+    """
+    keys = _pending_events(name, snapshot.get("journal_position"))
+    if not keys:
+        return snapshot
+    return {**_replay(snapshot, keys), "journal_position": keys[-1]}
+
+
+def compact_deployment_state(name: str) -> None:
+    """Fold the journal events written since the last snapshot into a new snapshot.
+
+    The events themselves are kept as the deployment's audit trail.
+    """
+
+    def build(current):
+        if current is None:
+            raise _not_found_error(name)
+        return _fold_journal(name, current)
+
+    _write_deployment_state(name, build)
+
+
+def load_deployment_events(name: str) -> list[dict]:
+    """Return every journal event of a deployment, oldest first."""
+    return _read_events(_list_journal(name))
+
+
+def _not_found_error(name: str) -> RuntimeError:
+    return RuntimeError(
+        f"No deployment state found for '{name}'. "
+        "Was this deployment created with the infra command?"
     )
 
 
 def load_deployment_state(name: str) -> dict:
     """Load deployment metadata from S3.
 
-    Returns a dict with keys: name, regions, terraform_variables.
-    Raises RuntimeError if the deployment state is not found.
+    A copy is cached under .saorsa/state/ with its ETag, and later loads make a
+    conditional GET: if the object is unchanged S3 answers 304 and the cached
+    copy is used without downloading the JSON again.
+
+    The cached document is a snapshot: the journal events written since are
+    replayed on top of it (see _pending_events), and once COMPACT_AFTER_EVENTS
+    have accumulated they are folded into a new snapshot.
+
+    Returns the state document in the current schema (see
+    saorsa_deploy.deployment); wrap it in a Deployment for indexed access to
+    its hosts. Raises RuntimeError if the deployment state is not found.
+    """
+    snapshot, _ = _fetch_deployment_state(name)
+    if snapshot is None:
+        raise _not_found_error(name)
+    keys = _pending_events(name, snapshot.get("journal_position"))
+    if not keys:
+        return snapshot
+    state = {**_replay(snapshot, keys), "journal_position": keys[-1]}
+    if len(keys) >= COMPACT_AFTER_EVENTS:
+        # Compaction only saves later loads work, so losing a race is not an error
+        try:
+            compact_deployment_state(name)
+        except (ClientError, RuntimeError):
+            pass
+    return state
+
+
+def _fetch_deployment_state(name: str) -> tuple[dict | None, str | None]:
+    """Return the deployment state and its ETag, or (None, None) if there is none.
+
+    A deployment only saved in the schema version 1 object is returned
+    upgraded, with no ETag, so the next write creates the current object.
     """
+    client = _get_s3_client()
+    cached = _read_cached_state(name)
+    conditions = {"IfNoneMatch": cached["etag"]} if cached else {}
+    try:
+        resp = client.get_object(Bucket=S3_BUCKET, Key=_state_key(name), **conditions)
+    except client.exceptions.NoSuchKey:
+        _drop_cached_state(name)
+        return _fetch_legacy_state(name), None
+    except ClientError as e:
+        if cached and e.response["Error"]["Code"] in ("304", "NotModified"):
+            return cached["state"], cached["etag"]
+        raise
+    state = upgrade_state(json.loads(gzip.decompress(resp["Body"].read())))
+    _write_cached_state(name, resp["ETag"], state)
+    return state, resp["ETag"]
+
+
+def _fetch_legacy_state(name: str) -> dict | None:
     client = _get_s3_client()
     try:
-        resp = client.get_object(
+        resp = client.get_object(Bucket=S3_BUCKET, Key=_legacy_state_key(name))
+    except client.exceptions.NoSuchKey:
+        return None
+    return upgrade_state(json.loads(resp["Body"].read()))
+
+
+def delete_deployment_state(name: str) -> None:
+    """Delete deployment metadata, including its journal, from S3 after a successful destroy."""
+    client = _get_s3_client()
+    keys = [_state_key(name), _legacy_state_key(name), *_list_journal(name)]
+    # DeleteObjects accepts at most 1000 keys per request
+    for start in range(0, len(keys), 1000):
+        client.delete_objects(
             Bucket=S3_BUCKET,
-            Key=f"{S3_KEY_PREFIX}/{name}.json",
+            Delete={"Objects": [{"Key": key} for key in keys[start : start + 1000]], "Quiet": True},
         )
-        return json.loads(resp["Body"].read())
+    _drop_cached_state(name)
+    _update_index(lambda deployments: {k: v for k, v in deployments.items() if k != name})
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def index_entry(state: dict) -> dict:
+    """Summarise a deployment state document for the deployment index."""
+    return {
+        "regions": len(state.get("regions", [])),
+        "vms": sum(len(rows) for rows in state.get("hosts", {}).values()),
+        "created_at": state.get("created_at"),
+        "binary_source": state.get("binary_source"),
+    }
+
+
+def _fetch_index() -> tuple[dict | None, str | None]:
+    client = _get_s3_client()
+    try:
+        resp = client.get_object(Bucket=S3_BUCKET, Key=S3_INDEX_KEY)
     except client.exceptions.NoSuchKey:
-        raise RuntimeError(
-            f"No deployment state found for '{name}'. "
-            "Was this deployment created with the infra command?"
-        )
+        return None, None
+    return json.loads(resp["Body"].read()), resp["ETag"]
 
 
-def delete_deployment_state(name: str) -> None:
-    """Delete deployment metadata from S3 after a successful destroy."""
+def _put_index(index: dict, **conditions) -> None:
+    client = _get_s3_client()
+    client.put_object(
+        Bucket=S3_BUCKET,
+        Key=S3_INDEX_KEY,
+        Body=json.dumps(index, separators=(",", ":")),
+        ContentType="application/json",
+        **conditions,
+    )
+
+
+def _update_index(change: Callable[[dict], dict]) -> None:
+    """Apply change to the index's deployments with optimistic concurrency."""
+
+    def build(current):
+        deployments = (current or {}).get("deployments", {})
+        return {"version": INDEX_VERSION, "deployments": change(deployments)}
+
+    _write_with_retry("The deployment index", _fetch_index, _put_index, build)
+
+
+def list_deployments() -> dict[str, dict]:
+    """Return the index entry of every deployment, keyed by name.
+
+    Normally a single read of the index object. If there is no index yet
+    (deployments saved by older versions), the deployment documents are
+    listed and fetched concurrently instead and the index is created from
+    them, unless another writer creates it first.
+    """
+    index, _ = _fetch_index()
+    if index is not None:
+        return index.get("deployments", {})
+    deployments = _scan_deployments()
+    try:
+        _put_index({"version": INDEX_VERSION, "deployments": deployments}, IfNoneMatch="*")
+    except ClientError as e:
+        if e.response["Error"]["Code"] not in WRITE_CONFLICT_CODES:
+            raise
+    return deployments
+
+
+def _load_if_exists(name: str) -> dict | None:
+    try:
+        return load_deployment_state(name)
+    except RuntimeError:
+        return None
+
+
+def _scan_deployments() -> dict[str, dict]:
+    """Build index entries by listing and fetching every deployment document."""
+    client = _get_s3_client()
+    paginator = client.get_paginator("list_objects_v2")
+    names = {}
+    for page in paginator.paginate(Bucket=S3_BUCKET, Prefix=f"{S3_KEY_PREFIX}/"):
+        for obj in page.get("Contents", []):
+            filename = obj["Key"].removeprefix(f"{S3_KEY_PREFIX}/")
+            name = filename.removesuffix(".gz").removesuffix(".json")
+            if name != filename and "/" not in name:
+                names.setdefault(name, obj["LastModified"])
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_FETCHES) as pool:
+        states = pool.map(_load_if_exists, names)
+        deployments = {}
+        for name, state in zip(names, states):
+            if state is None:
+                continue
+            entry = index_entry(state)
+            # Older documents do not record when they were created
+            entry["created_at"] = entry["created_at"] or names[name].isoformat(timespec="seconds")
+            deployments[name] = entry
+    return dict(sorted(deployments.items()))
+
+
+def delete_terraform_states(state_keys: list[str]) -> None:
+    """Delete Terraform state objects from the S3 backend in a single request."""
+    if not state_keys:
+        return
     client = _get_s3_client()
-    client.delete_object(
+    client.delete_objects(
         Bucket=S3_BUCKET,
-        Key=f"{S3_KEY_PREFIX}/{name}.json",
+        Delete={"Objects": [{"Key": key} for key in state_keys], "Quiet": True},
     )
+
+
+def move_terraform_state(old_key: str, new_key: str) -> bool:
+    """Move a Terraform state object to a new key, unless the new key already exists.
+
+    Returns True if the state was moved, False if there was nothing to move.
+    """
+    client = _get_s3_client()
+    try:
+        client.head_object(Bucket=S3_BUCKET, Key=new_key)
+        return False
+    except ClientError as e:
+        if e.response["Error"]["Code"] not in ("404", "NoSuchKey"):
+            raise
+    try:
+        client.copy_object(
+            Bucket=S3_BUCKET, Key=new_key, CopySource={"Bucket": S3_BUCKET, "Key": old_key}
+        )
+    except ClientError as e:
+        if e.response["Error"]["Code"] in ("404", "NoSuchKey"):
+            return False
+        raise
+    client.delete_object(Bucket=S3_BUCKET, Key=old_key)
+    return True
+
+
+def load_terraform_outputs(state_key: str) -> dict:
+    """Read the outputs of a Terraform state object directly from the S3 backend.
+
+    Returns a mapping of output name to value, decoded in-process so reading
+    outputs needs neither the terraform binary nor an initialised workspace.
+    Returns an empty dict if the state object does not exist.
+    """
+    client = _get_s3_client()
+    try:
+        resp = client.get_object(Bucket=S3_BUCKET, Key=state_key)
+    except client.exceptions.NoSuchKey:
+        return {}
+    tf_state = json.loads(resp["Body"].read())
+    return {name: output.get("value") for name, output in tf_state.get("outputs", {}).items()}
@@ -1,10 +1,28 @@
+import contextlib
+import fcntl
+import functools
+import hashlib
 import json
 import os
 import shutil
 import subprocess
-from dataclasses import dataclass, field
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass, field, replace
 from pathlib import Path
 
+from botocore.exceptions import BotoCoreError, ClientError
+
+from saorsa_deploy.state import load_terraform_outputs
+
+LOCK_FILE_NAME = ".terraform.lock.hcl"
+FINGERPRINT_FILE_NAME = ".saorsa-fingerprint.json"
+PLAN_FILE_NAME = "saorsa.tfplan"
+
+# terraform plan -detailed-exitcode: 0 means no changes, 2 means changes are present
+PLAN_EXIT_NO_CHANGES = 0
+PLAN_EXIT_CHANGES = 2
+
 
 @dataclass
 class TerraformResult:
@@ -14,6 +32,16 @@ class TerraformResult:
     stdout: str = ""
     stderr: str = ""
     outputs: dict = field(default_factory=dict)
+    resource_timings: dict[str, float] = field(default_factory=dict)
+    unchanged: bool = False
+
+
+@dataclass
+class TerraformProgress:
+    planned: int = 0
+    completed: int = 0
+    slowest_resource: str | None = None
+    slowest_seconds: float = 0.0
 
 
 @dataclass
@@ -24,13 +52,295 @@ class TerraformRunConfig:
     workspace_dir: Path
     state_key: str
     variables: dict[str, str] = field(default_factory=dict)
+    parallelism: int | None = None
+
+
+class TerraformEventParser:
+    """Incrementally parse the machine-readable (-json) output of terraform.
+
+    Each line of output is a JSON event. The parser keeps a running count of
+    planned and completed resource changes, the slowest resource seen so far
+    (including ones still in flight) and the final elapsed time of each resource.
+    The human-readable message of every event is kept so the output can still
+    be shown to the user.
+    """
+
+    def __init__(self):
+        self.progress = TerraformProgress()
+        self.resource_timings: dict[str, float] = {}
+        self.messages: list[str] = []
+        self.errors: list[str] = []
+        self._planned_changes = 0
+
+    def feed(self, line: str) -> bool:
+        """Consume one line of output. Returns True if the progress changed."""
+        line = line.strip()
+        if not line:
+            return False
+        try:
+            event = json.loads(line)
+        except json.JSONDecodeError:
+            self.messages.append(line)
+            return False
+
+        message = event.get("@message")
+        if message:
+            self.messages.append(message)
+
+        event_type = event.get("type")
+        if event_type == "planned_change":
+            if event.get("change", {}).get("action") not in (None, "noop", "read"):
+                self._planned_changes += 1
+                self.progress.planned = max(self.progress.planned, self._planned_changes)
+                return True
+        elif event_type == "change_summary":
+            changes = event.get("changes", {})
+            if changes.get("operation") == "plan":
+                self.progress.planned = (
+                    changes.get("add", 0) + changes.get("change", 0) + changes.get("remove", 0)
+                )
+                return True
+        elif event_type in ("apply_progress", "apply_complete", "apply_errored"):
+            hook = event.get("hook", {})
+            addr = hook.get("resource", {}).get("addr", "unknown")
+            elapsed = float(hook.get("elapsed_seconds", 0))
+            if event_type == "apply_complete":
+                self.progress.completed += 1
+                self.resource_timings[addr] = self.resource_timings.get(addr, 0.0) + elapsed
+            if elapsed >= self.progress.slowest_seconds:
+                self.progress.slowest_resource = addr
+                self.progress.slowest_seconds = elapsed
+            return True
+        elif event_type == "diagnostic":
+            diagnostic = event.get("diagnostic", {})
+            if diagnostic.get("severity") == "error":
+                error = f"Error: {diagnostic.get('summary', '')}"
+                if diagnostic.get("detail"):
+                    error += f"\n\n{diagnostic['detail']}"
+                self.errors.append(error)
+        return False
+
+    @property
+    def stdout(self) -> str:
+        return "\n".join(self.messages)
+
+
+def _run_streaming(
+    args: list[str],
+    cwd: Path,
+    env: dict[str, str],
+    parser: TerraformEventParser,
+    on_progress: Callable[[TerraformProgress], None] | None = None,
+) -> tuple[int, str]:
+    """Run a terraform command that emits -json output, parsing events as they arrive.
+
+    Returns the exit code and anything written to stderr.
+    """
+    proc = subprocess.Popen(
+        args,
+        cwd=str(cwd),
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    stderr_lines: list[str] = []
+    stderr_reader = threading.Thread(target=lambda: stderr_lines.extend(proc.stderr), daemon=True)
+    stderr_reader.start()
+    for line in proc.stdout:
+        if parser.feed(line) and on_progress:
+            on_progress(replace(parser.progress))
+    returncode = proc.wait()
+    stderr_reader.join()
+    stderr = "".join(stderr_lines)
+    if parser.errors:
+        stderr = "\n\n".join(parser.errors) + ("\n" + stderr if stderr else "")
+    return returncode, stderr
+
+
+def get_plugin_cache_dir() -> Path:
+    """Return the shared Terraform provider plugin cache directory.
+
+    Honours TF_PLUGIN_CACHE_DIR if it is already set, otherwise uses a
+    directory under the user's cache home so every workspace (and every
+    checkout) links providers from the same place.
+    """
+    if os.environ.get("TF_PLUGIN_CACHE_DIR"):
+        return Path(os.environ["TF_PLUGIN_CACHE_DIR"])
+    cache_home = os.environ.get("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    return Path(cache_home) / "saorsa-deploy" / "terraform-plugins"
+
+
+def _build_env() -> dict[str, str]:
+    """Build the environment for terraform subprocesses."""
+    env = os.environ.copy()
+    if "DO_TOKEN" in env:
+        env["TF_VAR_do_token"] = env["DO_TOKEN"]
+    plugin_cache_dir = get_plugin_cache_dir()
+    plugin_cache_dir.mkdir(parents=True, exist_ok=True)
+    env["TF_PLUGIN_CACHE_DIR"] = str(plugin_cache_dir)
+    return env
+
+
+# Terraform does not guarantee the plugin cache is safe for concurrent writers,
+# so the first init for each manifest directory runs alone and populates the
+# cache; every later init only links providers from it and can run in parallel.
+# The file lock extends this to other saorsa-deploy processes sharing the cache,
+# such as several deployments being applied at once from the same machine.
+#
+# Terraform only links a cached provider when the workspace's lock file already
+# records its checksum, otherwise it downloads it again. Manifests without a
+# committed lock file would therefore download the provider in every workspace,
+# so the lock file written by the first init is handed to the later ones.
+_plugin_cache_lock = threading.Lock()
+_plugin_cache_warmed: set[Path] = set()
+_warmed_lock_files: dict[Path, bytes] = {}
+PLUGIN_CACHE_LOCK_FILE_NAME = ".saorsa-init.lock"
+
+
+@contextlib.contextmanager
+def _plugin_cache_file_lock(plugin_cache_dir: Path):
+    with open(plugin_cache_dir / PLUGIN_CACHE_LOCK_FILE_NAME, "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _run_init(config: TerraformRunConfig, env: dict[str, str]) -> subprocess.CompletedProcess:
+    """Run terraform init, serialising the first init per manifest directory."""
+
+    def init():
+        return subprocess.run(
+            build_init_args(config),
+            cwd=str(config.workspace_dir),
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+
+    lock_file = config.workspace_dir / LOCK_FILE_NAME
+
+    def init_from_warm_cache():
+        warmed_lock = _warmed_lock_files.get(config.tf_source_dir)
+        if warmed_lock is not None and not lock_file.exists():
+            lock_file.write_bytes(warmed_lock)
+        return init()
+
+    if config.tf_source_dir in _plugin_cache_warmed:
+        return init_from_warm_cache()
+    with _plugin_cache_lock, _plugin_cache_file_lock(Path(env["TF_PLUGIN_CACHE_DIR"])):
+        if config.tf_source_dir in _plugin_cache_warmed:
+            return init_from_warm_cache()
+        result = init()
+        if result.returncode == 0:
+            if lock_file.exists():
+                _warmed_lock_files[config.tf_source_dir] = lock_file.read_bytes()
+            _plugin_cache_warmed.add(config.tf_source_dir)
+        return result
+
+
+@functools.lru_cache(maxsize=1)
+def get_terraform_version() -> str:
+    """Return the version of the terraform binary on PATH, looked up once per process."""
+    try:
+        result = subprocess.run(
+            ["terraform", "version", "-json"],
+            capture_output=True,
+            text=True,
+        )
+        return json.loads(result.stdout)["terraform_version"]
+    except (OSError, ValueError, KeyError):
+        return "unknown"
+
+
+def _source_files(config: TerraformRunConfig) -> list[Path]:
+    files = sorted(config.tf_source_dir.glob("*.tf"))
+    lock_file = config.tf_source_dir / LOCK_FILE_NAME
+    if lock_file.exists():
+        files.append(lock_file)
+    return files
+
+
+def compute_fingerprint(config: TerraformRunConfig) -> dict:
+    """Fingerprint what terraform init depends on: manifests, state key and terraform version."""
+    return {
+        "files": {
+            path.name: hashlib.sha256(path.read_bytes()).hexdigest()
+            for path in _source_files(config)
+        },
+        "state_key": config.state_key,
+        "terraform_version": get_terraform_version(),
+    }
+
+
+def _load_fingerprint(config: TerraformRunConfig) -> dict:
+    try:
+        return json.loads((config.workspace_dir / FINGERPRINT_FILE_NAME).read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_fingerprint(config: TerraformRunConfig) -> None:
+    (config.workspace_dir / FINGERPRINT_FILE_NAME).write_text(
+        json.dumps(compute_fingerprint(config), indent=2)
+    )
+
 
+def prepare_workspace(config: TerraformRunConfig) -> bool:
+    """Sync Terraform files and the provider lock file into the workspace directory.
 
-def prepare_workspace(config: TerraformRunConfig) -> None:
-    """Copy Terraform files from source directory to workspace directory."""
+    Only files whose content changed since the last successful init are copied,
+    and files removed from the source are removed from the workspace.
+
+    Returns True if terraform init needs to run, i.e. the workspace has never
+    been initialised or its fingerprint no longer matches.
+    """
     config.workspace_dir.mkdir(parents=True, exist_ok=True)
-    for tf_file in config.tf_source_dir.glob("*.tf"):
-        shutil.copy2(tf_file, config.workspace_dir / tf_file.name)
+    previous = _load_fingerprint(config)
+    current = compute_fingerprint(config)
+
+    previous_files = previous.get("files", {})
+    for path in _source_files(config):
+        target = config.workspace_dir / path.name
+        if previous_files.get(path.name) != current["files"][path.name] or not target.exists():
+            shutil.copy2(path, target)
+    for name in set(previous_files) - set(current["files"]):
+        (config.workspace_dir / name).unlink(missing_ok=True)
+
+    initialised = (config.workspace_dir / ".terraform").is_dir()
+    return previous != current or not initialised
+
+
+# A workspace may be initialised ahead of its run (see prewarm_workspace); the
+# per-workspace lock makes the run wait for that init and then find it current.
+_workspace_locks: dict[Path, threading.Lock] = {}
+_workspace_locks_lock = threading.Lock()
+
+
+def _workspace_lock(config: TerraformRunConfig) -> threading.Lock:
+    with _workspace_locks_lock:
+        return _workspace_locks.setdefault(config.workspace_dir, threading.Lock())
+
+
+def _init_workspace(config: TerraformRunConfig, env: dict[str, str]) -> subprocess.CompletedProcess:
+    """Prepare the workspace and run terraform init, unless nothing init depends on changed."""
+    with _workspace_lock(config):
+        if not prepare_workspace(config):
+            return subprocess.CompletedProcess(args=[], returncode=0, stdout="", stderr="")
+        result = _run_init(config, env)
+        if result.returncode == 0:
+            _write_fingerprint(config)
+        return result
+
+
+def prewarm_workspace(config: TerraformRunConfig) -> bool:
+    """Initialise a workspace ahead of its run. Returns True if init succeeded.
+
+    A failed init is left for the run itself to repeat and report.
+    """
+    return _init_workspace(config, _build_env()).returncode == 0
 
 
 def build_init_args(config: TerraformRunConfig) -> list[str]:
@@ -39,44 +349,74 @@ def build_init_args(config: TerraformRunConfig) -> list[str]:
         "terraform",
         "init",
         "-input=false",
+        "-reconfigure",
         f"-backend-config=key={config.state_key}",
     ]
 
 
-def build_apply_args(config: TerraformRunConfig) -> list[str]:
-    """Build the argument list for terraform apply."""
+def resolve_parallelism(resource_count: int, concurrent_runs: int, api_budget: int) -> int:
+    """Choose terraform -parallelism for one run.
+
+    Each run may use an equal share of the provider's API budget across the runs
+    that execute at the same time, but never more than the number of resources it
+    manages (and never less than 1).
+    """
+    share = api_budget // max(1, concurrent_runs)
+    return max(1, min(resource_count, share))
+
+
+def _parallelism_args(config: TerraformRunConfig) -> list[str]:
+    if config.parallelism is None:
+        return []
+    return [f"-parallelism={config.parallelism}"]
+
+
+def build_plan_args(config: TerraformRunConfig) -> list[str]:
+    """Build the argument list for terraform plan, saving the plan for a later apply."""
     args = [
         "terraform",
-        "apply",
-        "-auto-approve",
+        "plan",
         "-input=false",
+        "-json",
+        "-detailed-exitcode",
+        f"-out={PLAN_FILE_NAME}",
     ]
+    args.extend(_parallelism_args(config))
     for key, value in sorted(config.variables.items()):
         args.append(f"-var={key}={value}")
     return args
 
 
-def build_output_args() -> list[str]:
-    """Build the argument list for terraform output."""
-    return ["terraform", "output", "-json"]
+def build_apply_args(config: TerraformRunConfig) -> list[str]:
+    """Build the argument list for applying the saved plan.
 
+    Variables are not passed: they are recorded in the saved plan.
+    """
+    return [
+        "terraform",
+        "apply",
+        "-input=false",
+        "-json",
+        *_parallelism_args(config),
+        PLAN_FILE_NAME,
+    ]
 
-def run_terraform(config: TerraformRunConfig) -> TerraformResult:
-    """Run terraform init + apply + output for a single provider/region."""
-    prepare_workspace(config)
 
-    env = os.environ.copy()
-    if "DO_TOKEN" in env:
-        env["TF_VAR_do_token"] = env["DO_TOKEN"]
+def run_terraform(
+    config: TerraformRunConfig,
+    on_progress: Callable[[TerraformProgress], None] | None = None,
+) -> TerraformResult:
+    """Run terraform init + plan + apply for a single provider/region.
 
-    init_args = build_init_args(config)
-    init_result = subprocess.run(
-        init_args,
-        cwd=str(config.workspace_dir),
-        env=env,
-        capture_output=True,
-        text=True,
-    )
+    The plan is saved and only applied if it contains changes; when it does
+    not, the result is marked unchanged and apply is skipped entirely. Plan
+    and apply are streamed; on_progress, if given, is called with a snapshot
+    of resource progress each time it changes. Outputs are read straight from
+    the state object in S3 rather than with terraform output. The saved plan
+    is removed however the run ends.
+    """
+    env = _build_env()
+    init_result = _init_workspace(config, env)
     if init_result.returncode != 0:
         return TerraformResult(
             success=False,
@@ -86,43 +426,53 @@ def run_terraform(config: TerraformRunConfig) -> TerraformResult:
             stderr=init_result.stderr,
         )
 
-    apply_args = build_apply_args(config)
-    apply_result = subprocess.run(
-        apply_args,
-        cwd=str(config.workspace_dir),
-        env=env,
-        capture_output=True,
-        text=True,
-    )
-    if apply_result.returncode != 0:
-        return TerraformResult(
-            success=False,
-            provider=config.provider,
-            region=config.region,
-            stdout=apply_result.stdout,
-            stderr=apply_result.stderr,
+    parser = TerraformEventParser()
+    try:
+        plan_returncode, plan_stderr = _run_streaming(
+            build_plan_args(config), config.workspace_dir, env, parser, on_progress
         )
+        if plan_returncode not in (PLAN_EXIT_NO_CHANGES, PLAN_EXIT_CHANGES):
+            return TerraformResult(
+                success=False,
+                provider=config.provider,
+                region=config.region,
+                stdout=parser.stdout,
+                stderr=plan_stderr,
+            )
 
-    outputs = {}
-    output_args = build_output_args()
-    output_result = subprocess.run(
-        output_args,
-        cwd=str(config.workspace_dir),
-        env=env,
-        capture_output=True,
-        text=True,
-    )
-    if output_result.returncode == 0 and output_result.stdout.strip():
-        raw = json.loads(output_result.stdout)
-        outputs = {k: v.get("value") for k, v in raw.items()}
+        unchanged = plan_returncode == PLAN_EXIT_NO_CHANGES
+        stderr = plan_stderr
+        if not unchanged:
+            returncode, stderr = _run_streaming(
+                build_apply_args(config), config.workspace_dir, env, parser, on_progress
+            )
+            if returncode != 0:
+                return TerraformResult(
+                    success=False,
+                    provider=config.provider,
+                    region=config.region,
+                    stdout=parser.stdout,
+                    stderr=stderr,
+                    resource_timings=parser.resource_timings,
+                )
+    finally:
+        # The saved plan holds the variables, TF_VAR_do_token included, in plaintext
+        (config.workspace_dir / PLAN_FILE_NAME).unlink(missing_ok=True)
+
+    try:
+        outputs = load_terraform_outputs(config.state_key)
+    except (BotoCoreError, ClientError):
+        outputs = {}
 
     return TerraformResult(
         success=True,
         provider=config.provider,
         region=config.region,
-        stdout=apply_result.stdout,
-        stderr=apply_result.stderr,
+        stdout=parser.stdout,
+        stderr=stderr,
         outputs=outputs,
+        resource_timings=parser.resource_timings,
+        unchanged=unchanged,
     )
 
 
@@ -133,28 +483,24 @@ def build_destroy_args(config: TerraformRunConfig) -> list[str]:
         "destroy",
         "-auto-approve",
         "-input=false",
+        "-json",
     ]
+    args.extend(_parallelism_args(config))
     for key, value in sorted(config.variables.items()):
         args.append(f"-var={key}={value}")
     return args
 
 
-def run_terraform_destroy(config: TerraformRunConfig) -> TerraformResult:
-    """Run terraform init + destroy for a single provider/region."""
-    prepare_workspace(config)
+def run_terraform_destroy(
+    config: TerraformRunConfig,
+    on_progress: Callable[[TerraformProgress], None] | None = None,
+) -> TerraformResult:
+    """Run terraform init + destroy for a single provider/region.
 
-    env = os.environ.copy()
-    if "DO_TOKEN" in env:
-        env["TF_VAR_do_token"] = env["DO_TOKEN"]
-
-    init_args = build_init_args(config)
-    init_result = subprocess.run(
-        init_args,
-        cwd=str(config.workspace_dir),
-        env=env,
-        capture_output=True,
-        text=True,
-    )
+    The destroy is streamed in the same way as the apply in run_terraform.
+    """
+    env = _build_env()
+    init_result = _init_workspace(config, env)
     if init_result.returncode != 0:
         return TerraformResult(
             success=False,
@@ -164,18 +510,15 @@ def run_terraform_destroy(config: TerraformRunConfig) -> TerraformResult:
             stderr=init_result.stderr,
         )
 
-    destroy_args = build_destroy_args(config)
-    destroy_result = subprocess.run(
-        destroy_args,
-        cwd=str(config.workspace_dir),
-        env=env,
-        capture_output=True,
-        text=True,
+    parser = TerraformEventParser()
+    returncode, destroy_stderr = _run_streaming(
+        build_destroy_args(config), config.workspace_dir, env, parser, on_progress
     )
     return TerraformResult(
-        success=destroy_result.returncode == 0,
+        success=returncode == 0,
         provider=config.provider,
         region=config.region,
-        stdout=destroy_result.stdout,
-        stderr=destroy_result.stderr,
+        stdout=parser.stdout,
+        stderr=destroy_stderr,
+        resource_timings=parser.resource_timings,
     )
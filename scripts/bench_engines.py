@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Benchmark the per-region and multi-region Terraform engines.
+
+Both engines are run against the same fake terraform binary (scripts/fake_terraform.py),
+so the comparison measures how each engine schedules work (process fan-out, init
+overhead, MAX_CONCURRENT queueing and per-run parallelism) rather than cloud latency.
+
+Usage:
+    uv run scripts/bench_engines.py --regions 8 --vm-count 20 --time-scale 0.05
+"""
+
+import argparse
+import io
+import os
+import stat
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from saorsa_deploy import state
+from saorsa_deploy.engines import TERRAFORM_ENGINES, build_run_configs, collect_vm_ips
+from saorsa_deploy.executor import execute_terraform_runs
+from saorsa_deploy.providers import PROVIDERS
+
+FAKE_TERRAFORM = Path(__file__).resolve().parent / "fake_terraform.py"
+
+
+class LocalBackendClient:
+    """Minimal S3 client serving the state objects the fake terraform writes to disk."""
+
+    def __init__(self, backend_dir: Path):
+        self.backend_dir = backend_dir
+
+    def get_object(self, Bucket: str, Key: str) -> dict:
+        return {"Body": io.BytesIO((self.backend_dir / Key).read_bytes())}
+
+
+def install_fake_terraform(bin_dir: Path) -> None:
+    """Put a `terraform` wrapper for the fake binary first on PATH."""
+    wrapper = bin_dir / "terraform"
+    wrapper.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{FAKE_TERRAFORM}" "$@"\n')
+    wrapper.chmod(wrapper.stat().st_mode | stat.S_IEXEC)
+    os.environ["PATH"] = f"{bin_dir}{os.pathsep}{os.environ['PATH']}"
+
+
+def run_engine(
+    engine: str, region_count: int, vm_count: int, work_dir: Path, parallelism: int | None
+) -> tuple[float, int]:
+    provider = PROVIDERS["digitalocean"]
+    region_pairs = [(provider.name, region) for region in provider.regions[:region_count]]
+    variables = {"name": "BENCH", "vm_count": str(vm_count), "attached_volume_size": "20"}
+    configs = build_run_configs(
+        "BENCH",
+        region_pairs,
+        variables,
+        engine,
+        workspace_base=work_dir / engine,
+        parallelism=parallelism,
+    )
+    start = time.monotonic()
+    results = execute_terraform_runs(configs)
+    elapsed = time.monotonic() - start
+    if not all(r.success for r in results):
+        raise RuntimeError(f"{engine} engine failed")
+    vm_ips = collect_vm_ips(results)
+    return elapsed, sum(len(ips) for ips in vm_ips.values())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--regions", type=int, default=8)
+    parser.add_argument("--vm-count", type=int, default=20)
+    parser.add_argument(
+        "--time-scale",
+        type=float,
+        default=0.05,
+        help="Multiplier applied to the fake terraform cost model (default: 0.05)",
+    )
+    parser.add_argument(
+        "--parallelism",
+        type=int,
+        default=None,
+        help="Terraform -parallelism per run (default: sized automatically)",
+    )
+    args = parser.parse_args()
+
+    os.environ["FAKE_TF_TIME_SCALE"] = str(args.time_scale)
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp)
+        (work_dir / "bin").mkdir()
+        install_fake_terraform(work_dir / "bin")
+        os.environ["TF_PLUGIN_CACHE_DIR"] = str(work_dir / "plugin-cache")
+        # Outputs are read from the state object, so serve the fake backend as S3
+        os.environ["FAKE_TF_BACKEND_DIR"] = str(work_dir / "backend")
+        state._get_s3_client = lambda: LocalBackendClient(work_dir / "backend")
+
+        timings = {}
+        for engine in TERRAFORM_ENGINES:
+            print(f"=== {engine} ===")
+            timings[engine] = run_engine(
+                engine, args.regions, args.vm_count, work_dir, args.parallelism
+            )
+
+    print()
+    print(f"{args.regions} region(s) x {args.vm_count} VM(s), time scale {args.time_scale}")
+    for engine, (elapsed, vms) in sorted(timings.items(), key=lambda item: item[1][0]):
+        print(f"  {engine:<14} {elapsed:8.2f}s  ({vms} VMs)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""Fake terraform binary for benchmarking and testing the Terraform engines.
+
+Understands just enough of the terraform CLI used by saorsa-deploy (version, init,
+plan, apply of a saved plan, destroy and output, with -json) to simulate a DigitalOcean
+deployment of either the per-region or the multi-region manifests without touching any
+cloud API.
+
+Work is simulated with a simple cost model:
+
+- every init pays FAKE_TF_INIT_SECONDS (backend setup and provider linking)
+- every plan or destroy pays FAKE_TF_PLAN_SECONDS (refresh and plan)
+- droplets, volumes and attachments take FAKE_TF_DROPLET_SECONDS,
+  FAKE_TF_VOLUME_SECONDS and FAKE_TF_ATTACH_SECONDS, scheduled respecting their
+  dependencies with at most -parallelism (default 10) operations in flight
+
+All durations are multiplied by FAKE_TF_TIME_SCALE (default 1.0; use 0 in tests).
+
+State is kept in the workspace, or, if FAKE_TF_BACKEND_DIR is set, at
+FAKE_TF_BACKEND_DIR/<key> for the -backend-config=key=... given to init, in the
+same shape as a real state object so it can be read the way the S3 backend is.
+
+Usage (normally via a `terraform` wrapper placed first on PATH):
+    python scripts/fake_terraform.py plan -input=false -json -detailed-exitcode -out=p -var=...
+"""
+
+import heapq
+import json
+import os
+import sys
+import time
+import zlib
+from pathlib import Path
+
+STATE_FILE = ".fake-terraform.json"
+BACKEND_KEY_FILE = Path(".terraform") / "fake-backend-key"
+DEFAULT_PARALLELISM = 10
+
+
+def _cost(name: str, default: float) -> float:
+    scale = float(os.environ.get("FAKE_TF_TIME_SCALE", "1.0"))
+    return float(os.environ.get(name, default)) * scale
+
+
+def _emit(event_type: str, message: str = "", **fields) -> None:
+    print(json.dumps({"@level": "info", "@message": message, "type": event_type, **fields}))
+    sys.stdout.flush()
+
+
+def _parse_args(argv: list[str]) -> tuple[dict[str, str], int]:
+    variables = {}
+    parallelism = DEFAULT_PARALLELISM
+    for arg in argv:
+        if arg.startswith("-var="):
+            key, value = arg[len("-var=") :].split("=", 1)
+            variables[key] = value
+        elif arg.startswith("-parallelism="):
+            parallelism = int(arg.split("=", 1)[1])
+    return variables, parallelism
+
+
+def _instances(variables: dict[str, str]) -> list[tuple[str, str, int]]:
+    """Return (resource key, region, 1-based index) for every VM the manifests would create."""
+    vm_count = int(variables.get("vm_count", "1"))
+    if "regions" in variables:
+        regions = json.loads(variables["regions"])
+        return [(f'"{r}-{i + 1}"', r, i + 1) for r in regions for i in range(vm_count)]
+    region = variables.get("region", "lon1")
+    return [(str(i), region, i + 1) for i in range(vm_count)]
+
+
+def _ip(region: str, index: int) -> str:
+    return f"10.{zlib.crc32(region.encode()) % 256}.{index // 256}.{index % 256}"
+
+
+def _build_graph(
+    instances: list[tuple[str, str, int]], destroy: bool
+) -> dict[str, tuple[float, list[str]]]:
+    """Build resource address -> (duration, dependencies) for the given VMs."""
+    graph = {}
+    for key, _, _ in instances:
+        droplet = f"digitalocean_droplet.node_vm[{key}]"
+        volume = f"digitalocean_volume.node_storage[{key}]"
+        attach = f"digitalocean_volume_attachment.node_storage_attach[{key}]"
+        if destroy:
+            graph[attach] = (_cost("FAKE_TF_ATTACH_SECONDS", 5), [])
+            graph[droplet] = (_cost("FAKE_TF_DROPLET_SECONDS", 10), [attach])
+            graph[volume] = (_cost("FAKE_TF_VOLUME_SECONDS", 5), [attach])
+        else:
+            graph[droplet] = (_cost("FAKE_TF_DROPLET_SECONDS", 30), [])
+            graph[volume] = (_cost("FAKE_TF_VOLUME_SECONDS", 5), [])
+            graph[attach] = (_cost("FAKE_TF_ATTACH_SECONDS", 5), [droplet, volume])
+    return graph
+
+
+def _simulate(graph: dict[str, tuple[float, list[str]]], parallelism: int, action: str) -> None:
+    """Walk the graph with bounded parallelism, sleeping in real time and emitting events."""
+    done: set[str] = set()
+    started: set[str] = set()
+    running: list[tuple[float, str]] = []
+    clock = 0.0
+    while len(done) < len(graph):
+        for addr, (duration, deps) in graph.items():
+            if len(running) >= parallelism:
+                break
+            if addr not in started and all(dep in done for dep in deps):
+                started.add(addr)
+                heapq.heappush(running, (clock + duration, addr))
+                _emit(
+                    "apply_start",
+                    f"{addr}: {action}...",
+                    hook={"resource": {"addr": addr}, "action": action},
+                )
+        finish, addr = heapq.heappop(running)
+        time.sleep(max(0.0, finish - clock))
+        clock = finish
+        done.add(addr)
+        _emit(
+            "apply_complete",
+            f"{addr}: {action} complete",
+            hook={
+                "resource": {"addr": addr},
+                "action": action,
+                "elapsed_seconds": round(graph[addr][0], 3),
+            },
+        )
+
+
+def _outputs(variables: dict[str, str]) -> dict:
+    instances = _instances(variables)
+    if "regions" in variables:
+        ips: dict = {}
+        ids: dict = {}
+        volumes: dict = {}
+        for _, region, index in instances:
+            ips.setdefault(region, []).append(_ip(region, index))
+            ids.setdefault(region, []).append(zlib.crc32(f"{region}-{index}".encode()))
+            volumes.setdefault(region, []).append(f"vol-{region}-{index}")
+    else:
+        ips = [_ip(region, index) for _, region, index in instances]
+        ids = [zlib.crc32(f"{region}-{index}".encode()) for _, region, index in instances]
+        volumes = [f"vol-{region}-{index}" for _, region, index in instances]
+    return {
+        "droplet_ips": {"value": ips},
+        "droplet_ids": {"value": ids},
+        "volume_ids": {"value": volumes},
+    }
+
+
+def _state_path() -> Path:
+    backend_dir = os.environ.get("FAKE_TF_BACKEND_DIR")
+    if backend_dir and BACKEND_KEY_FILE.exists():
+        return Path(backend_dir) / BACKEND_KEY_FILE.read_text()
+    return Path(STATE_FILE)
+
+
+def _load_state() -> dict:
+    state_file = _state_path()
+    if state_file.exists():
+        return json.loads(state_file.read_text())
+    return {"variables": None, "outputs": {}}
+
+
+def _save_state(variables: dict[str, str]) -> None:
+    state_file = _state_path()
+    state_file.parent.mkdir(parents=True, exist_ok=True)
+    state_file.write_text(
+        json.dumps({"version": 4, "variables": variables, "outputs": _outputs(variables)})
+    )
+
+
+def _emit_plan(create: list, delete: list) -> int:
+    changes = [(instance, "create") for instance in create]
+    changes += [(instance, "delete") for instance in delete]
+    count = 0
+    for instance, action in changes:
+        for addr in _build_graph([instance], destroy=action == "delete"):
+            count += 1
+            _emit(
+                "planned_change",
+                f"{addr}: Plan to {action}",
+                change={"resource": {"addr": addr}, "action": action},
+            )
+    add = 3 * len(create)
+    remove = 3 * len(delete)
+    _emit(
+        "change_summary",
+        f"Plan: {add} to add, 0 to change, {remove} to destroy.",
+        changes={"add": add, "change": 0, "remove": remove, "operation": "plan"},
+    )
+    return count
+
+
+def _plan(argv: list[str]) -> int:
+    variables, _ = _parse_args(argv)
+    out = next((arg.split("=", 1)[1] for arg in argv if arg.startswith("-out=")), None)
+    _emit("version", "Terraform v1.9.0 (fake)", terraform="1.9.0")
+    time.sleep(_cost("FAKE_TF_PLAN_SECONDS", 2))
+
+    state = _load_state()
+    current = _instances(state["variables"]) if state["variables"] else []
+    desired = _instances(variables)
+    create = [instance for instance in desired if instance not in current]
+    delete = [instance for instance in current if instance not in desired]
+    count = _emit_plan(create, delete)
+    if out:
+        Path(out).write_text(
+            json.dumps({"variables": variables, "create": create, "delete": delete})
+        )
+    if count == 0:
+        return 0
+    return 2 if "-detailed-exitcode" in argv else 0
+
+
+def _apply(argv: list[str]) -> int:
+    _, parallelism = _parse_args(argv)
+    plan_file = Path([arg for arg in argv if not arg.startswith("-")][-1])
+    plan = json.loads(plan_file.read_text())
+    create = [tuple(instance) for instance in plan["create"]]
+    delete = [tuple(instance) for instance in plan["delete"]]
+    _emit("version", "Terraform v1.9.0 (fake)", terraform="1.9.0")
+
+    _simulate(_build_graph(delete, destroy=True), parallelism, "delete")
+    _simulate(_build_graph(create, destroy=False), parallelism, "create")
+    _save_state(plan["variables"])
+    _emit(
+        "change_summary",
+        f"Apply complete! Resources: {3 * len(create)} added, 0 changed, "
+        f"{3 * len(delete)} destroyed.",
+        changes={
+            "add": 3 * len(create),
+            "change": 0,
+            "remove": 3 * len(delete),
+            "operation": "apply",
+        },
+    )
+    return 0
+
+
+def _destroy(argv: list[str]) -> int:
+    _, parallelism = _parse_args(argv)
+    _emit("version", "Terraform v1.9.0 (fake)", terraform="1.9.0")
+    time.sleep(_cost("FAKE_TF_PLAN_SECONDS", 2))
+    state = _load_state()
+    current = _instances(state["variables"]) if state["variables"] else []
+    _emit_plan([], current)
+    _simulate(_build_graph(current, destroy=True), parallelism, "delete")
+    _state_path().unlink(missing_ok=True)
+    _emit(
+        "change_summary",
+        f"Destroy complete! Resources: {3 * len(current)} destroyed.",
+        changes={"add": 0, "change": 0, "remove": 3 * len(current), "operation": "destroy"},
+    )
+    return 0
+
+
+def main(argv: list[str]) -> int:
+    if not argv:
+        print("Usage: terraform <command> [args]", file=sys.stderr)
+        return 1
+    command, rest = argv[0], argv[1:]
+    if command == "version":
+        print(json.dumps({"terraform_version": "1.9.0"}))
+        return 0
+    if command == "init":
+        time.sleep(_cost("FAKE_TF_INIT_SECONDS", 3))
+        Path(".terraform").mkdir(exist_ok=True)
+        for arg in rest:
+            if arg.startswith("-backend-config=key="):
+                BACKEND_KEY_FILE.write_text(arg.split("=", 2)[2])
+        print("Terraform has been successfully initialized!")
+        return 0
+    if command == "plan":
+        return _plan(rest)
+    if command == "apply":
+        return _apply(rest)
+    if command == "destroy":
+        return _destroy(rest)
+    if command == "output":
+        print(json.dumps(_load_state()["outputs"]))
+        return 0
+    print(f"fake terraform: unsupported command '{command}'", file=sys.stderr)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
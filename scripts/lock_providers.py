@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""Regenerate the Terraform provider lock files for saorsa-deploy.
+
+Writes a .terraform.lock.hcl next to every set of manifests under
+saorsa_deploy/resources, with checksums for the platforms the tool runs on.
+Commit the resulting files so every workspace pins the same provider builds.
+
+Usage:
+    uv run scripts/lock_providers.py
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+RESOURCES_DIR = REPO_ROOT / "saorsa_deploy" / "resources"
+PLATFORMS = ["linux_amd64", "darwin_amd64", "darwin_arm64"]
+
+
+def fail(msg: str) -> None:
+    print(f"Error: {msg}", file=sys.stderr)
+    sys.exit(1)
+
+
+def lock(manifests_dir: Path) -> None:
+    cmd = ["terraform", "providers", "lock"] + [f"-platform={p}" for p in PLATFORMS]
+    result = subprocess.run(cmd, capture_output=True, text=True, cwd=manifests_dir)
+    if result.returncode != 0:
+        fail(f"Locking providers in {manifests_dir} failed\n{result.stderr.strip()}")
+
+
+def main() -> None:
+    manifests_dirs = sorted(p.parent for p in RESOURCES_DIR.glob("*/versions.tf"))
+    if not manifests_dirs:
+        fail(f"No Terraform manifests found under {RESOURCES_DIR}")
+    for manifests_dir in manifests_dirs:
+        lock(manifests_dir)
+        print(f"Locked providers: {manifests_dir.relative_to(REPO_ROOT)}")
+
+
+if __name__ == "__main__":
+    main()
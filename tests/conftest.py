@@ -0,0 +1,35 @@
+from unittest.mock import patch
+
+import pytest
+
+from saorsa_deploy import do_client
+from tests.fake_do_api import FakeDoApi
+
+
+@pytest.fixture
+def make_do_api(monkeypatch):
+    """Start FakeDoApi servers with the given options and point the API client at them."""
+    apis = []
+
+    def make(**kwargs):
+        api = FakeDoApi(**kwargs).start()
+        apis.append(api)
+        monkeypatch.setattr("saorsa_deploy.do_client.DO_API_URL", api.url)
+        monkeypatch.setenv("DO_TOKEN", "test-token")
+        return api
+
+    yield make
+    for api in apis:
+        api.stop()
+    do_client.reset_clients()
+
+
+@pytest.fixture
+def do_api(make_do_api):
+    return make_do_api()
+
+
+@pytest.fixture
+def mock_sleep():
+    with patch("saorsa_deploy.do_client.time.sleep") as mock:
+        yield mock
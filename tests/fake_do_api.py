@@ -0,0 +1,348 @@
+"""In-process fake of the subset of the Digital Ocean API used by saorsa-deploy.
+
+Serves droplets, volumes, droplet and volume actions, snapshots, images and
+actions over real HTTP on a local port, so API clients are exercised end to
+end (requests, pagination, status codes) without mocking the requests library.
+"""
+
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+
+
+class _Server(ThreadingHTTPServer):
+    # Clients open many connections at once; the default backlog of 5 drops SYNs
+    request_queue_size = 128
+    daemon_threads = True
+
+
+class FakeDoApi:
+    """Fake Digital Ocean API state plus the HTTP server that exposes it.
+
+    Droplets are created with status 'new' and become 'active' after
+    polls_until_active listings or reads. Deleting a droplet detaches its
+    volumes after detach_delay_polls further volume deletes have been refused,
+    imitating the asynchronous detach of the real API.
+
+    Actions stay 'in-progress' for action_polls reads, then take action_outcome;
+    a detach whose action errors leaves the volume attached.
+    A droplet snapshot action adds an image in the droplet's region; an image
+    transfer action adds the target region to the image.
+
+    Every response carries ratelimit-* headers counting down from
+    ratelimit_limit; fail_next() queues error responses to serve first.
+    """
+
+    def __init__(
+        self,
+        polls_until_active=1,
+        detach_delay_polls=0,
+        ratelimit_limit=5000,
+        action_polls=0,
+        action_outcome="completed",
+    ):
+        self.polls_until_active = polls_until_active
+        self.detach_delay_polls = detach_delay_polls
+        self.action_polls = action_polls
+        self.action_outcome = action_outcome
+        self.ratelimit_limit = ratelimit_limit
+        self.ratelimit_remaining = ratelimit_limit
+        self._failures: list[tuple[int, dict]] = []
+        self.droplets: dict[int, dict] = {}
+        self.volumes: dict[str, dict] = {}
+        self.actions: dict[int, dict] = {}
+        self.images: dict[int, dict] = {}
+        self.requests: list[tuple[str, str]] = []
+        self._ids = itertools.count(1000)
+        self._lock = threading.Lock()
+        self._server = _Server(("127.0.0.1", 0), self._handler_class())
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/v2"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def fail_next(self, status: int, count: int = 1, headers: dict | None = None):
+        """Answer the next count requests with status (and extra headers) unhandled."""
+        with self._lock:
+            self._failures.extend([(status, headers or {})] * count)
+
+    def count(self, method: str, path_prefix: str) -> int:
+        """Number of requests received with the given method and path prefix."""
+        return sum(1 for m, p in self.requests if m == method and p.startswith(path_prefix))
+
+    # -- state helpers -------------------------------------------------------
+
+    def _new_droplet(self, name, body):
+        droplet_id = next(self._ids)
+        droplet = {
+            "id": droplet_id,
+            "name": name,
+            "status": "new",
+            "region": {"slug": body["region"]},
+            "size_slug": body.get("size"),
+            "image": body.get("image"),
+            "tags": list(body.get("tags", [])),
+            "volume_ids": [],
+            "networks": {
+                "v4": [
+                    {
+                        "ip_address": f"10.10.{droplet_id // 256}.{droplet_id % 256}",
+                        "type": "private",
+                    },
+                    {
+                        "ip_address": f"203.0.{droplet_id // 256}.{droplet_id % 256}",
+                        "type": "public",
+                    },
+                ]
+            },
+            "_polls": 0,
+        }
+        self.droplets[droplet_id] = droplet
+        return droplet
+
+    def _touch(self, droplet):
+        droplet["_polls"] += 1
+        if droplet["_polls"] >= self.polls_until_active and droplet["status"] == "new":
+            droplet["status"] = "active"
+
+    def _new_action(self, action_type, resource_id):
+        action_id = next(self._ids)
+        action = {
+            "id": action_id,
+            "type": action_type,
+            "status": "in-progress" if self.action_polls else self.action_outcome,
+            "resource_id": resource_id,
+            "_polls": 0,
+        }
+        self.actions[action_id] = action
+        return action
+
+    @staticmethod
+    def _public(item):
+        return {k: v for k, v in item.items() if not k.startswith("_")}
+
+    def _page(self, items, key, path, query):
+        per_page = int(query.get("per_page", ["20"])[0])
+        page = int(query.get("page", ["1"])[0])
+        start = (page - 1) * per_page
+        body = {key: [self._public(i) for i in items[start : start + per_page]], "links": {}}
+        if start + per_page < len(items):
+            next_query = {k: v[0] for k, v in query.items()}
+            next_query["page"] = str(page + 1)
+            body["links"] = {"pages": {"next": f"{self.url}{path}?{urlencode(next_query)}"}}
+        body["meta"] = {"total": len(items)}
+        return body
+
+    # -- request handling ----------------------------------------------------
+
+    def ratelimit_headers(self):
+        return {
+            "ratelimit-limit": str(self.ratelimit_limit),
+            "ratelimit-remaining": str(self.ratelimit_remaining),
+            "ratelimit-reset": str(int(time.time()) + 60),
+        }
+
+    def respond(self, method, path, query, body):
+        """Return (status, response body, headers) for a request."""
+        with self._lock:
+            self.ratelimit_remaining = max(0, self.ratelimit_remaining - 1)
+            if self._failures:
+                self.requests.append((method, path))
+                status, headers = self._failures.pop(0)
+                return status, {"id": "error"}, {**self.ratelimit_headers(), **headers}
+        status, payload = self.handle(method, path, query, body)
+        with self._lock:
+            return status, payload, self.ratelimit_headers()
+
+    def handle(self, method, path, query, body):
+        """Return (status, response body) for a request."""
+        with self._lock:
+            self.requests.append((method, path))
+            parts = path.removeprefix("/v2").strip("/").split("/")
+
+            if parts[0] == "droplets":
+                return self._handle_droplets(method, parts, query, body)
+            if parts[0] == "volumes":
+                return self._handle_volumes(method, parts, query, body)
+            if parts[0] == "images":
+                return self._handle_images(method, parts, body)
+            if parts[0] == "actions" and method == "GET":
+                action = self.actions.get(int(parts[1]))
+                if action is None:
+                    return 404, {"id": "not_found"}
+                action["_polls"] += 1
+                if action["_polls"] >= self.action_polls:
+                    action["status"] = self.action_outcome
+                return 200, {"action": self._public(action)}
+            return 404, {"id": "not_found"}
+
+    def _handle_droplets(self, method, parts, query, body):
+        if len(parts) == 1 and method == "GET":
+            items = list(self.droplets.values())
+            if "tag_name" in query:
+                items = [d for d in items if query["tag_name"][0] in d["tags"]]
+            if "name" in query:
+                items = [d for d in items if d["name"] == query["name"][0]]
+            for droplet in items:
+                self._touch(droplet)
+            return 200, self._page(items, "droplets", "/droplets", query)
+        if len(parts) == 1 and method == "POST":
+            if "names" in body:
+                if len(body["names"]) > 10:
+                    return 422, {"id": "unprocessable_entity", "message": "too many names"}
+                created = [self._new_droplet(n, body) for n in body["names"]]
+                return 202, {"droplets": [self._public(d) for d in created]}
+            return 202, {"droplet": self._public(self._new_droplet(body["name"], body))}
+        if len(parts) == 1 and method == "DELETE":
+            tag = query["tag_name"][0]
+            for droplet in [d for d in self.droplets.values() if tag in d["tags"]]:
+                self._delete_droplet(droplet["id"])
+            return 204, None
+        droplet_id = int(parts[1])
+        if droplet_id not in self.droplets:
+            return 404, {"id": "not_found"}
+        droplet = self.droplets[droplet_id]
+        if len(parts) == 3 and parts[2] == "actions" and method == "POST":
+            if body["type"] == "shutdown":
+                droplet["status"] = "off"
+            elif body["type"] == "snapshot":
+                image_id = next(self._ids)
+                self.images[image_id] = {
+                    "id": image_id,
+                    "name": body["name"],
+                    "type": "snapshot",
+                    "regions": [droplet["region"]["slug"]],
+                    "_droplet_id": droplet_id,
+                }
+            return 201, {"action": self._public(self._new_action(body["type"], droplet_id))}
+        if len(parts) == 3 and parts[2] == "snapshots" and method == "GET":
+            items = [i for i in self.images.values() if i["_droplet_id"] == droplet_id]
+            return 200, self._page(items, "snapshots", f"/droplets/{droplet_id}/snapshots", query)
+        if method == "GET":
+            self._touch(self.droplets[droplet_id])
+            return 200, {"droplet": self._public(self.droplets[droplet_id])}
+        if method == "DELETE":
+            self._delete_droplet(droplet_id)
+            return 204, None
+        return 405, None
+
+    def _delete_droplet(self, droplet_id):
+        self.droplets.pop(droplet_id)
+        for volume in self.volumes.values():
+            if droplet_id in volume["droplet_ids"]:
+                volume["_detach_after"] = self.detach_delay_polls
+                volume["_detaching_from"] = droplet_id
+
+    def _handle_volumes(self, method, parts, query, body):
+        if len(parts) == 1 and method == "GET":
+            items = list(self.volumes.values())
+            if "region" in query:
+                items = [v for v in items if v["region"]["slug"] == query["region"][0]]
+            if "name" in query:
+                items = [v for v in items if v["name"] == query["name"][0]]
+            return 200, self._page(items, "volumes", "/volumes", query)
+        if len(parts) == 1 and method == "POST":
+            volume_id = f"vol-{next(self._ids)}"
+            volume = {
+                "id": volume_id,
+                "name": body["name"],
+                "region": {"slug": body["region"]},
+                "size_gigabytes": body["size_gigabytes"],
+                "filesystem_type": body.get("filesystem_type"),
+                "tags": list(body.get("tags", [])),
+                "droplet_ids": [],
+            }
+            self.volumes[volume_id] = volume
+            return 201, {"volume": self._public(volume)}
+        volume = self.volumes.get(parts[1])
+        if volume is None:
+            return 404, {"id": "not_found"}
+        if len(parts) == 3 and parts[2] == "actions" and method == "POST":
+            droplet_id = body["droplet_id"]
+            if body["type"] == "attach":
+                if droplet_id not in self.droplets:
+                    return 404, {"id": "not_found", "message": "droplet not found"}
+                volume["droplet_ids"] = [droplet_id]
+                self.droplets[droplet_id]["volume_ids"].append(volume["id"])
+            elif body["type"] == "detach" and self.action_outcome != "errored":
+                volume["droplet_ids"] = [d for d in volume["droplet_ids"] if d != droplet_id]
+                if droplet_id in self.droplets:
+                    self.droplets[droplet_id]["volume_ids"].remove(volume["id"])
+            action = self._new_action(f"{body['type']}_volume", droplet_id)
+            return 202, {"action": self._public(action)}
+        if method == "DELETE":
+            if volume["droplet_ids"]:
+                if "_detach_after" in volume:
+                    if volume["_detach_after"] <= 0:
+                        volume["droplet_ids"] = []
+                        volume.pop("_detach_after")
+                    else:
+                        volume["_detach_after"] -= 1
+                if volume["droplet_ids"]:
+                    return 409, {"id": "conflict", "message": "volume is attached"}
+            self.volumes.pop(volume["id"])
+            return 204, None
+        return 405, None
+
+    def _handle_images(self, method, parts, body):
+        image = self.images.get(int(parts[1]))
+        if image is None:
+            return 404, {"id": "not_found"}
+        if len(parts) == 2 and method == "GET":
+            return 200, {"image": self._public(image)}
+        if len(parts) == 3 and parts[2] == "actions" and method == "POST":
+            if body["region"] not in image["regions"]:
+                image["regions"].append(body["region"])
+            return 201, {"action": self._public(self._new_action(body["type"], image["id"]))}
+        return 405, None
+
+    def _handler_class(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            disable_nagle_algorithm = True
+
+            def _dispatch(self, method):
+                parsed = urlparse(self.path)
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length)) if length else {}
+                status, payload, headers = api.respond(
+                    method, parsed.path, parse_qs(parsed.query), body
+                )
+                data = json.dumps(payload).encode() if payload is not None else b""
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._dispatch("GET")
+
+            def do_POST(self):
+                self._dispatch("POST")
+
+            def do_DELETE(self):
+                self._dispatch("DELETE")
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,58 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+
+from saorsa_deploy import aws
+
+
+@pytest.fixture(autouse=True)
+def fresh_clients():
+    aws.reset_clients()
+    yield
+    aws.reset_clients()
+
+
+@pytest.fixture
+def mock_session():
+    with patch("saorsa_deploy.aws.boto3.session.Session") as mock_session_cls:
+        session = mock_session_cls.return_value
+        session.client.side_effect = lambda service, region_name, config, **credentials: object()
+        yield mock_session_cls
+
+
+class TestS3Client:
+    def test_client_is_reused_per_region(self, mock_session):
+        first = aws.s3_client("eu-west-2")
+        assert aws.s3_client("eu-west-2") is first
+        assert aws.s3_client("us-east-1") is not first
+        mock_session.assert_called_once()
+        assert mock_session.return_value.client.call_count == 2
+
+    def test_client_uses_pooling_and_adaptive_retries(self, mock_session):
+        aws.s3_client("eu-west-2")
+        config = mock_session.return_value.client.call_args.kwargs["config"]
+        assert config.max_pool_connections == aws.MAX_POOL_CONNECTIONS
+        assert config.retries == {"mode": "adaptive", "max_attempts": aws.MAX_RETRY_ATTEMPTS}
+
+    def test_concurrent_first_use_creates_one_client(self, mock_session):
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            clients = list(pool.map(lambda _: aws.s3_client("eu-west-2"), range(64)))
+        assert len({id(c) for c in clients}) == 1
+        assert mock_session.return_value.client.call_count == 1
+
+    def test_clients_with_credentials_are_kept_apart(self, mock_session):
+        default = aws.s3_client("eu-west-2")
+        uploader = aws.s3_client_with_credentials("eu-west-2", "AKIA1", "secret")
+
+        assert uploader is not default
+        assert aws.s3_client_with_credentials("eu-west-2", "AKIA1", "secret") is uploader
+        kwargs = mock_session.return_value.client.call_args.kwargs
+        assert kwargs["aws_access_key_id"] == "AKIA1"
+        assert kwargs["aws_secret_access_key"] == "secret"
+
+    def test_reset_clients_creates_a_new_session(self, mock_session):
+        first = aws.s3_client("eu-west-2")
+        aws.reset_clients()
+        assert aws.s3_client("eu-west-2") is not first
+        assert mock_session.call_count == 2
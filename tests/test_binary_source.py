@@ -1,3 +1,4 @@
+import json
 from unittest.mock import MagicMock, patch
 
 import botocore.exceptions
@@ -11,6 +12,9 @@ from saorsa_deploy.binary_source import (
     check_release_exists,
     get_custom_build_url,
     get_release_url,
+    load_build_manifest,
+    record_build,
+    resolve_branch_head,
 )
 
 
@@ -90,18 +94,99 @@ class TestGetReleaseUrl:
             get_release_url("1.0.0")
 
 
+def _get_object_returns(mock_s3, documents):
+    """Serve get_object from a dict of key -> JSON document; other keys are missing."""
+
+    def get_object(Bucket, Key):
+        if Key not in documents:
+            raise botocore.exceptions.ClientError(
+                {"Error": {"Code": "NoSuchKey", "Message": "Not Found"}}, "GetObject"
+            )
+        body = MagicMock()
+        body.read.return_value = json.dumps(documents[Key]).encode()
+        return {"Body": body}
+
+    mock_s3.get_object.side_effect = get_object
+
+
+POINTER_KEY = f"{BUILDS_KEY_PREFIX}/myorg/branches/feature-branch.json"
+COMMIT = "a" * 40
+
+
 class TestGetCustomBuildUrl:
-    def test_returns_correct_s3_url(self):
+    @patch("saorsa_deploy.binary_source.s3_client")
+    def test_resolves_through_the_branch_pointer(self, mock_boto_client):
+        _get_object_returns(mock_boto_client.return_value, {POINTER_KEY: {"commit": COMMIT}})
+
         url = get_custom_build_url("myorg", "feature-branch")
-        expected = (
+
+        assert url == (
             f"https://{BUILDS_BUCKET}.s3.{BUILDS_REGION}.amazonaws.com/"
-            f"{BUILDS_KEY_PREFIX}/myorg/feature-branch/saorsa-node"
+            f"{BUILDS_KEY_PREFIX}/myorg/commits/{COMMIT}/saorsa-node"
         )
-        assert url == expected
 
-    def test_different_owner_and_branch(self):
+    @patch("saorsa_deploy.binary_source.s3_client")
+    def test_branch_without_pointer_uses_legacy_key(self, mock_boto_client):
+        _get_object_returns(mock_boto_client.return_value, {})
+
         url = get_custom_build_url("saorsa-labs", "main")
-        assert "/saorsa-labs/main/saorsa-node" in url
+
+        assert url.endswith(f"{BUILDS_KEY_PREFIX}/saorsa-labs/main/saorsa-node")
+
+
+class TestResolveBranchHead:
+    @patch("saorsa_deploy.binary_source.subprocess.run")
+    def test_returns_sha_of_exact_ref(self, mock_run):
+        mock_run.return_value = MagicMock(
+            returncode=0,
+            stdout=f"{'b' * 40}\trefs/heads/feature-x-old\n{COMMIT}\trefs/heads/feature-x\n",
+        )
+
+        assert resolve_branch_head("myorg", "feature-x") == COMMIT
+        assert mock_run.call_args.args[0] == [
+            "git",
+            "ls-remote",
+            "https://github.com/myorg/saorsa-node.git",
+            "refs/heads/feature-x",
+        ]
+
+    @patch("saorsa_deploy.binary_source.subprocess.run")
+    def test_missing_branch_raises(self, mock_run):
+        mock_run.return_value = MagicMock(returncode=0, stdout="")
+
+        with pytest.raises(RuntimeError, match="not found"):
+            resolve_branch_head("myorg", "nope")
+
+    @patch("saorsa_deploy.binary_source.subprocess.run")
+    def test_git_failure_raises(self, mock_run):
+        mock_run.return_value = MagicMock(returncode=128, stderr="repository not found")
+
+        with pytest.raises(RuntimeError, match="repository not found"):
+            resolve_branch_head("nobody", "main")
+
+
+class TestRecordBuild:
+    @patch("saorsa_deploy.binary_source.s3_client_with_credentials")
+    def test_writes_manifest_before_branch_pointer(self, mock_client):
+        mock_s3 = mock_client.return_value
+
+        manifest = record_build("myorg", "feature-x", COMMIT, "f" * 64, "key", "secret")
+
+        puts = [c.kwargs for c in mock_s3.put_object.call_args_list]
+        assert [p["Key"] for p in puts] == [
+            f"{BUILDS_KEY_PREFIX}/myorg/commits/{COMMIT}/manifest.json",
+            f"{BUILDS_KEY_PREFIX}/myorg/branches/feature-x.json",
+        ]
+        assert json.loads(puts[0]["Body"]) == manifest
+        assert manifest["sha256"] == "f" * 64
+        assert json.loads(puts[1]["Body"])["commit"] == COMMIT
+        mock_client.assert_called_with(BUILDS_REGION, "key", "secret")
+
+    @patch("saorsa_deploy.binary_source.s3_client")
+    def test_unbuilt_commit_has_no_manifest(self, mock_boto_client):
+        _get_object_returns(mock_boto_client.return_value, {})
+
+        assert load_build_manifest("myorg", COMMIT) is None
 
 
 class TestCheckReleaseExists:
@@ -127,10 +212,19 @@ class TestCheckReleaseExists:
 
 
 class TestCheckCustomBuildExists:
-    @patch("saorsa_deploy.binary_source.boto3.client")
-    def test_returns_true_when_object_exists(self, mock_boto_client):
+    @patch("saorsa_deploy.binary_source.s3_client")
+    def test_returns_true_when_branch_pointer_exists(self, mock_boto_client):
+        mock_s3 = mock_boto_client.return_value
+        _get_object_returns(mock_s3, {POINTER_KEY: {"commit": COMMIT}})
+
+        assert check_custom_build_exists("myorg", "feature-branch") is True
+        mock_s3.head_object.assert_not_called()
+
+    @patch("saorsa_deploy.binary_source.s3_client")
+    def test_returns_true_when_legacy_object_exists(self, mock_boto_client):
         mock_s3 = MagicMock()
         mock_boto_client.return_value = mock_s3
+        _get_object_returns(mock_s3, {})
 
         assert check_custom_build_exists("myorg", "my-branch") is True
         mock_s3.head_object.assert_called_once_with(
@@ -138,7 +232,7 @@ class TestCheckCustomBuildExists:
             Key=f"{BUILDS_KEY_PREFIX}/myorg/my-branch/saorsa-node",
         )
 
-    @patch("saorsa_deploy.binary_source.boto3.client")
+    @patch("saorsa_deploy.binary_source.s3_client")
     def test_returns_false_when_object_not_found(self, mock_boto_client):
         mock_s3 = MagicMock()
         error = botocore.exceptions.ClientError(
@@ -146,5 +240,6 @@ class TestCheckCustomBuildExists:
         )
         mock_s3.head_object.side_effect = error
         mock_boto_client.return_value = mock_s3
+        _get_object_returns(mock_s3, {})
 
         assert check_custom_build_exists("myorg", "nonexistent") is False
@@ -0,0 +1,142 @@
+import pytest
+import requests
+
+from saorsa_deploy.bootstrap import (
+    create_bootstrap_vm,
+    destroy_bootstrap_vm,
+    find_and_destroy_bootstrap_vm,
+)
+
+
+class TestCreateBootstrapVm:
+    def test_creates_attached_droplet_and_volume(self, make_do_api, mock_sleep):
+        api = make_do_api()
+
+        vm = create_bootstrap_vm("DEV-01")
+
+        droplet = api.droplets[vm["droplet_id"]]
+        assert vm["droplet_name"] == "DEV-01-saorsa-bootstrap"
+        assert vm["ip_address"] == droplet["networks"]["v4"][1]["ip_address"]
+        assert vm["created"] is True
+        assert droplet["status"] == "active"
+        assert api.volumes[vm["volume_id"]]["name"] == "dev-01-saorsa-bootstrap-storage"
+        assert api.volumes[vm["volume_id"]]["droplet_ids"] == [vm["droplet_id"]]
+
+    def test_volume_is_created_before_waiting_for_the_droplet(self, make_do_api, mock_sleep):
+        api = make_do_api(polls_until_active=4)
+
+        vm = create_bootstrap_vm("DEV-01")
+
+        first_poll = api.requests.index(("GET", f"/v2/droplets/{vm['droplet_id']}"))
+        assert api.requests.index(("POST", "/v2/volumes")) < first_poll
+        assert api.requests[-1] == ("POST", f"/v2/volumes/{vm['volume_id']}/actions")
+        assert [c.args[0] for c in mock_sleep.call_args_list] == [0.5, 1.0, 2.0]
+
+    def test_rerun_reuses_existing_resources(self, make_do_api, mock_sleep):
+        api = make_do_api()
+        first = create_bootstrap_vm("DEV-01")
+        posts = api.count("POST", "/v2/")
+
+        again = create_bootstrap_vm("DEV-01")
+
+        assert again == {**first, "created": False}
+        assert api.count("POST", "/v2/") == posts
+
+    def test_missing_volume_is_created_and_attached(self, make_do_api, mock_sleep):
+        api = make_do_api()
+        first = create_bootstrap_vm("DEV-01")
+        api.volumes.clear()
+
+        again = create_bootstrap_vm("DEV-01")
+
+        assert again["droplet_id"] == first["droplet_id"]
+        assert again["created"] is True
+        assert api.volumes[again["volume_id"]]["droplet_ids"] == [first["droplet_id"]]
+
+
+class TestDestroyBootstrapVm:
+    def test_polls_the_detach_action_with_backoff(self, make_do_api, mock_sleep):
+        api = make_do_api(action_polls=3)
+        vm = create_bootstrap_vm("DEV-01")
+
+        destroy_bootstrap_vm(vm["droplet_id"], vm["volume_id"])
+
+        assert api.droplets == {}
+        assert api.volumes == {}
+        assert [c.args[0] for c in mock_sleep.call_args_list] == [0.5, 1.0]
+        assert api.count("GET", "/v2/actions/") == 3
+
+    def test_volume_is_deleted_after_the_detach_completes(self, make_do_api, mock_sleep):
+        api = make_do_api(action_polls=2)
+        vm = create_bootstrap_vm("DEV-01")
+
+        destroy_bootstrap_vm(vm["droplet_id"], vm["volume_id"])
+
+        log = [(m, p) for m, p in api.requests if m != "POST" or "actions" in p]
+        last_action_poll = max(i for i, (m, p) in enumerate(log) if p.startswith("/v2/actions/"))
+        volume_delete = log.index(("DELETE", f"/v2/volumes/{vm['volume_id']}"))
+        assert volume_delete > last_action_poll
+        assert ("DELETE", f"/v2/droplets/{vm['droplet_id']}") in log
+
+    def test_failed_detach_still_deletes_the_volume(self, make_do_api, mock_sleep):
+        api = make_do_api(action_outcome="errored", detach_delay_polls=2)
+        vm = create_bootstrap_vm("DEV-01")
+
+        destroy_bootstrap_vm(vm["droplet_id"], vm["volume_id"])
+
+        assert api.droplets == {}
+        assert api.volumes == {}
+        # Refused twice while the deleted droplet still held the volume
+        assert api.count("DELETE", f"/v2/volumes/{vm['volume_id']}") == 3
+
+    def test_volume_never_released_times_out(self, make_do_api, mock_sleep, monkeypatch):
+        monkeypatch.setattr("saorsa_deploy.bootstrap.VOLUME_RELEASE_TIMEOUT", 0)
+        api = make_do_api(action_outcome="errored", detach_delay_polls=10)
+        vm = create_bootstrap_vm("DEV-01")
+
+        with pytest.raises(TimeoutError, match="still attached"):
+            destroy_bootstrap_vm(vm["droplet_id"], vm["volume_id"])
+
+        assert vm["volume_id"] in api.volumes
+
+    def test_rejected_detach_raises(self, make_do_api, mock_sleep):
+        api = make_do_api()
+        vm = create_bootstrap_vm("DEV-01")
+        api.fail_next(500)
+
+        with pytest.raises(requests.HTTPError):
+            destroy_bootstrap_vm(vm["droplet_id"], vm["volume_id"])
+
+        assert vm["droplet_id"] in api.droplets
+
+
+class TestFindAndDestroyBootstrapVm:
+    def test_destroys_droplet_and_volume(self, make_do_api, mock_sleep):
+        api = make_do_api()
+        create_bootstrap_vm("DEV-01")
+
+        result = find_and_destroy_bootstrap_vm("DEV-01")
+
+        assert result == {"found": True, "droplet_name": "DEV-01-saorsa-bootstrap"}
+        assert api.droplets == {}
+        assert api.volumes == {}
+
+    def test_nothing_found(self, make_do_api):
+        api = make_do_api()
+
+        result = find_and_destroy_bootstrap_vm("DEV-01")
+
+        assert result["found"] is False
+        assert api.count("DELETE", "/v2/") == 0
+
+    def test_unattached_volume_is_deleted_without_detaching(self, make_do_api, mock_sleep):
+        api = make_do_api()
+        vm = create_bootstrap_vm("DEV-01")
+        api.handle("DELETE", f"/v2/droplets/{vm['droplet_id']}", {}, {})
+        api.volumes[vm["volume_id"]]["droplet_ids"] = []
+
+        find_and_destroy_bootstrap_vm("DEV-01")
+
+        assert api.volumes == {}
+        # Only the attach from create_bootstrap_vm
+        assert api.count("POST", f"/v2/volumes/{vm['volume_id']}/actions") == 1
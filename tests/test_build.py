@@ -1,10 +1,32 @@
 import os
 from types import SimpleNamespace
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
 import pytest
 
+from saorsa_deploy.provisioning.build import (
+    BuildWorkspace,
+    LocalSaorsaNodeBuilder,
+    build_command,
+    checkout_command,
+    format_build_stats,
+    parse_build_stats,
+    parse_sha256,
+    pipeline_steps,
+    upload_command,
+)
 
+SCCACHE_JSON = (
+    '{"stats": {"compile_requests": 420, "cache_hits": {"counts": {"Rust": 380}}, '
+    '"cache_misses": {"counts": {"Rust": 15, "C/C++": 5}}}}'
+)
+
+
+COMMIT = "c0ffee" + "0" * 34
+
+
+@patch("saorsa_deploy.cmd.build.load_build_manifest", return_value=None)
+@patch("saorsa_deploy.cmd.build.resolve_branch_head", return_value=COMMIT)
 class TestCmdBuild:
     @patch("saorsa_deploy.cmd.build.clear_known_hosts")
     @patch("saorsa_deploy.cmd.build.SaorsaNodeBuilder")
@@ -18,6 +40,8 @@ class TestCmdBuild:
         mock_wait_ssh,
         mock_builder_cls,
         mock_clear_hosts,
+        _mock_resolve,
+        _mock_manifest,
     ):
         os.environ["SAORSA_BUILD_AWS_ACCESS_KEY_ID"] = "test-key"
         os.environ["SAORSA_BUILD_AWS_SECRET_ACCESS_KEY"] = "test-secret"
@@ -38,18 +62,49 @@ class TestCmdBuild:
             )
             cmd_build(args)
 
-            mock_create.assert_called_once_with("myorg", "feature-x")
+            mock_create.assert_called_once_with("myorg", "feature-x", image="ubuntu-24-04-x64")
             mock_wait_ssh.assert_called_once_with("1.2.3.4")
             mock_clear_hosts.assert_called_once()
-            mock_builder_cls.assert_called_once()
+            assert mock_builder_cls.call_args.kwargs["commit"] == COMMIT
             mock_builder_cls.return_value.execute.assert_called_once()
             mock_destroy.assert_called_once_with(12345)
         finally:
             os.environ.pop("SAORSA_BUILD_AWS_ACCESS_KEY_ID", None)
             os.environ.pop("SAORSA_BUILD_AWS_SECRET_ACCESS_KEY", None)
 
+    @patch("saorsa_deploy.cmd.build.api_stats")
+    @patch("saorsa_deploy.cmd.build.clear_known_hosts")
+    @patch("saorsa_deploy.cmd.build.SaorsaNodeBuilder")
+    @patch("saorsa_deploy.cmd.build.wait_for_ssh")
+    @patch("saorsa_deploy.cmd.build.destroy_build_vm")
+    @patch("saorsa_deploy.cmd.build.create_build_vm")
+    @patch.dict(
+        os.environ,
+        {"SAORSA_BUILD_AWS_ACCESS_KEY_ID": "key", "SAORSA_BUILD_AWS_SECRET_ACCESS_KEY": "secret"},
+    )
+    def test_reports_api_stats(
+        self,
+        mock_create,
+        _mock_destroy,
+        _mock_wait_ssh,
+        mock_builder_cls,
+        _mock_clear_hosts,
+        mock_stats,
+        _mock_resolve,
+        _mock_manifest,
+        capsys,
+    ):
+        mock_create.return_value = {"droplet_id": 1, "droplet_name": "b", "ip_address": "1.2.3.4"}
+        mock_builder_cls.return_value.manifest = {"sha256": "ab" * 32}
+        mock_stats.return_value.summary.return_value = "4 calls, 0 retries"
+        from saorsa_deploy.cmd.build import cmd_build
+
+        cmd_build(SimpleNamespace(branch_name="x", repo_owner="myorg", ssh_key_path="k"))
+
+        assert "Digital Ocean API: 4 calls, 0 retries" in capsys.readouterr().out
+
     @patch("saorsa_deploy.cmd.build.create_build_vm")
-    def test_exits_without_aws_credentials(self, mock_create):
+    def test_exits_without_aws_credentials(self, mock_create, _mock_resolve, _mock_manifest):
         os.environ.pop("SAORSA_BUILD_AWS_ACCESS_KEY_ID", None)
         os.environ.pop("SAORSA_BUILD_AWS_SECRET_ACCESS_KEY", None)
 
@@ -77,6 +132,8 @@ class TestCmdBuild:
         mock_wait_ssh,
         mock_builder_cls,
         mock_clear_hosts,
+        _mock_resolve,
+        _mock_manifest,
     ):
         os.environ["SAORSA_BUILD_AWS_ACCESS_KEY_ID"] = "test-key"
         os.environ["SAORSA_BUILD_AWS_SECRET_ACCESS_KEY"] = "test-secret"
@@ -102,3 +159,295 @@ class TestCmdBuild:
         finally:
             os.environ.pop("SAORSA_BUILD_AWS_ACCESS_KEY_ID", None)
             os.environ.pop("SAORSA_BUILD_AWS_SECRET_ACCESS_KEY", None)
+
+
+MANIFEST = {"commit": COMMIT, "sha256": "f" * 64}
+
+
+@patch.dict(
+    os.environ,
+    {"SAORSA_BUILD_AWS_ACCESS_KEY_ID": "key", "SAORSA_BUILD_AWS_SECRET_ACCESS_KEY": "secret"},
+)
+@patch("saorsa_deploy.cmd.build.point_branch")
+@patch("saorsa_deploy.cmd.build.create_build_vm")
+@patch("saorsa_deploy.cmd.build.resolve_branch_head", return_value=COMMIT)
+@patch("saorsa_deploy.cmd.build.load_build_manifest", return_value=MANIFEST)
+class TestSkipAlreadyBuilt:
+    def _args(self, **kwargs):
+        return SimpleNamespace(
+            branch_name="feature-x", repo_owner="myorg", ssh_key_path="~/.ssh/id_rsa", **kwargs
+        )
+
+    @patch("saorsa_deploy.cmd.build.load_branch_pointer", return_value={"commit": COMMIT})
+    def test_built_head_needs_no_droplet(
+        self, _mock_pointer, mock_manifest, _mock_resolve, mock_create, mock_point
+    ):
+        from saorsa_deploy.cmd.build import cmd_build
+
+        cmd_build(self._args())
+
+        mock_manifest.assert_called_once_with("myorg", COMMIT)
+        mock_create.assert_not_called()
+        mock_point.assert_not_called()
+
+    @patch("saorsa_deploy.cmd.build.load_branch_pointer", return_value={"commit": "0" * 40})
+    def test_commit_built_elsewhere_moves_the_branch_pointer(
+        self, _mock_pointer, _mock_manifest, _mock_resolve, mock_create, mock_point
+    ):
+        from saorsa_deploy.cmd.build import cmd_build
+
+        cmd_build(self._args())
+
+        mock_create.assert_not_called()
+        mock_point.assert_called_once_with("myorg", "feature-x", MANIFEST, "key", "secret")
+
+    @patch("saorsa_deploy.cmd.build.destroy_build_vm")
+    @patch("saorsa_deploy.cmd.build.SaorsaNodeBuilder")
+    @patch("saorsa_deploy.cmd.build.clear_known_hosts")
+    @patch("saorsa_deploy.cmd.build.wait_for_ssh")
+    def test_force_rebuilds(
+        self,
+        _mock_wait,
+        _mock_clear,
+        mock_builder_cls,
+        _mock_destroy,
+        mock_manifest,
+        _mock_resolve,
+        mock_create,
+        _mock_point,
+    ):
+        mock_create.return_value = {"droplet_id": 1, "droplet_name": "b", "ip_address": "1.2.3.4"}
+        from saorsa_deploy.cmd.build import cmd_build
+
+        cmd_build(self._args(force=True))
+
+        mock_manifest.assert_not_called()
+        mock_builder_cls.return_value.execute.assert_called_once()
+
+    def test_unknown_branch_exits(self, _mock_manifest, mock_resolve, mock_create, _mock_point):
+        mock_resolve.side_effect = RuntimeError("Branch nope not found")
+        from saorsa_deploy.cmd.build import cmd_build
+
+        with pytest.raises(SystemExit):
+            cmd_build(self._args())
+
+        mock_create.assert_not_called()
+
+
+@patch.dict(
+    os.environ,
+    {"SAORSA_BUILD_AWS_ACCESS_KEY_ID": "key", "SAORSA_BUILD_AWS_SECRET_ACCESS_KEY": "secret"},
+)
+@patch("saorsa_deploy.cmd.build.create_build_vm")
+@patch("saorsa_deploy.cmd.build.resolve_branch_head", return_value=COMMIT)
+@patch("saorsa_deploy.cmd.build.load_build_manifest", return_value=None)
+class TestCmdBuildLocal:
+    def _args(self, **kwargs):
+        return SimpleNamespace(
+            branch_name="feature-x", repo_owner="myorg", ssh_key_path="~/.ssh/id_rsa", **kwargs
+        )
+
+    @patch("saorsa_deploy.cmd.build.LocalSaorsaNodeBuilder")
+    def test_local_build_needs_no_droplet(
+        self, mock_builder_cls, _mock_manifest, _mock_resolve, mock_create
+    ):
+        mock_builder_cls.return_value.manifest = MANIFEST
+        from saorsa_deploy.cmd.build import cmd_build
+
+        cmd_build(self._args(local=True, container=True))
+
+        mock_create.assert_not_called()
+        kwargs = mock_builder_cls.call_args.kwargs
+        assert kwargs["commit"] == COMMIT
+        assert kwargs["container"] is True
+        mock_builder_cls.return_value.execute.assert_called_once()
+
+    @patch("saorsa_deploy.cmd.build.LocalSaorsaNodeBuilder")
+    def test_local_build_failure_exits(
+        self, mock_builder_cls, _mock_manifest, _mock_resolve, mock_create
+    ):
+        mock_builder_cls.return_value.execute.side_effect = RuntimeError("cargo failed")
+        from saorsa_deploy.cmd.build import cmd_build
+
+        with pytest.raises(SystemExit):
+            cmd_build(self._args(local=True))
+
+    def test_container_requires_local(self, _mock_manifest, mock_resolve, mock_create):
+        from saorsa_deploy.cmd.build import cmd_build
+
+        with pytest.raises(SystemExit):
+            cmd_build(self._args(container=True))
+
+        mock_resolve.assert_not_called()
+
+
+def _completed(stdout=""):
+    return MagicMock(returncode=0, stdout=stdout, stderr="")
+
+
+class TestLocalSaorsaNodeBuilder:
+    @patch.dict(
+        os.environ,
+        {"SAORSA_BUILD_AWS_ACCESS_KEY_ID": "key", "SAORSA_BUILD_AWS_SECRET_ACCESS_KEY": "secret"},
+    )
+    @patch("saorsa_deploy.provisioning.build.record_build")
+    @patch("saorsa_deploy.provisioning.build.subprocess.run")
+    @patch("saorsa_deploy.provisioning.build.shutil.which", return_value="/usr/bin/tool")
+    def test_container_build_shares_the_pipeline(
+        self, _mock_which, mock_run, mock_record, tmp_path
+    ):
+        mock_run.side_effect = [
+            _completed(),
+            _completed("SAORSA_BUILD_SECONDS:42\n"),
+            _completed(f"SAORSA_SHA256:{'f' * 64}\nupload: done\n"),
+        ]
+        mock_record.return_value = MANIFEST
+        builder = LocalSaorsaNodeBuilder(
+            "myorg", "feature-x", COMMIT, container=True, build_dir=str(tmp_path)
+        )
+
+        url = builder.execute()
+
+        commands = [c.args[0][2] for c in mock_run.call_args_list]
+        assert commands[0].startswith(f"mkdir -p {tmp_path}/saorsa-node && cd")
+        assert commands[1].startswith("docker run --rm --platform linux/amd64")
+        assert f"-v {tmp_path}/cargo-home:/cargo-home" in commands[1]
+        assert "aws s3 cp" in commands[2] and "docker" not in commands[2]
+        mock_record.assert_called_once_with("myorg", "feature-x", COMMIT, "f" * 64, "key", "secret")
+        assert url.endswith(f"/builds/myorg/commits/{COMMIT}/saorsa-node")
+        assert builder.build_stats["build_seconds"] == 42
+
+    @patch.dict(
+        os.environ,
+        {"SAORSA_BUILD_AWS_ACCESS_KEY_ID": "key", "SAORSA_BUILD_AWS_SECRET_ACCESS_KEY": "secret"},
+    )
+    @patch("saorsa_deploy.provisioning.build.record_build")
+    @patch("saorsa_deploy.provisioning.build.subprocess.run")
+    @patch("saorsa_deploy.provisioning.build.shutil.which", return_value="/usr/bin/tool")
+    def test_failed_step_stops_the_pipeline(self, _mock_which, mock_run, mock_record, tmp_path):
+        mock_run.side_effect = [
+            _completed(),
+            MagicMock(returncode=101, stdout="", stderr="error[E0425]"),
+        ]
+        builder = LocalSaorsaNodeBuilder(
+            "myorg", "feature-x", COMMIT, container=True, build_dir=str(tmp_path)
+        )
+
+        with pytest.raises(RuntimeError, match="Build saorsa-node"):
+            builder.execute()
+
+        assert mock_run.call_count == 2
+        mock_record.assert_not_called()
+
+    @patch.dict(
+        os.environ,
+        {"SAORSA_BUILD_AWS_ACCESS_KEY_ID": "key", "SAORSA_BUILD_AWS_SECRET_ACCESS_KEY": "secret"},
+    )
+    @patch("saorsa_deploy.provisioning.build.shutil.which")
+    def test_missing_tools_are_reported(self, mock_which, tmp_path):
+        mock_which.side_effect = lambda tool: None if tool == "docker" else f"/usr/bin/{tool}"
+        builder = LocalSaorsaNodeBuilder(
+            "myorg", "feature-x", COMMIT, container=True, build_dir=str(tmp_path)
+        )
+
+        with pytest.raises(RuntimeError, match="docker"):
+            builder.execute()
+
+    @patch.dict(
+        os.environ,
+        {"SAORSA_BUILD_AWS_ACCESS_KEY_ID": "key", "SAORSA_BUILD_AWS_SECRET_ACCESS_KEY": "secret"},
+    )
+    @patch("saorsa_deploy.provisioning.build.platform.machine", return_value="x86_64")
+    @patch("saorsa_deploy.provisioning.build.sys.platform", "linux")
+    @patch("saorsa_deploy.provisioning.build.record_build")
+    @patch("saorsa_deploy.provisioning.build.subprocess.run")
+    @patch("saorsa_deploy.provisioning.build.shutil.which", return_value="/usr/bin/tool")
+    def test_native_build_uses_its_own_sccache_and_env_credentials(
+        self, _mock_which, mock_run, mock_record, _mock_machine, tmp_path
+    ):
+        mock_run.side_effect = [
+            _completed(),
+            _completed("SAORSA_BUILD_SECONDS:42\n"),
+            _completed(f"SCCACHE_STATS:{SCCACHE_JSON}\n"),
+            _completed(f"SAORSA_SHA256:{'f' * 64}\n"),
+        ]
+        mock_record.return_value = MANIFEST
+        builder = LocalSaorsaNodeBuilder("myorg", "feature-x", COMMIT, build_dir=str(tmp_path))
+
+        builder.execute()
+
+        for call in mock_run.call_args_list:
+            assert "secret" not in call.args[0][2]
+            env = call.kwargs["env"]
+            assert env["AWS_ACCESS_KEY_ID"] == "key"
+            assert env["AWS_SECRET_ACCESS_KEY"] == "secret"
+            assert env["SCCACHE_SERVER_PORT"] == "4227"
+            assert env["SCCACHE_DIR"] == f"{tmp_path}/sccache"
+        assert "RUSTC_WRAPPER=/usr/bin/tool" in mock_run.call_args_list[1].args[0][2]
+
+    def test_pipeline_without_sccache_skips_its_statistics(self):
+        workspace = BuildWorkspace("/src", "/target", "cargo", sccache=None)
+
+        steps = pipeline_steps("myorg", COMMIT, "key", "secret", workspace)
+
+        assert [name for name, _ in steps] == [
+            f"Check out myorg/saorsa-node ({COMMIT[:12]})",
+            "Build saorsa-node (release)",
+            "Upload binary to S3",
+        ]
+        assert "RUSTC_WRAPPER" not in steps[1][1]
+        assert "CARGO_TARGET_DIR=/target" in steps[1][1]
+        assert "sha256sum /target/release/saorsa-node" in steps[2][1]
+
+
+class TestBuildStats:
+    def test_build_compiles_through_sccache_with_s3_backend(self):
+        command = build_command("key", "secret")
+
+        assert "RUSTC_WRAPPER=/usr/local/bin/sccache" in command
+        assert "SCCACHE_BUCKET=saorsa-node-builds" in command
+        assert "SCCACHE_S3_KEY_PREFIX=sccache/" in command
+        assert command.index("--start-server") < command.index("cargo build")
+
+    def test_parses_compile_time_and_cache_counts(self):
+        stats = parse_build_stats(
+            ["Compiling saorsa-node", "SAORSA_BUILD_SECONDS:95", f"SCCACHE_STATS:{SCCACHE_JSON}"]
+        )
+
+        assert stats == {"build_seconds": 95, "cache_hits": 380, "cache_misses": 20}
+
+    def test_unreadable_stats_are_left_unreported(self):
+        stats = parse_build_stats(["SCCACHE_STATS:sccache: error: server not running"])
+
+        assert stats["cache_hits"] is None
+        assert format_build_stats(stats, 12.4) == "total 12s"
+
+    def test_formats_hit_rate(self):
+        stats = {"build_seconds": 95, "cache_hits": 380, "cache_misses": 20}
+
+        assert format_build_stats(stats, 180) == (
+            "total 180s, compile 95s, sccache 380 hit(s), 20 miss(es), 95% hit rate"
+        )
+
+
+class TestCommitAddressedBuild:
+    def test_checks_out_the_exact_commit(self):
+        command = checkout_command("myorg", COMMIT)
+
+        assert f"git fetch -q --depth 1 https://github.com/myorg/saorsa-node.git {COMMIT}" in (
+            command
+        )
+        assert "rm -rf" not in command
+        assert "git checkout -q --force FETCH_HEAD" in command
+
+    def test_uploads_under_the_commit_key(self):
+        command = upload_command("myorg", COMMIT, "key", "secret")
+
+        assert command.startswith("sha256sum /root/saorsa-node/target/release/saorsa-node")
+        assert command.endswith(
+            f"s3://saorsa-node-builds/builds/myorg/commits/{COMMIT}/saorsa-node"
+        )
+
+    def test_parses_uploaded_sha256(self):
+        assert parse_sha256(["upload: ...", "SAORSA_SHA256:abc123"]) == "abc123"
+        assert parse_sha256(["upload failed"]) is None
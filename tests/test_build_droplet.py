@@ -3,6 +3,7 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 
+from saorsa_deploy import do_client
 from saorsa_deploy.build_droplet import (
     BUILD_IMAGE,
     BUILD_REGION,
@@ -15,80 +16,40 @@ from saorsa_deploy.build_droplet import (
 
 
 class TestCreateBuildVm:
-    @patch("saorsa_deploy.build_droplet.time.sleep")
-    @patch("saorsa_deploy.build_droplet.requests")
-    def test_creates_droplet_with_correct_params(self, mock_requests, _mock_sleep):
-        os.environ["DO_TOKEN"] = "test-token"
-        try:
-            # No existing droplet
-            mock_list_resp = MagicMock()
-            mock_list_resp.json.return_value = {"droplets": []}
-            mock_list_resp.raise_for_status = MagicMock()
-
-            # Create droplet
-            mock_create_resp = MagicMock()
-            mock_create_resp.json.return_value = {"droplet": {"id": 12345}}
-            mock_create_resp.raise_for_status = MagicMock()
-
-            # Wait for active
-            mock_active_resp = MagicMock()
-            mock_active_resp.json.return_value = {
-                "droplet": {
-                    "status": "active",
-                    "networks": {
-                        "v4": [{"type": "public", "ip_address": "1.2.3.4"}],
-                    },
+    def test_creates_droplet_with_correct_params(self, do_api):
+        result = create_build_vm("myorg", "feature-branch")
+
+        droplet = do_api.droplets[result["droplet_id"]]
+        assert result["droplet_name"] == "saorsa-build-myorg-feature-branch"
+        assert result["ip_address"] == droplet["networks"]["v4"][1]["ip_address"]
+        assert result["reused"] is False
+        assert droplet["name"] == "saorsa-build-myorg-feature-branch"
+        assert droplet["region"]["slug"] == BUILD_REGION
+        assert droplet["size_slug"] == BUILD_SIZE
+        assert droplet["image"] == BUILD_IMAGE
+        assert droplet["status"] == "active"
+
+    def test_sends_ssh_keys(self, do_api):
+        with patch.object(do_client.DoClient, "post_json", autospec=True) as mock_post:
+            mock_post.return_value = {"droplet": {"id": 12345}}
+            with patch.object(do_client.DoClient, "wait_for_droplet_active") as mock_wait:
+                mock_wait.return_value = {
+                    "networks": {"v4": [{"type": "public", "ip_address": "1.2.3.4"}]}
                 }
-            }
-            mock_active_resp.raise_for_status = MagicMock()
-
-            mock_requests.get.side_effect = [mock_list_resp, mock_active_resp]
-            mock_requests.post.return_value = mock_create_resp
-
-            result = create_build_vm("myorg", "feature-branch")
+                result = create_build_vm("myorg", "feature-branch")
 
-            assert result["droplet_id"] == 12345
-            assert result["droplet_name"] == "saorsa-build-myorg-feature-branch"
-            assert result["ip_address"] == "1.2.3.4"
+        assert result["ip_address"] == "1.2.3.4"
+        assert mock_post.call_args.args[2]["ssh_keys"] == SSH_KEY_IDS
+        mock_wait.assert_called_once_with(12345)
 
-            # Verify create was called with correct params
-            create_call = mock_requests.post.call_args
-            body = create_call.kwargs["json"]
-            assert body["name"] == "saorsa-build-myorg-feature-branch"
-            assert body["region"] == BUILD_REGION
-            assert body["size"] == BUILD_SIZE
-            assert body["image"] == BUILD_IMAGE
-            assert body["ssh_keys"] == SSH_KEY_IDS
-        finally:
-            os.environ.pop("DO_TOKEN", None)
+    def test_reuses_existing_droplet(self, do_api):
+        first = create_build_vm("myorg", "branch")
+        result = create_build_vm("myorg", "branch")
 
-    @patch("saorsa_deploy.build_droplet.time.sleep")
-    @patch("saorsa_deploy.build_droplet.requests")
-    def test_reuses_existing_droplet(self, mock_requests, mock_sleep):
-        os.environ["DO_TOKEN"] = "test-token"
-        try:
-            # Existing droplet found
-            mock_list_resp = MagicMock()
-            mock_list_resp.json.return_value = {
-                "droplets": [
-                    {
-                        "name": "saorsa-build-myorg-branch",
-                        "id": 99999,
-                        "networks": {"v4": [{"type": "public", "ip_address": "5.6.7.8"}]},
-                    }
-                ]
-            }
-            mock_list_resp.raise_for_status = MagicMock()
-            mock_requests.get.return_value = mock_list_resp
-
-            result = create_build_vm("myorg", "branch")
-
-            assert result["droplet_id"] == 99999
-            assert result["ip_address"] == "5.6.7.8"
-            assert result["reused"] is True
-            mock_requests.post.assert_not_called()
-        finally:
-            os.environ.pop("DO_TOKEN", None)
+        assert result["droplet_id"] == first["droplet_id"]
+        assert result["ip_address"] == first["ip_address"]
+        assert result["reused"] is True
+        assert do_api.count("POST", "/v2/droplets") == 1
 
     def test_raises_without_do_token(self):
         os.environ.pop("DO_TOKEN", None)
@@ -97,16 +58,13 @@ class TestCreateBuildVm:
 
 
 class TestDestroyBuildVm:
-    @patch("saorsa_deploy.build_droplet.requests")
-    def test_deletes_droplet(self, mock_requests):
-        os.environ["DO_TOKEN"] = "test-token"
-        try:
-            destroy_build_vm(12345)
-            mock_requests.delete.assert_called_once()
-            delete_url = mock_requests.delete.call_args[0][0]
-            assert "12345" in delete_url
-        finally:
-            os.environ.pop("DO_TOKEN", None)
+    def test_deletes_droplet(self, do_api):
+        vm = create_build_vm("myorg", "branch")
+
+        destroy_build_vm(vm["droplet_id"])
+
+        assert do_api.droplets == {}
+        assert do_api.count("DELETE", f"/v2/droplets/{vm['droplet_id']}") == 1
 
 
 class TestWaitForSsh:
@@ -0,0 +1,100 @@
+import pytest
+
+from saorsa_deploy.deployment import (
+    HOST_FIELDS,
+    STATE_SCHEMA_VERSION,
+    Deployment,
+    Host,
+    hosts_to_state,
+    upgrade_state,
+)
+
+STATE = {
+    "schema_version": STATE_SCHEMA_VERSION,
+    "name": "DEV-01",
+    "regions": [["digitalocean", "lon1"], ["digitalocean", "nyc1"]],
+    "terraform_variables": {"name": "DEV-01"},
+    "bootstrap_ip": "10.0.0.100",
+    "bootstrap_port": 5000,
+    "engine": "per-region",
+    "state_keys": [],
+    "host_fields": HOST_FIELDS,
+    "hosts": {
+        "digitalocean/lon1": {
+            "10.0.0.1": [11, "vol-1", [12000, 12001], "abc", "2026-01-01T00:00:00+00:00"],
+            "10.0.0.2": [12, "vol-2", None, None, None],
+        },
+        "digitalocean/nyc1": {"10.0.0.3": [13, "vol-3", None, None, None]},
+    },
+}
+
+
+class TestDeployment:
+    def test_fields(self):
+        deployment = Deployment(STATE)
+        assert deployment.name == "DEV-01"
+        assert deployment.regions == [("digitalocean", "lon1"), ("digitalocean", "nyc1")]
+        assert deployment.bootstrap_ip == "10.0.0.100"
+        assert deployment.bootstrap_port == 5000
+        assert deployment.engine == "per-region"
+
+    def test_hosts_are_indexed_by_region_and_ip(self):
+        deployment = Deployment(STATE)
+
+        assert deployment.region_keys == ["digitalocean/lon1", "digitalocean/nyc1"]
+        assert [h.ip for h in deployment.hosts_in_region("digitalocean/lon1")] == [
+            "10.0.0.1",
+            "10.0.0.2",
+        ]
+        assert deployment.hosts_in_region("digitalocean/ams3") == []
+        host = deployment.host("10.0.0.1")
+        assert host.region == "digitalocean/lon1"
+        assert host.droplet_id == 11
+        assert host.node_ports == [12000, 12001]
+        assert host.binary_sha256 == "abc"
+        assert deployment.host("10.9.9.9") is None
+        assert len(deployment.hosts) == 3
+
+    def test_vm_ips(self):
+        assert Deployment(STATE).vm_ips() == {
+            "digitalocean/lon1": ["10.0.0.1", "10.0.0.2"],
+            "digitalocean/nyc1": ["10.0.0.3"],
+        }
+
+    def test_reads_legacy_documents(self):
+        deployment = Deployment(
+            {
+                "name": "DEV-01",
+                "regions": [["digitalocean", "lon1"]],
+                "vm_ips": {"digitalocean/lon1": ["10.0.0.1", "10.0.0.2"]},
+            }
+        )
+        assert deployment.vm_ips() == {"digitalocean/lon1": ["10.0.0.1", "10.0.0.2"]}
+        assert deployment.host("10.0.0.2").droplet_id is None
+
+    def test_rows_are_read_by_stored_field_names(self):
+        state = {
+            **STATE,
+            "host_fields": ["volume_id", "future_field", "droplet_id"],
+            "hosts": {"digitalocean/lon1": {"10.0.0.1": ["vol-1", "x", 11]}},
+        }
+        host = Deployment(state).host("10.0.0.1")
+        assert host.droplet_id == 11
+        assert host.volume_id == "vol-1"
+
+    def test_hosts_use_slots(self):
+        with pytest.raises(AttributeError):
+            Host("10.0.0.1", "digitalocean/lon1").extra = 1
+
+
+class TestStateRoundTrip:
+    def test_hosts_to_state_round_trips(self):
+        hosts = Deployment(STATE).hosts
+        assert hosts_to_state(hosts) == STATE["hosts"]
+
+    def test_upgrade_is_a_no_op_for_current_documents(self):
+        assert upgrade_state(STATE) is STATE
+
+    def test_upgrade_refuses_newer_documents(self):
+        with pytest.raises(RuntimeError, match="schema version 3"):
+            upgrade_state({"schema_version": 3})
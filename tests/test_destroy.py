@@ -0,0 +1,113 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from saorsa_deploy.cmd.destroy import cmd_destroy
+
+STATE = {
+    "name": "DEV-01",
+    "regions": [["digitalocean", "lon1"], ["digitalocean", "nyc1"]],
+    "terraform_variables": {"name": "DEV-01", "vm_count": "2", "attached_volume_size": "20"},
+    "vm_ips": {
+        "digitalocean/lon1": ["10.0.0.1", "10.0.0.2"],
+        "digitalocean/nyc1": ["10.0.0.3", "10.0.0.4"],
+    },
+    "state_keys": [
+        "saorsa-deploy/do-DEV-01-lon1.tfstate",
+        "saorsa-deploy/do-DEV-01-nyc1.tfstate",
+    ],
+}
+
+
+def _args(**kwargs):
+    return SimpleNamespace(name="DEV-01", force=True, parallelism=None, fast=False, **kwargs)
+
+
+@patch("saorsa_deploy.cmd.destroy.delete_deployment_state")
+@patch("saorsa_deploy.cmd.destroy.find_and_destroy_bootstrap_vm")
+@patch("saorsa_deploy.cmd.destroy.delete_terraform_states")
+@patch("saorsa_deploy.cmd.destroy.destroy_node_vms")
+@patch("saorsa_deploy.cmd.destroy.execute_terraform_runs")
+@patch("saorsa_deploy.cmd.destroy.load_deployment_state")
+class TestCmdDestroy:
+    def test_fast_deletes_by_tag_and_removes_terraform_state(
+        self, mock_load, mock_execute, mock_destroy_vms, mock_delete_tf, mock_bootstrap, mock_delete
+    ):
+        mock_load.return_value = STATE
+        mock_destroy_vms.return_value = {"droplets": 4, "volumes": 4}
+        mock_bootstrap.return_value = {"found": True, "droplet_name": "DEV-01-saorsa-bootstrap"}
+
+        args = _args()
+        args.fast = True
+        cmd_destroy(args)
+
+        mock_execute.assert_not_called()
+        mock_destroy_vms.assert_called_once_with("DEV-01", expected_droplets=4)
+        mock_delete_tf.assert_called_once_with(STATE["state_keys"])
+        mock_bootstrap.assert_called_once_with("DEV-01")
+        mock_delete.assert_called_once_with("DEV-01")
+
+    def test_fast_failure_keeps_bootstrap_and_state(
+        self, mock_load, mock_execute, mock_destroy_vms, mock_delete_tf, mock_bootstrap, mock_delete
+    ):
+        mock_load.return_value = STATE
+        mock_destroy_vms.side_effect = RuntimeError("they may predate tagging")
+
+        args = _args()
+        args.fast = True
+        with pytest.raises(SystemExit):
+            cmd_destroy(args)
+
+        mock_delete_tf.assert_not_called()
+        mock_bootstrap.assert_not_called()
+        mock_delete.assert_not_called()
+
+    def test_default_runs_terraform_destroy(
+        self, mock_load, mock_execute, mock_destroy_vms, mock_delete_tf, mock_bootstrap, mock_delete
+    ):
+        mock_load.return_value = STATE
+        mock_execute.return_value = []
+        mock_bootstrap.return_value = {"found": False, "droplet_name": "DEV-01-saorsa-bootstrap"}
+
+        cmd_destroy(_args())
+
+        assert mock_execute.call_args.kwargs["action"] == "destroy"
+        mock_destroy_vms.assert_not_called()
+        mock_delete_tf.assert_not_called()
+
+    def test_do_api_engine_deletes_by_tag(
+        self, mock_load, mock_execute, mock_destroy_vms, mock_delete_tf, mock_bootstrap, mock_delete
+    ):
+        mock_load.return_value = {**STATE, "engine": "do-api"}
+        mock_destroy_vms.return_value = {"droplets": 4, "volumes": 4}
+        mock_bootstrap.return_value = {"found": True, "droplet_name": "DEV-01-saorsa-bootstrap"}
+
+        cmd_destroy(_args())
+
+        mock_execute.assert_not_called()
+        mock_destroy_vms.assert_called_once_with("DEV-01", expected_droplets=None)
+        mock_delete_tf.assert_not_called()
+
+    @patch("saorsa_deploy.cmd.destroy.migrate_legacy_state")
+    def test_legacy_deployment_state_is_migrated_first(
+        self,
+        mock_migrate,
+        mock_load,
+        mock_execute,
+        mock_destroy_vms,
+        mock_delete_tf,
+        mock_bootstrap,
+        mock_delete,
+    ):
+        legacy = {k: v for k, v in STATE.items() if k != "state_keys"}
+        mock_load.return_value = legacy
+        mock_migrate.return_value = ["digitalocean/lon1"]
+        mock_execute.return_value = []
+        mock_bootstrap.return_value = {"found": False, "droplet_name": "DEV-01-saorsa-bootstrap"}
+
+        cmd_destroy(_args())
+
+        migrated_configs = mock_migrate.call_args.args[0]
+        assert [c.state_key for c in migrated_configs] == STATE["state_keys"]
+        assert mock_execute.call_args.args[0] == migrated_configs
@@ -0,0 +1,155 @@
+import pytest
+
+from saorsa_deploy.do_bulk import (
+    create_node_vms,
+    deployment_tag,
+    destroy_node_vms,
+    droplet_name,
+    region_tag,
+    volume_name,
+)
+
+
+@pytest.fixture
+def do_api(make_do_api, monkeypatch):
+    monkeypatch.setattr("saorsa_deploy.do_bulk.POLL_INTERVAL", 0)
+    monkeypatch.setattr("saorsa_deploy.do_bulk.PAGE_SIZE", 7)
+    return make_do_api(polls_until_active=2, detach_delay_polls=2)
+
+
+class TestNaming:
+    def test_names_match_terraform_manifests(self):
+        assert droplet_name("DEV-01", "lon1", 3) == "DEV-01-saorsa-node-lon1-3"
+        assert volume_name("DEV-01", "lon1", 3) == "dev-01-saorsa-storage-lon1-3"
+
+    def test_tags_are_lowercase(self):
+        assert deployment_tag("DEV-01") == "saorsa-deploy:dev-01"
+        assert region_tag("DEV-01", "lon1") == "saorsa-region:dev-01:lon1"
+
+    def test_region_tags_do_not_collide_with_other_deployments(self):
+        assert region_tag("dev", "lon1") != deployment_tag("dev-lon1")
+        assert region_tag("dev", "lon1") != region_tag("dev-lon1", "lon1")
+
+
+class TestCreateNodeVms:
+    def test_creates_attached_vms_in_every_region(self, do_api):
+        vms = create_node_vms("DEV-01", ["lon1", "nyc1"], vm_count=12, volume_size_gb=20)
+
+        assert sorted(vms) == ["digitalocean/lon1", "digitalocean/nyc1"]
+        assert [vm["droplet_name"] for vm in vms["digitalocean/lon1"]] == [
+            f"DEV-01-saorsa-node-lon1-{i}" for i in range(1, 13)
+        ]
+        assert len(do_api.droplets) == 24
+        for droplet in do_api.droplets.values():
+            assert droplet["status"] == "active"
+            assert len(droplet["volume_ids"]) == 1
+        for vm in vms["digitalocean/nyc1"]:
+            assert vm["ip_address"].startswith("203.0.")
+            assert do_api.volumes[vm["volume_id"]]["droplet_ids"] == [vm["droplet_id"]]
+
+    def test_droplets_are_created_in_batches_of_ten(self, do_api):
+        create_node_vms("DEV-01", ["lon1", "nyc1"], vm_count=12, volume_size_gb=20)
+        # 12 VMs per region is one batch of 10 and one of 2, in each region
+        assert do_api.count("POST", "/v2/droplets") == 4
+        assert do_api.count("POST", "/v2/volumes") == 24 + 24  # creates + attach actions
+
+    def test_resources_are_tagged(self, do_api):
+        create_node_vms("DEV-01", ["lon1"], vm_count=2, volume_size_gb=20)
+        for resource in [*do_api.droplets.values(), *do_api.volumes.values()]:
+            assert resource["tags"] == ["saorsa-deploy:dev-01", "saorsa-region:dev-01:lon1"]
+
+    def test_rerun_reuses_existing_resources(self, do_api):
+        first = create_node_vms("DEV-01", ["lon1"], vm_count=3, volume_size_gb=20)
+        do_api.requests.clear()
+        second = create_node_vms("DEV-01", ["lon1"], vm_count=3, volume_size_gb=20)
+
+        assert first == second
+        assert do_api.count("POST", "/v2/") == 0
+
+    def test_droplets_not_active_in_time_raise(self, do_api):
+        do_api.polls_until_active = 10_000
+        with pytest.raises(TimeoutError, match="did not become active"):
+            create_node_vms("DEV-01", ["lon1"], vm_count=2, volume_size_gb=20, timeout=0)
+
+    def test_requires_do_token(self, do_api, monkeypatch):
+        monkeypatch.delenv("DO_TOKEN")
+        with pytest.raises(RuntimeError, match="DO_TOKEN"):
+            create_node_vms("DEV-01", ["lon1"], vm_count=1, volume_size_gb=20)
+
+
+class TestDestroyNodeVms:
+    def test_deletes_droplets_by_tag_and_volumes_once_detached(self, do_api):
+        create_node_vms("DEV-01", ["lon1", "nyc1"], vm_count=3, volume_size_gb=20)
+        do_api.requests.clear()
+
+        result = destroy_node_vms("DEV-01")
+
+        assert result == {"droplets": 6, "volumes": 6}
+        assert do_api.droplets == {}
+        assert do_api.volumes == {}
+        assert do_api.count("DELETE", "/v2/droplets") == 1
+
+    def test_detaches_volumes_before_deleting_them(self, do_api):
+        create_node_vms("DEV-01", ["lon1"], vm_count=3, volume_size_gb=20)
+        do_api.requests.clear()
+
+        destroy_node_vms("DEV-01")
+
+        # One detach action per volume, so no volume delete is refused
+        assert do_api.count("POST", "/v2/volumes/") == 3
+        assert do_api.count("DELETE", "/v2/volumes/") == 3
+
+    def test_too_few_tagged_droplets_deletes_nothing(self, do_api):
+        create_node_vms("DEV-01", ["lon1"], vm_count=2, volume_size_gb=20)
+
+        with pytest.raises(RuntimeError, match="may predate tagging"):
+            destroy_node_vms("DEV-01", expected_droplets=5)
+
+        assert len(do_api.droplets) == 2
+        assert len(do_api.volumes) == 2
+
+    def test_too_many_tagged_droplets_deletes_nothing(self, do_api):
+        create_node_vms("DEV-01", ["lon1"], vm_count=3, volume_size_gb=20)
+
+        with pytest.raises(RuntimeError, match="nothing was deleted"):
+            destroy_node_vms("DEV-01", expected_droplets=2)
+
+        assert len(do_api.droplets) == 3
+        assert len(do_api.volumes) == 3
+
+    def test_deployment_named_like_a_region_tag_is_separate(self, do_api):
+        create_node_vms("dev", ["lon1"], vm_count=2, volume_size_gb=20)
+        create_node_vms("dev-lon1", ["lon1"], vm_count=2, volume_size_gb=20)
+
+        assert destroy_node_vms("dev-lon1", expected_droplets=2) == {"droplets": 2, "volumes": 2}
+
+        assert sorted(d["name"] for d in do_api.droplets.values()) == [
+            "dev-saorsa-node-lon1-1",
+            "dev-saorsa-node-lon1-2",
+        ]
+        assert len(do_api.volumes) == 2
+
+    def test_tagged_droplets_with_other_names_are_kept(self, do_api):
+        create_node_vms("DEV-01", ["lon1"], vm_count=2, volume_size_gb=20)
+        other = next(iter(do_api.droplets.values()))
+        other["name"] = "scratch"
+        do_api.requests.clear()
+
+        assert destroy_node_vms("DEV-01")["droplets"] == 1
+
+        assert [d["name"] for d in do_api.droplets.values()] == ["scratch"]
+        assert do_api.count("DELETE", "/v2/droplets/") == 1
+
+    def test_leaves_other_deployments_alone(self, do_api):
+        create_node_vms("DEV-01", ["lon1"], vm_count=2, volume_size_gb=20)
+        create_node_vms("DEV-02", ["lon1"], vm_count=2, volume_size_gb=20)
+
+        destroy_node_vms("DEV-01")
+
+        assert len(do_api.droplets) == 2
+        assert all(d["name"].startswith("DEV-02") for d in do_api.droplets.values())
+        assert len(do_api.volumes) == 2
+
+    def test_nothing_to_destroy(self, do_api):
+        assert destroy_node_vms("DEV-01") == {"droplets": 0, "volumes": 0}
+        assert do_api.count("DELETE", "/v2/") == 0
@@ -0,0 +1,129 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+from saorsa_deploy import do_client
+from saorsa_deploy.do_client import MAX_RETRIES, DoClient, get_client
+
+
+@pytest.fixture
+def do_api(make_do_api):
+    return make_do_api(ratelimit_limit=250)
+
+
+class TestRetries:
+    def test_rate_limited_requests_wait_for_the_reset(self, do_api, mock_sleep):
+        do_api.fail_next(429, headers={"ratelimit-remaining": "0"})
+
+        body = get_client().get_json("/droplets")
+
+        assert body["droplets"] == []
+        assert do_api.count("GET", "/v2/droplets") == 2
+        # ratelimit-reset is a minute away in the fake
+        assert 55 <= mock_sleep.call_args.args[0] <= do_client.MAX_RETRY_DELAY
+
+    def test_retry_after_takes_precedence(self, do_api, mock_sleep):
+        do_api.fail_next(429, headers={"retry-after": "3"})
+
+        get_client().get_json("/droplets")
+
+        mock_sleep.assert_called_once_with(3)
+
+    def test_rate_limited_posts_are_retried(self, do_api, mock_sleep):
+        do_api.fail_next(429, headers={"retry-after": "0"})
+
+        get_client().post_json("/droplets", {"name": "a", "region": "lon1"})
+
+        assert len(do_api.droplets) == 1
+
+    def test_server_errors_are_retried_for_gets(self, do_api, mock_sleep):
+        do_api.fail_next(503, count=2)
+
+        get_client().get_json("/droplets")
+
+        assert do_api.count("GET", "/v2/droplets") == 3
+        assert mock_sleep.call_count == 2
+
+    def test_server_errors_are_not_retried_for_posts(self, do_api, mock_sleep):
+        do_api.fail_next(500)
+
+        with pytest.raises(requests.HTTPError):
+            get_client().post_json("/droplets", {"name": "a", "region": "lon1"})
+
+        assert do_api.count("POST", "/v2/droplets") == 1
+        assert do_api.droplets == {}
+        mock_sleep.assert_not_called()
+
+    def test_gives_up_after_max_retries(self, do_api, mock_sleep):
+        do_api.fail_next(502, count=MAX_RETRIES + 1)
+
+        resp = get_client().get("/droplets")
+
+        assert resp.status_code == 502
+        assert do_api.count("GET", "/v2/droplets") == MAX_RETRIES + 1
+
+    def test_client_errors_are_returned_unretried(self, do_api, mock_sleep):
+        resp = get_client().get("/droplets/1")
+
+        assert resp.status_code == 404
+        mock_sleep.assert_not_called()
+
+    def test_connection_errors_are_retried_for_gets(self, mock_sleep):
+        client = DoClient("test-token", "http://127.0.0.1:9/v2")
+
+        with pytest.raises(requests.ConnectionError):
+            client.get("/droplets")
+
+        assert mock_sleep.call_count == MAX_RETRIES
+        assert client.stats.calls["GET"] == MAX_RETRIES + 1
+
+
+class TestStats:
+    def test_counts_calls_and_rate_limit_headroom(self, do_api, mock_sleep):
+        do_api.fail_next(429, headers={"retry-after": "0"})
+        client = get_client()
+
+        client.get_json("/droplets")
+        client.post_json("/volumes", {"name": "v", "region": "lon1", "size_gigabytes": 1})
+
+        assert client.stats.calls == {"GET": 2, "POST": 1}
+        assert client.stats.retries == 1
+        assert client.stats.rate_limited == 1
+        assert client.stats.ratelimit_limit == 250
+        assert client.stats.ratelimit_remaining == 247
+        assert client.stats.summary() == (
+            "3 call(s) (GET 2, POST 1), 1 retried, 1 rate-limited, rate-limit headroom 247/250"
+        )
+
+    def test_api_stats_is_none_before_first_use(self, do_api):
+        assert do_client.api_stats() is None
+        get_client().get_json("/droplets")
+        assert do_client.api_stats().total_calls == 1
+
+
+class TestGetClient:
+    def test_client_is_shared(self, do_api):
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            clients = list(pool.map(lambda _: get_client(), range(32)))
+        assert len({id(c) for c in clients}) == 1
+
+    def test_client_sends_token(self, do_api):
+        assert get_client().session.headers["Authorization"] == "Bearer test-token"
+
+    def test_raises_without_do_token(self, monkeypatch):
+        monkeypatch.delenv("DO_TOKEN", raising=False)
+        with pytest.raises(RuntimeError, match="DO_TOKEN"):
+            get_client()
+
+
+class TestListAll:
+    def test_follows_pagination(self, do_api):
+        client = get_client()
+        for i in range(5):
+            client.post_json("/volumes", {"name": f"v{i}", "region": "lon1", "size_gigabytes": 1})
+
+        volumes = client.list_all("/volumes", "volumes", page_size=2)
+
+        assert [v["name"] for v in volumes] == ["v0", "v1", "v2", "v3", "v4"]
+        assert do_api.count("GET", "/v2/volumes") == 3
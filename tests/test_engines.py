@@ -0,0 +1,232 @@
+import io
+import json
+import stat
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from saorsa_deploy.engines import (
+    ENGINE_DO_API,
+    ENGINE_MULTI_REGION,
+    ENGINE_PER_REGION,
+    MULTI_REGION_LABEL,
+    build_run_configs,
+    collect_hosts,
+    collect_vm_ips,
+    migrate_legacy_state,
+)
+from saorsa_deploy.terraform import TerraformResult, run_terraform
+
+FAKE_TERRAFORM = Path(__file__).resolve().parent.parent / "scripts" / "fake_terraform.py"
+
+REGION_PAIRS = [("digitalocean", "lon1"), ("digitalocean", "nyc1")]
+VARIABLES = {"name": "DEV-01", "vm_count": "2", "attached_volume_size": "20"}
+
+
+@pytest.fixture
+def fake_terraform(tmp_path, monkeypatch):
+    """Put the fake terraform binary first on PATH with instant simulated work.
+
+    The fake keeps its state objects under a local backend directory, which the
+    mocked S3 client serves so outputs are read the same way as in production.
+    """
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    wrapper = bin_dir / "terraform"
+    wrapper.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{FAKE_TERRAFORM}" "$@"\n')
+    wrapper.chmod(wrapper.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{bin_dir}:{Path(sys.executable).parent}:/usr/bin:/bin")
+    monkeypatch.setenv("FAKE_TF_TIME_SCALE", "0")
+    monkeypatch.setenv("TF_PLUGIN_CACHE_DIR", str(tmp_path / "plugin-cache"))
+
+    backend = tmp_path / "backend"
+    monkeypatch.setenv("FAKE_TF_BACKEND_DIR", str(backend))
+    client = MagicMock()
+    client.get_object.side_effect = lambda Bucket, Key: {
+        "Body": io.BytesIO((backend / Key).read_bytes())
+    }
+    monkeypatch.setattr("saorsa_deploy.state._get_s3_client", lambda: client)
+    return tmp_path
+
+
+class TestBuildRunConfigs:
+    def test_per_region_builds_one_config_per_region(self, tmp_path):
+        configs = build_run_configs(
+            "DEV-01", REGION_PAIRS, VARIABLES, ENGINE_PER_REGION, workspace_base=tmp_path
+        )
+        assert [c.region for c in configs] == ["lon1", "nyc1"]
+        assert configs[0].tf_source_dir.name == "digitalocean"
+        assert configs[0].workspace_dir == tmp_path / "digitalocean-DEV-01-lon1"
+        assert configs[0].state_key == "saorsa-deploy/do-DEV-01-lon1.tfstate"
+        assert configs[0].variables == {**VARIABLES, "region": "lon1"}
+
+    def test_multi_region_builds_one_config_per_provider(self, tmp_path):
+        configs = build_run_configs(
+            "DEV-01", REGION_PAIRS, VARIABLES, ENGINE_MULTI_REGION, workspace_base=tmp_path
+        )
+        assert len(configs) == 1
+        config = configs[0]
+        assert config.region == MULTI_REGION_LABEL
+        assert config.tf_source_dir.name == "digitalocean-multi"
+        assert config.state_key == "saorsa-deploy/do-multi-region-DEV-01.tfstate"
+        assert json.loads(config.variables["regions"]) == ["lon1", "nyc1"]
+        assert "region" not in config.variables
+
+    def test_multi_region_manifests_are_bundled(self):
+        configs = build_run_configs("DEV-01", REGION_PAIRS, VARIABLES, ENGINE_MULTI_REGION)
+        assert (configs[0].tf_source_dir / "main.tf").exists()
+        assert (configs[0].tf_source_dir / "versions.tf").exists()
+
+    def test_per_region_parallelism_shares_api_budget(self):
+        region_pairs = [("digitalocean", r) for r in ("lon1", "nyc1", "ams3", "sfo3", "sgp1")]
+        variables = {**VARIABLES, "vm_count": "20"}
+        configs = build_run_configs("DEV-01", region_pairs, variables, ENGINE_PER_REGION)
+        # 5 concurrent runs share the Digital Ocean budget of 50
+        assert [c.parallelism for c in configs] == [10] * 5
+
+    def test_multi_region_parallelism_sized_from_all_regions(self):
+        configs = build_run_configs("DEV-01", REGION_PAIRS, VARIABLES, ENGINE_MULTI_REGION)
+        # droplet, volume and attachment for 2 VMs in 2 regions
+        assert configs[0].parallelism == 12
+
+    def test_parallelism_override(self):
+        configs = build_run_configs(
+            "DEV-01", REGION_PAIRS, VARIABLES, ENGINE_PER_REGION, parallelism=4
+        )
+        assert [c.parallelism for c in configs] == [4, 4]
+
+    @pytest.mark.parametrize("parallelism", [0, -3])
+    def test_parallelism_below_one_is_rejected(self, parallelism):
+        with pytest.raises(ValueError, match="at least 1"):
+            build_run_configs(
+                "DEV-01", REGION_PAIRS, VARIABLES, ENGINE_PER_REGION, parallelism=parallelism
+            )
+
+    def test_do_api_engine_has_no_terraform_runs(self):
+        with pytest.raises(ValueError, match="does not use Terraform"):
+            build_run_configs("DEV-01", REGION_PAIRS, VARIABLES, ENGINE_DO_API)
+
+    def test_unknown_engine_raises(self):
+        with pytest.raises(ValueError, match="Unknown engine"):
+            build_run_configs("DEV-01", REGION_PAIRS, VARIABLES, "bogus")
+
+
+class TestMigrateLegacyState:
+    @patch("saorsa_deploy.engines.move_terraform_state")
+    def test_moves_per_region_state_and_removes_legacy_workspace(self, mock_move, tmp_path):
+        configs = build_run_configs(
+            "DEV-01", REGION_PAIRS, VARIABLES, ENGINE_PER_REGION, workspace_base=tmp_path
+        )
+        (tmp_path / "digitalocean-lon1").mkdir()
+        mock_move.side_effect = lambda old, new: old.endswith("lon1.tfstate")
+
+        migrated = migrate_legacy_state(configs)
+
+        assert migrated == ["digitalocean/lon1"]
+        mock_move.assert_any_call(
+            "saorsa-deploy/do-lon1.tfstate", "saorsa-deploy/do-DEV-01-lon1.tfstate"
+        )
+        assert not (tmp_path / "digitalocean-lon1").exists()
+
+    @patch("saorsa_deploy.engines.move_terraform_state")
+    def test_multi_region_runs_are_skipped(self, mock_move):
+        configs = build_run_configs("DEV-01", REGION_PAIRS, VARIABLES, ENGINE_MULTI_REGION)
+        assert migrate_legacy_state(configs) == []
+        mock_move.assert_not_called()
+
+
+class TestCollectVmIps:
+    def test_per_region_results(self):
+        results = [
+            TerraformResult(True, "digitalocean", "lon1", outputs={"droplet_ips": ["10.0.0.1"]}),
+            TerraformResult(True, "digitalocean", "nyc1", outputs={"droplet_ips": ["10.0.0.2"]}),
+        ]
+        assert collect_vm_ips(results) == {
+            "digitalocean/lon1": ["10.0.0.1"],
+            "digitalocean/nyc1": ["10.0.0.2"],
+        }
+
+    def test_multi_region_result(self):
+        outputs = {"droplet_ips": {"lon1": ["10.0.0.1"], "nyc1": ["10.0.0.2"]}}
+        results = [TerraformResult(True, "digitalocean", MULTI_REGION_LABEL, outputs=outputs)]
+        assert collect_vm_ips(results) == {
+            "digitalocean/lon1": ["10.0.0.1"],
+            "digitalocean/nyc1": ["10.0.0.2"],
+        }
+
+    def test_skips_failed_results(self):
+        results = [
+            TerraformResult(False, "digitalocean", "lon1", outputs={"droplet_ips": ["10.0.0.1"]})
+        ]
+        assert collect_vm_ips(results) == {}
+
+
+class TestCollectHosts:
+    def test_per_region_results_carry_resource_ids(self):
+        outputs = {"droplet_ips": ["10.0.0.1"], "droplet_ids": ["11"], "volume_ids": ["vol-1"]}
+        results = [TerraformResult(True, "digitalocean", "lon1", outputs=outputs)]
+
+        [host] = collect_hosts(results)
+
+        assert (host.ip, host.region, host.droplet_id, host.volume_id) == (
+            "10.0.0.1",
+            "digitalocean/lon1",
+            "11",
+            "vol-1",
+        )
+
+    def test_multi_region_result(self):
+        outputs = {
+            "droplet_ips": {"lon1": ["10.0.0.1"], "nyc1": ["10.0.0.2"]},
+            "droplet_ids": {"lon1": ["11"], "nyc1": ["12"]},
+            "volume_ids": {"lon1": ["vol-1"], "nyc1": ["vol-2"]},
+        }
+        results = [TerraformResult(True, "digitalocean", MULTI_REGION_LABEL, outputs=outputs)]
+
+        hosts = collect_hosts(results)
+
+        assert [(h.region, h.droplet_id) for h in hosts] == [
+            ("digitalocean/lon1", "11"),
+            ("digitalocean/nyc1", "12"),
+        ]
+
+    def test_missing_id_outputs_leave_ids_unset(self):
+        results = [TerraformResult(True, "digitalocean", "lon1", outputs={"droplet_ips": ["1"]})]
+        [host] = collect_hosts(results)
+        assert host.droplet_id is None
+        assert host.volume_id is None
+
+
+class TestEnginesAgainstFakeTerraform:
+    def _apply(self, engine, workspace_base):
+        configs = build_run_configs(
+            "DEV-01", REGION_PAIRS, VARIABLES, engine, workspace_base=workspace_base
+        )
+        results = [run_terraform(config) for config in configs]
+        assert all(r.success for r in results), [r.stderr for r in results]
+        return results
+
+    def test_engines_produce_the_same_hosts(self, fake_terraform):
+        per_region = self._apply(ENGINE_PER_REGION, fake_terraform / "per-region")
+        multi_region = self._apply(ENGINE_MULTI_REGION, fake_terraform / "multi-region")
+
+        assert len(per_region) == 2
+        assert len(multi_region) == 1
+        assert collect_vm_ips(per_region) == collect_vm_ips(multi_region)
+        assert all(h.droplet_id and h.volume_id for h in collect_hosts(multi_region))
+        assert sum(len(ips) for ips in collect_vm_ips(multi_region).values()) == 4
+
+    def test_multi_region_reports_every_resource(self, fake_terraform):
+        results = self._apply(ENGINE_MULTI_REGION, fake_terraform / "multi-region")
+        # droplet, volume and attachment per VM, 2 VMs in each of 2 regions
+        assert len(results[0].resource_timings) == 12
+
+    def test_reapplying_unchanged_deployment_skips_apply(self, fake_terraform):
+        first = self._apply(ENGINE_PER_REGION, fake_terraform / "per-region")
+        second = self._apply(ENGINE_PER_REGION, fake_terraform / "per-region")
+
+        assert not any(r.unchanged for r in first)
+        assert all(r.unchanged for r in second)
+        assert collect_vm_ips(first) == collect_vm_ips(second)
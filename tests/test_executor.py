@@ -0,0 +1,145 @@
+from pathlib import Path
+from unittest.mock import patch
+
+from saorsa_deploy.executor import (
+    MAX_CONCURRENT,
+    ExecutorTask,
+    _StatusBoard,
+    execute_terraform_runs,
+    run_task,
+)
+from saorsa_deploy.terraform import TerraformResult, TerraformRunConfig
+
+
+def _config(region):
+    return TerraformRunConfig(
+        provider="digitalocean",
+        region=region,
+        tf_source_dir=Path("/nonexistent"),
+        workspace_dir=Path("/nonexistent"),
+        state_key=f"saorsa-deploy/do-{region}.tfstate",
+    )
+
+
+class TestStatusBoard:
+    def test_rows_start_pending(self):
+        board = _StatusBoard(["digitalocean/lon1", "digitalocean/nyc1"], "applying...")
+        table = board.render()
+        assert table.row_count == 2
+        assert "pending" in table.columns[2]._cells[0]
+
+    def test_marks_running_and_finished(self):
+        board = _StatusBoard(["digitalocean/lon1", "digitalocean/nyc1"], "applying...")
+        board.mark_running("digitalocean/lon1")
+        board.mark_running("digitalocean/nyc1")
+        board.mark_finished("digitalocean/lon1", TerraformResult(True, "digitalocean", "lon1"))
+        board.mark_finished("digitalocean/nyc1", TerraformResult(False, "digitalocean", "nyc1"))
+        cells = board.render().columns[2]._cells
+        assert "done" in cells[0]
+        assert "FAILED" in cells[1]
+
+    def test_marks_unchanged(self):
+        board = _StatusBoard(["digitalocean/lon1"], "applying...")
+        board.mark_running("digitalocean/lon1")
+        board.mark_finished(
+            "digitalocean/lon1", TerraformResult(True, "digitalocean", "lon1", unchanged=True)
+        )
+        assert "unchanged" in board.render().columns[2]._cells[0]
+
+    def test_running_tasks_show_their_own_label(self):
+        board = _StatusBoard(["digitalocean/bootstrap", "digitalocean/lon1"], "applying...")
+        board.mark_running("digitalocean/bootstrap", "creating...")
+        board.mark_running("digitalocean/lon1")
+        cells = board.render().columns[2]._cells
+        assert "creating..." in cells[0]
+        assert "applying..." in cells[1]
+
+
+class TestRunTask:
+    def test_records_result(self):
+        task = ExecutorTask("digitalocean/bootstrap", lambda: {"ip_address": "1.2.3.4"})
+        board = _StatusBoard([task.key], "applying...")
+
+        run_task(task, board)
+
+        assert task.result == {"ip_address": "1.2.3.4"}
+        assert task.error is None
+        assert "done" in board.render().columns[2]._cells[0]
+
+    def test_records_error(self):
+        def fail():
+            raise RuntimeError("no capacity")
+
+        task = ExecutorTask("digitalocean/bootstrap", fail)
+        board = _StatusBoard([task.key], "applying...")
+
+        run_task(task, board)
+
+        assert str(task.error) == "no capacity"
+        assert "FAILED" in board.render().columns[2]._cells[0]
+
+
+class TestExecuteTerraformRuns:
+    @patch("saorsa_deploy.executor.run_terraform")
+    def test_returns_result_for_every_config(self, mock_run):
+        mock_run.side_effect = lambda c, **_: TerraformResult(
+            success=True, provider=c.provider, region=c.region
+        )
+        configs = [_config(r) for r in ("lon1", "nyc1", "ams3", "sfo3", "sgp1", "blr1")]
+
+        results = execute_terraform_runs(configs)
+
+        assert sorted(r.region for r in results) == sorted(c.region for c in configs)
+        assert all(r.success for r in results)
+
+    @patch("saorsa_deploy.executor.run_terraform_destroy")
+    def test_destroy_action_uses_destroy_fn(self, mock_destroy):
+        mock_destroy.side_effect = lambda c, **_: TerraformResult(
+            success=True, provider=c.provider, region=c.region
+        )
+        execute_terraform_runs([_config("lon1")], action="destroy")
+        mock_destroy.assert_called_once()
+
+    @patch("saorsa_deploy.executor.run_terraform")
+    def test_exception_becomes_failed_result(self, mock_run):
+        mock_run.side_effect = RuntimeError("terraform not found")
+
+        results = execute_terraform_runs([_config("lon1")])
+
+        assert len(results) == 1
+        assert results[0].success is False
+        assert "terraform not found" in results[0].stderr
+
+    @patch("saorsa_deploy.executor.run_terraform")
+    def test_tasks_run_alongside_and_are_not_in_results(self, mock_run):
+        mock_run.side_effect = lambda c, **_: TerraformResult(
+            success=True, provider=c.provider, region=c.region
+        )
+        task = ExecutorTask("digitalocean/bootstrap", lambda: "vm")
+
+        results = execute_terraform_runs([_config("lon1")], tasks=[task])
+
+        assert [r.region for r in results] == ["lon1"]
+        assert task.result == "vm"
+
+    @patch("saorsa_deploy.executor.prewarm_workspace")
+    @patch("saorsa_deploy.executor.run_terraform")
+    def test_prewarms_init_for_runs_waiting_for_a_slot(self, mock_run, mock_prewarm):
+        mock_run.side_effect = lambda c, **_: TerraformResult(
+            success=True, provider=c.provider, region=c.region
+        )
+        configs = [_config(f"r{i}") for i in range(MAX_CONCURRENT + 2)]
+
+        execute_terraform_runs(configs, prewarm_init=True)
+
+        prewarmed = sorted(call.args[0].region for call in mock_prewarm.call_args_list)
+        assert prewarmed == [f"r{MAX_CONCURRENT}", f"r{MAX_CONCURRENT + 1}"]
+
+    @patch("saorsa_deploy.executor.prewarm_workspace")
+    @patch("saorsa_deploy.executor.run_terraform")
+    def test_no_prewarm_by_default(self, mock_run, mock_prewarm):
+        mock_run.side_effect = lambda c, **_: TerraformResult(
+            success=True, provider=c.provider, region=c.region
+        )
+        execute_terraform_runs([_config(f"r{i}") for i in range(MAX_CONCURRENT + 2)])
+        mock_prewarm.assert_not_called()
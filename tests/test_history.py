@@ -0,0 +1,41 @@
+import json
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from saorsa_deploy.cmd.history import cmd_history
+
+EVENTS = [
+    {"at": "2026-01-01T00:00:00+00:00", "command": "infra", "updates": {"regions": []}},
+    {
+        "at": "2026-01-01T00:10:00+00:00",
+        "command": "provision-genesis",
+        "updates": {"bootstrap_port": 5000},
+    },
+]
+
+
+class TestCmdHistory:
+    @patch("saorsa_deploy.cmd.history.load_deployment_events")
+    def test_json(self, mock_events, capsys):
+        mock_events.return_value = EVENTS
+
+        cmd_history(SimpleNamespace(name="DEV-01", json=True))
+
+        mock_events.assert_called_once_with("DEV-01")
+        assert json.loads(capsys.readouterr().out) == EVENTS
+
+    @patch("saorsa_deploy.cmd.history.load_deployment_events")
+    def test_table_shows_commands_and_fields(self, mock_events, capsys):
+        mock_events.return_value = EVENTS
+
+        cmd_history(SimpleNamespace(name="DEV-01", json=False))
+
+        out = capsys.readouterr().out
+        assert "provision-genesis" in out
+        assert "bootstrap_port" in out
+
+    @patch("saorsa_deploy.cmd.history.load_deployment_events")
+    def test_no_history(self, mock_events, capsys):
+        mock_events.return_value = []
+        cmd_history(SimpleNamespace(name="DEV-01", json=False))
+        assert "No recorded history" in capsys.readouterr().out
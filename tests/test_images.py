@@ -0,0 +1,128 @@
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from saorsa_deploy.binary_source import cached_download_path, fetch_command
+from saorsa_deploy.images import (
+    create_bake_vm,
+    load_image,
+    record_image,
+    resolve_image,
+    snapshot_droplet,
+    transfer_image,
+)
+from saorsa_deploy.provisioning.image import ImageBaker
+
+RELEASE_URL = "https://github.com/saorsa-labs/saorsa-node/releases/download/v1.0.0/cli.tar.gz"
+
+
+@pytest.fixture
+def mock_s3():
+    with patch("saorsa_deploy.images.s3_client") as mock_s3_client:
+        mock_client = MagicMock()
+        mock_client.exceptions.NoSuchKey = type("NoSuchKey", (Exception,), {})
+        mock_s3_client.return_value = mock_client
+        yield mock_client
+
+
+def _stored(mock_s3, image):
+    body = MagicMock()
+    body.read.return_value = json.dumps(image).encode()
+    mock_s3.get_object.return_value = {"Body": body}
+
+
+class TestImageRecords:
+    def test_record_is_written_per_profile(self, mock_s3):
+        record_image("node", {"snapshot_id": 7, "regions": ["lon1"]})
+
+        put = mock_s3.put_object.call_args.kwargs
+        assert put["Key"] == "saorsa-deploy/images/node.json"
+        assert json.loads(put["Body"]) == {"snapshot_id": 7, "regions": ["lon1"]}
+
+    def test_load_returns_none_when_not_baked(self, mock_s3):
+        mock_s3.get_object.side_effect = mock_s3.exceptions.NoSuchKey("missing")
+
+        assert load_image("build") is None
+
+    def test_resolve_returns_snapshot_id(self, mock_s3):
+        _stored(mock_s3, {"snapshot_id": 7, "snapshot_name": "s", "regions": ["lon1", "nyc1"]})
+
+        assert resolve_image("node", ["nyc1"]) == 7
+
+    def test_resolve_refuses_missing_regions(self, mock_s3):
+        _stored(mock_s3, {"snapshot_id": 7, "snapshot_name": "s", "regions": ["lon1"]})
+
+        with pytest.raises(RuntimeError, match="ams3, nyc1"):
+            resolve_image("node", ["lon1", "nyc1", "ams3"])
+
+    def test_resolve_refuses_unbaked_profile(self, mock_s3):
+        mock_s3.get_object.side_effect = mock_s3.exceptions.NoSuchKey("missing")
+
+        with pytest.raises(RuntimeError, match="bake-image --profile build"):
+            resolve_image("build", ["lon1"])
+
+
+class TestBaking:
+    def test_bake_vm_is_reused(self, do_api, mock_sleep):
+        first = create_bake_vm("node")
+        again = create_bake_vm("node")
+
+        assert first["reused"] is False
+        assert again == {**first, "reused": True}
+        assert do_api.droplets[first["droplet_id"]]["image"] == "ubuntu-24-04-x64"
+
+    def test_snapshot_powers_off_and_snapshots(self, do_api, mock_sleep):
+        vm = create_bake_vm("build")
+
+        snapshot_id = snapshot_droplet(vm["droplet_id"], "saorsa-build-1")
+
+        assert do_api.droplets[vm["droplet_id"]]["status"] == "off"
+        assert do_api.images[snapshot_id]["name"] == "saorsa-build-1"
+
+    def test_existing_snapshot_is_reused(self, do_api, mock_sleep):
+        vm = create_bake_vm("build")
+        snapshot_id = snapshot_droplet(vm["droplet_id"], "saorsa-build-1")
+        actions = do_api.count("POST", f"/v2/droplets/{vm['droplet_id']}/actions")
+
+        assert snapshot_droplet(vm["droplet_id"], "saorsa-build-1") == snapshot_id
+        assert do_api.count("POST", f"/v2/droplets/{vm['droplet_id']}/actions") == actions
+
+    def test_transfer_only_copies_to_missing_regions(self, do_api, mock_sleep):
+        vm = create_bake_vm("node")
+        snapshot_id = snapshot_droplet(vm["droplet_id"], "saorsa-node-1")
+
+        regions = transfer_image(snapshot_id, ["lon1", "nyc1", "ams3"])
+
+        assert regions == ["ams3", "lon1", "nyc1"]
+        assert do_api.count("POST", f"/v2/images/{snapshot_id}/actions") == 2
+
+
+class TestImageBaker:
+    def test_node_profile_caches_the_release(self):
+        steps = dict(ImageBaker("1.2.3.4", "node", release_url=RELEASE_URL).steps())
+
+        command = steps["Cache saorsa-node release"]
+        assert command.startswith(f"test -f {cached_download_path(RELEASE_URL)} ||")
+        assert "cargo" not in " ".join(steps.values())
+
+    def test_build_profile_installs_toolchain(self):
+        names = [name for name, _ in ImageBaker("1.2.3.4", "build").steps()]
+
+        assert names == [
+            "Wait for cloud-init to finish",
+            "Install build dependencies",
+            "Install AWS CLI v2",
+            "Install Rust toolchain",
+            "Install sccache",
+            "Prepare for snapshot",
+        ]
+
+    def test_unknown_profile_is_rejected(self):
+        with pytest.raises(ValueError):
+            ImageBaker("1.2.3.4", "gpu").steps()
+
+    def test_fetch_prefers_the_baked_cache(self):
+        command = fetch_command(RELEASE_URL, "/tmp/saorsa.tar.gz")
+
+        assert command.index(cached_download_path(RELEASE_URL)) < command.index("wget")
@@ -0,0 +1,132 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from saorsa_deploy.cmd.infra import BOOTSTRAP_ROW, cmd_infra
+from saorsa_deploy.executor import run_task
+from saorsa_deploy.terraform import TerraformResult
+
+BOOTSTRAP = {
+    "droplet_id": 1,
+    "droplet_name": "DEV-01-saorsa-bootstrap",
+    "ip_address": "10.0.0.100",
+    "volume_id": "vol-1",
+    "created": True,
+}
+
+
+def _args(**kwargs):
+    return SimpleNamespace(
+        name="DEV-01",
+        testnet=True,
+        region_counts=None,
+        vm_count=2,
+        attached_volume_size=20,
+        node_count=5,
+        parallelism=None,
+        **kwargs,
+    )
+
+
+def _execute(configs, tasks=(), prewarm_init=False):
+    for task in tasks:
+        run_task(task)
+    return [
+        TerraformResult(
+            success=True,
+            provider=c.provider,
+            region=c.region,
+            outputs={"droplet_ips": {"value": ["10.0.0.1"]}},
+        )
+        for c in configs
+    ]
+
+
+@patch("saorsa_deploy.cmd.infra.save_deployment_state")
+@patch("saorsa_deploy.cmd.infra.load_deployment_state", side_effect=RuntimeError("none"))
+@patch("saorsa_deploy.cmd.infra.create_bootstrap_vm")
+@patch("saorsa_deploy.cmd.infra.execute_terraform_runs")
+class TestCmdInfra:
+    def test_bootstrap_vm_is_a_task_alongside_the_terraform_runs(
+        self, mock_execute, mock_bootstrap, _mock_load, mock_save
+    ):
+        mock_execute.side_effect = _execute
+        mock_bootstrap.return_value = BOOTSTRAP
+
+        cmd_infra(_args())
+
+        kwargs = mock_execute.call_args.kwargs
+        assert [task.key for task in kwargs["tasks"]] == [BOOTSTRAP_ROW]
+        assert kwargs["prewarm_init"] is True
+        mock_bootstrap.assert_called_once_with("DEV-01", image="ubuntu-24-04-x64")
+        mock_save.assert_called_once()
+        assert mock_save.call_args.args[3] == "10.0.0.100"
+
+    def test_bootstrap_failure_saves_node_state_then_exits(
+        self, mock_execute, mock_bootstrap, _mock_load, mock_save, capsys
+    ):
+        mock_execute.side_effect = _execute
+        mock_bootstrap.side_effect = RuntimeError("no capacity")
+
+        with pytest.raises(SystemExit) as exc_info:
+            cmd_infra(_args())
+
+        assert exc_info.value.code == 1
+        assert "no capacity" in capsys.readouterr().out
+        mock_save.assert_called_once()
+        assert mock_save.call_args.args[3] is None
+        assert [h.ip for h in mock_save.call_args.kwargs["hosts"]] == ["10.0.0.1"]
+        assert mock_save.call_args.kwargs["state_keys"] == ["saorsa-deploy/do-DEV-01-lon1.tfstate"]
+
+    def test_terraform_failure_exits_without_saving_state(
+        self, mock_execute, mock_bootstrap, _mock_load, mock_save
+    ):
+        mock_execute.return_value = [TerraformResult(False, "digitalocean", "lon1")]
+
+        with pytest.raises(SystemExit):
+            cmd_infra(_args())
+
+        mock_save.assert_not_called()
+
+    @patch("saorsa_deploy.cmd.infra.create_node_vms")
+    def test_do_api_engine_creates_bootstrap_vm_concurrently(
+        self, mock_create_vms, mock_execute, mock_bootstrap, _mock_load, mock_save
+    ):
+        mock_bootstrap.return_value = BOOTSTRAP
+        mock_create_vms.return_value = {
+            "digitalocean/lon1": [
+                {"droplet_id": 2, "ip_address": "10.0.0.1", "volume_id": "vol-2"},
+            ]
+        }
+
+        cmd_infra(_args(engine="do-api"))
+
+        mock_execute.assert_not_called()
+        mock_bootstrap.assert_called_once_with("DEV-01", image="ubuntu-24-04-x64")
+        assert mock_save.call_args.args[3] == "10.0.0.100"
+        assert [h.ip for h in mock_save.call_args.kwargs["hosts"]] == ["10.0.0.1"]
+
+    @patch("saorsa_deploy.cmd.infra.resolve_image", return_value=4242)
+    def test_baked_image_is_used_for_node_and_bootstrap_vms(
+        self, mock_resolve, mock_execute, mock_bootstrap, _mock_load, mock_save
+    ):
+        mock_execute.side_effect = _execute
+        mock_bootstrap.return_value = BOOTSTRAP
+
+        cmd_infra(_args(baked_image=True))
+
+        mock_resolve.assert_called_once_with("node", ["lon1"])
+        mock_bootstrap.assert_called_once_with("DEV-01", image=4242)
+        configs = mock_execute.call_args.args[0]
+        assert all(c.variables["image"] == "4242" for c in configs)
+
+    @patch("saorsa_deploy.cmd.infra.resolve_image", side_effect=RuntimeError("not baked"))
+    def test_missing_baked_image_exits_before_creating_anything(
+        self, _mock_resolve, mock_execute, mock_bootstrap, _mock_load, mock_save
+    ):
+        with pytest.raises(SystemExit):
+            cmd_infra(_args(baked_image=True))
+
+        mock_execute.assert_not_called()
+        mock_bootstrap.assert_not_called()
@@ -0,0 +1,46 @@
+import json
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from saorsa_deploy.cmd.list import cmd_list
+
+DEPLOYMENTS = {
+    "DEV-02": {
+        "regions": 2,
+        "vms": 40,
+        "created_at": "2026-01-02T00:00:00+00:00",
+        "binary_source": "v1.2.3",
+    },
+    "DEV-01": {
+        "regions": 1,
+        "vms": 3,
+        "created_at": "2026-01-01T00:00:00+00:00",
+        "binary_source": None,
+    },
+}
+
+
+class TestCmdList:
+    @patch("saorsa_deploy.cmd.list.list_deployments")
+    def test_json(self, mock_list, capsys):
+        mock_list.return_value = DEPLOYMENTS
+
+        cmd_list(SimpleNamespace(json=True))
+
+        assert json.loads(capsys.readouterr().out) == DEPLOYMENTS
+
+    @patch("saorsa_deploy.cmd.list.list_deployments")
+    def test_table_lists_deployments_by_name(self, mock_list, capsys):
+        mock_list.return_value = DEPLOYMENTS
+
+        cmd_list(SimpleNamespace(json=False))
+
+        out = capsys.readouterr().out
+        assert out.index("DEV-01") < out.index("DEV-02")
+        assert "v1.2.3" in out
+
+    @patch("saorsa_deploy.cmd.list.list_deployments")
+    def test_no_deployments(self, mock_list, capsys):
+        mock_list.return_value = {}
+        cmd_list(SimpleNamespace(json=False))
+        assert "No deployments found" in capsys.readouterr().out
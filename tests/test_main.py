@@ -0,0 +1,15 @@
+import argparse
+
+import pytest
+
+from saorsa_deploy.main import positive_int
+
+
+class TestPositiveInt:
+    def test_accepts_positive_values(self):
+        assert positive_int("8") == 8
+
+    @pytest.mark.parametrize("value", ["0", "-2", "four"])
+    def test_rejects_other_values(self, value):
+        with pytest.raises(argparse.ArgumentTypeError):
+            positive_int(value)
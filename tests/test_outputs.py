@@ -0,0 +1,93 @@
+import json
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from saorsa_deploy.cmd.outputs import cmd_outputs
+
+STATE = {
+    "name": "DEV-01",
+    "regions": [["digitalocean", "lon1"], ["digitalocean", "nyc1"]],
+    "terraform_variables": {"name": "DEV-01", "vm_count": "1", "attached_volume_size": "20"},
+    "state_keys": [
+        "saorsa-deploy/do-DEV-01-lon1.tfstate",
+        "saorsa-deploy/do-DEV-01-nyc1.tfstate",
+    ],
+}
+
+
+def _outputs_for(state_key):
+    region = state_key.rsplit("-", 1)[1].removesuffix(".tfstate")
+    return {"droplet_ips": [f"10.0.0.{1 if region == 'lon1' else 2}"]}
+
+
+class TestCmdOutputs:
+    @patch("saorsa_deploy.cmd.outputs.load_terraform_outputs")
+    @patch("saorsa_deploy.cmd.outputs.load_deployment_state")
+    def test_reads_every_state_object(self, mock_load_state, mock_outputs, capsys):
+        mock_load_state.return_value = STATE
+        mock_outputs.side_effect = _outputs_for
+
+        cmd_outputs(SimpleNamespace(name="DEV-01", json=True))
+
+        keys = sorted(call.args[0] for call in mock_outputs.call_args_list)
+        assert keys == [
+            "saorsa-deploy/do-DEV-01-lon1.tfstate",
+            "saorsa-deploy/do-DEV-01-nyc1.tfstate",
+        ]
+        printed = json.loads(capsys.readouterr().out)
+        assert printed == {
+            "digitalocean/lon1": {"droplet_ips": ["10.0.0.1"]},
+            "digitalocean/nyc1": {"droplet_ips": ["10.0.0.2"]},
+        }
+
+    @patch("saorsa_deploy.cmd.outputs.load_terraform_outputs")
+    @patch("saorsa_deploy.cmd.outputs.load_deployment_state")
+    def test_uses_recorded_engine(self, mock_load_state, mock_outputs):
+        mock_load_state.return_value = {
+            **STATE,
+            "engine": "multi-region",
+            "state_keys": ["saorsa-deploy/do-multi-region-DEV-01.tfstate"],
+        }
+        mock_outputs.return_value = {}
+
+        cmd_outputs(SimpleNamespace(name="DEV-01", json=False))
+
+        mock_outputs.assert_called_once_with("saorsa-deploy/do-multi-region-DEV-01.tfstate")
+
+    @patch("saorsa_deploy.cmd.outputs.load_terraform_outputs")
+    @patch("saorsa_deploy.cmd.outputs.load_deployment_state")
+    def test_reads_recorded_state_keys(self, mock_load_state, mock_outputs, capsys):
+        mock_load_state.return_value = {
+            **STATE,
+            "state_keys": ["custom/lon1.tfstate", "custom/nyc1.tfstate"],
+        }
+        mock_outputs.return_value = {"droplet_ips": ["10.0.0.9"]}
+
+        cmd_outputs(SimpleNamespace(name="DEV-01", json=True))
+
+        keys = [call.args[0] for call in mock_outputs.call_args_list]
+        assert keys == ["custom/lon1.tfstate", "custom/nyc1.tfstate"]
+        assert sorted(json.loads(capsys.readouterr().out)) == [
+            "digitalocean/lon1",
+            "digitalocean/nyc1",
+        ]
+
+    @patch("saorsa_deploy.cmd.outputs.load_terraform_outputs")
+    @patch("saorsa_deploy.cmd.outputs.load_deployment_state")
+    def test_falls_back_to_legacy_state_keys(self, mock_load_state, mock_outputs):
+        legacy = {key: value for key, value in STATE.items() if key != "state_keys"}
+        mock_load_state.return_value = legacy
+        mock_outputs.return_value = {}
+
+        cmd_outputs(SimpleNamespace(name="DEV-01", json=False))
+
+        keys = [call.args[0] for call in mock_outputs.call_args_list]
+        assert keys == ["saorsa-deploy/do-lon1.tfstate", "saorsa-deploy/do-nyc1.tfstate"]
+
+    @patch("saorsa_deploy.cmd.outputs.load_deployment_state")
+    def test_missing_deployment_exits(self, mock_load_state):
+        mock_load_state.side_effect = RuntimeError("No deployment state found for 'X'.")
+        with pytest.raises(SystemExit):
+            cmd_outputs(SimpleNamespace(name="X", json=False))
@@ -354,6 +354,47 @@ class TestSaorsaNodeProvisioner:
         assert len(commands) == 1
         assert commands[0].startswith("test -f /usr/local/bin/saorsa-node")
 
+    @patch("saorsa_deploy.provisioning.node.disconnect_all")
+    @patch("saorsa_deploy.provisioning.node.run_ops")
+    @patch("saorsa_deploy.provisioning.node.add_op")
+    @patch("saorsa_deploy.provisioning.node.connect_all")
+    @patch("saorsa_deploy.provisioning.node.State")
+    @patch("saorsa_deploy.provisioning.node.Inventory")
+    @patch("saorsa_deploy.provisioning.node.get_release_url")
+    def test_execute_records_installed_binary_hash(
+        self,
+        mock_release_url,
+        _mock_inventory,
+        mock_state,
+        _mock_connect,
+        mock_add_op,
+        _mock_run_ops,
+        _mock_disconnect,
+    ):
+        mock_release_url.return_value = "https://github.com/download/v1.0.0/asset.tar.gz"
+        mock_state_instance = MagicMock()
+        mock_state_instance.failed_hosts = set()
+        mock_state.return_value = mock_state_instance
+        host = MagicMock()
+        host.name = "10.0.0.1"
+        install_meta = SimpleNamespace(stdout_lines=["SAORSA_BINARY:SKIP", "SAORSA_SHA256:abc123"])
+        svc_meta = SimpleNamespace(stdout_lines=[])
+        mock_add_op.side_effect = [{host: install_meta}, None, {host: svc_meta}]
+
+        provisioner = SaorsaNodeProvisioner(
+            host_ips=["10.0.0.1"],
+            bootstrap_ip="10.0.0.100",
+            bootstrap_port=5000,
+            console=MagicMock(),
+        )
+        provisioner.execute()
+
+        assert (
+            "sha256sum /usr/local/bin/saorsa-node"
+            in mock_add_op.call_args_list[0].kwargs["commands"][0]
+        )
+        assert provisioner.binary_hashes == {"10.0.0.1": "abc123"}
+
     @patch("saorsa_deploy.provisioning.node.disconnect_all")
     @patch("saorsa_deploy.provisioning.node.run_ops")
     @patch("saorsa_deploy.provisioning.node.add_op")
@@ -501,3 +542,44 @@ class TestCmdProvisionClearsKnownHosts:
         cmd_provision(args)
 
         assert call_order == ["clear_known_hosts", "execute"]
+
+
+class TestCmdProvisionSavesHosts:
+    @patch("saorsa_deploy.cmd.provision.update_deployment_state")
+    @patch("saorsa_deploy.cmd.provision.SaorsaNodeProvisioner")
+    @patch("saorsa_deploy.cmd.provision.clear_known_hosts")
+    @patch("saorsa_deploy.cmd.provision.load_deployment_state")
+    def test_records_ports_hash_and_time_per_host(
+        self,
+        mock_load_state,
+        _mock_clear_known_hosts,
+        mock_provisioner_cls,
+        mock_update_state,
+    ):
+        mock_load_state.return_value = {
+            "bootstrap_ip": "10.0.0.100",
+            "bootstrap_port": 5000,
+            "vm_ips": {"lon1": ["10.0.0.1", "10.0.0.2"], "nyc1": ["10.0.0.3"]},
+        }
+        mock_provisioner_cls.return_value.binary_hashes = {"10.0.0.1": "abc", "10.0.0.2": "abc"}
+
+        args = SimpleNamespace(
+            name="test-deploy",
+            ssh_key_path="~/.ssh/id_rsa",
+            node_count=2,
+            port=12000,
+            ip_version=None,
+            log_level=None,
+            testnet=False,
+            region="lon1",
+        )
+        cmd_provision(args)
+
+        updates = mock_update_state.call_args[0][1]
+        assert updates["node_counts"] == {"lon1": 2}
+        assert "node_count" not in updates
+        assert updates["binary_source"] == "latest release"
+        assert list(updates["hosts"]) == ["lon1"]
+        row = updates["hosts"]["lon1"]["10.0.0.1"]
+        assert row[:4] == [None, None, [12000, 12001], "abc"]
+        assert row[4] is not None
@@ -1,47 +1,111 @@
+import gzip
+import io
+import itertools
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 from unittest.mock import MagicMock, patch
 
 import pytest
+from botocore.exceptions import ClientError
 
+from saorsa_deploy.deployment import HOST_FIELDS, STATE_SCHEMA_VERSION, Host
 from saorsa_deploy.state import (
+    MAX_WRITE_ATTEMPTS,
     S3_BUCKET,
+    S3_INDEX_KEY,
     S3_KEY_PREFIX,
+    compact_deployment_state,
     delete_deployment_state,
+    delete_terraform_states,
+    list_deployments,
+    load_deployment_events,
     load_deployment_state,
+    load_terraform_outputs,
+    merge_state,
+    move_terraform_state,
     save_deployment_state,
     update_deployment_state,
 )
 
 
 @pytest.fixture
-def mock_s3():
-    with patch("saorsa_deploy.state.boto3") as mock_boto3:
+def mock_s3(tmp_path, monkeypatch):
+    # The state cache lives under the working directory
+    monkeypatch.chdir(tmp_path)
+    # The index has its own tests against FakeS3
+    with (
+        patch("saorsa_deploy.state.s3_client") as mock_s3_client,
+        patch("saorsa_deploy.state._update_index"),
+    ):
         mock_client = MagicMock()
-        mock_boto3.client.return_value = mock_client
+        mock_client.exceptions.NoSuchKey = type("NoSuchKey", (Exception,), {})
+        mock_client.put_object.return_value = {"ETag": '"put-etag"'}
+        mock_s3_client.return_value = mock_client
         yield mock_client
 
 
+def _s3_object(state, etag='"etag-1"'):
+    body = MagicMock()
+    body.read.return_value = gzip.compress(json.dumps(state).encode())
+    return {"Body": body, "ETag": etag}
+
+
+def _legacy_object(state):
+    body = MagicMock()
+    body.read.return_value = json.dumps(state, indent=2).encode()
+    return {"Body": body, "ETag": '"legacy-etag"'}
+
+
+def _snapshot_put(mock_s3):
+    """Keyword arguments of the last write of a state snapshot (not a journal event)."""
+    puts = [c.kwargs for c in mock_s3.put_object.call_args_list]
+    return [put for put in puts if put["Key"].endswith(".json.gz")][-1]
+
+
+def _put_body(mock_s3):
+    return json.loads(gzip.decompress(_snapshot_put(mock_s3)["Body"]))
+
+
+def _no_such_key(mock_s3):
+    return mock_s3.exceptions.NoSuchKey("not found")
+
+
+def _conflict():
+    return ClientError({"Error": {"Code": "PreconditionFailed", "Message": "ETag"}}, "PutObject")
+
+
+def _not_modified():
+    return ClientError({"Error": {"Code": "304", "Message": "Not Modified"}}, "GetObject")
+
+
 class TestSaveDeploymentState:
+    @pytest.fixture(autouse=True)
+    def no_existing_state(self, mock_s3):
+        mock_s3.get_object.side_effect = _no_such_key(mock_s3)
+
     def test_puts_json_to_s3(self, mock_s3):
         save_deployment_state(
             name="DEV-01",
             regions=[("digitalocean", "lon1"), ("digitalocean", "nyc1")],
             terraform_variables={"name": "DEV-01", "vm_count": "2"},
             bootstrap_ip="143.198.100.50",
-            vm_ips={"digitalocean/lon1": ["10.0.0.1"], "digitalocean/nyc1": ["10.0.0.2"]},
+            hosts=[Host("10.0.0.1", "digitalocean/lon1"), Host("10.0.0.2", "digitalocean/nyc1")],
         )
 
-        mock_s3.put_object.assert_called_once()
-        call_kwargs = mock_s3.put_object.call_args.kwargs
+        call_kwargs = _snapshot_put(mock_s3)
         assert call_kwargs["Bucket"] == S3_BUCKET
-        assert call_kwargs["Key"] == f"{S3_KEY_PREFIX}/DEV-01.json"
+        assert call_kwargs["Key"] == f"{S3_KEY_PREFIX}/DEV-01.json.gz"
         assert call_kwargs["ContentType"] == "application/json"
+        assert call_kwargs["ContentEncoding"] == "gzip"
 
-        body = json.loads(call_kwargs["Body"])
+        body = json.loads(gzip.decompress(call_kwargs["Body"]))
         assert body["name"] == "DEV-01"
         assert body["regions"] == [["digitalocean", "lon1"], ["digitalocean", "nyc1"]]
         assert body["terraform_variables"]["vm_count"] == "2"
         assert body["bootstrap_ip"] == "143.198.100.50"
+        assert body["schema_version"] == STATE_SCHEMA_VERSION
 
     def test_regions_stored_as_lists(self, mock_s3):
         save_deployment_state(
@@ -49,10 +113,10 @@ class TestSaveDeploymentState:
             regions=[("digitalocean", "ams3")],
             terraform_variables={},
             bootstrap_ip="10.0.0.1",
-            vm_ips={"digitalocean/ams3": ["10.0.0.2"]},
+            hosts=[Host("10.0.0.2", "digitalocean/ams3")],
         )
 
-        body = json.loads(mock_s3.put_object.call_args.kwargs["Body"])
+        body = _put_body(mock_s3)
         assert body["regions"] == [["digitalocean", "ams3"]]
 
     def test_stores_bootstrap_ip(self, mock_s3):
@@ -61,27 +125,56 @@ class TestSaveDeploymentState:
             regions=[("digitalocean", "lon1")],
             terraform_variables={"name": "DEV-01"},
             bootstrap_ip="143.198.100.50",
-            vm_ips={"digitalocean/lon1": ["10.0.0.1"]},
+            hosts=[Host("10.0.0.1", "digitalocean/lon1")],
         )
 
-        body = json.loads(mock_s3.put_object.call_args.kwargs["Body"])
+        body = _put_body(mock_s3)
         assert body["bootstrap_ip"] == "143.198.100.50"
 
-    def test_stores_vm_ips(self, mock_s3):
-        vm_ips = {
-            "digitalocean/lon1": ["10.0.0.1", "10.0.0.2"],
-            "digitalocean/ams3": ["10.0.0.3"],
-        }
+    def test_stores_one_row_per_host_by_region_and_ip(self, mock_s3):
         save_deployment_state(
             name="DEV-01",
             regions=[("digitalocean", "lon1"), ("digitalocean", "ams3")],
             terraform_variables={"name": "DEV-01"},
             bootstrap_ip="143.198.100.50",
-            vm_ips=vm_ips,
+            hosts=[
+                Host("10.0.0.1", "digitalocean/lon1", droplet_id=11, volume_id="vol-1"),
+                Host("10.0.0.2", "digitalocean/lon1", droplet_id=12, volume_id="vol-2"),
+                Host("10.0.0.3", "digitalocean/ams3", droplet_id=13, volume_id="vol-3"),
+            ],
+        )
+
+        body = _put_body(mock_s3)
+        assert body["host_fields"] == HOST_FIELDS
+        assert body["hosts"] == {
+            "digitalocean/lon1": {
+                "10.0.0.1": [11, "vol-1", None, None, None],
+                "10.0.0.2": [12, "vol-2", None, None, None],
+            },
+            "digitalocean/ams3": {"10.0.0.3": [13, "vol-3", None, None, None]},
+        }
+        assert "vm_ips" not in body
+
+    def test_compact_body_is_compressed(self, mock_s3):
+        hosts = [Host(f"10.0.{i // 256}.{i % 256}", "digitalocean/lon1", i) for i in range(1000)]
+        save_deployment_state("DEV-01", [("digitalocean", "lon1")], {}, "10.0.0.1", hosts=hosts)
+
+        raw = gzip.decompress(mock_s3.put_object.call_args.kwargs["Body"])
+        assert b"\n" not in raw
+        assert len(mock_s3.put_object.call_args.kwargs["Body"]) < len(raw) / 3
+
+    def test_stores_engine(self, mock_s3):
+        save_deployment_state(
+            name="DEV-01",
+            regions=[("digitalocean", "lon1")],
+            terraform_variables={"name": "DEV-01"},
+            bootstrap_ip="143.198.100.50",
+            hosts=[Host("10.0.0.1", "digitalocean/lon1")],
+            engine="multi-region",
         )
 
-        body = json.loads(mock_s3.put_object.call_args.kwargs["Body"])
-        assert body["vm_ips"] == vm_ips
+        body = _put_body(mock_s3)
+        assert body["engine"] == "multi-region"
 
 
 class TestLoadDeploymentState:
@@ -91,15 +184,13 @@ class TestLoadDeploymentState:
             "regions": [["digitalocean", "lon1"]],
             "terraform_variables": {"name": "DEV-01", "vm_count": "2"},
         }
-        mock_body = MagicMock()
-        mock_body.read.return_value = json.dumps(state).encode()
-        mock_s3.get_object.return_value = {"Body": mock_body}
+        mock_s3.get_object.return_value = _s3_object(state)
 
         result = load_deployment_state("DEV-01")
 
         mock_s3.get_object.assert_called_once_with(
             Bucket=S3_BUCKET,
-            Key=f"{S3_KEY_PREFIX}/DEV-01.json",
+            Key=f"{S3_KEY_PREFIX}/DEV-01.json.gz",
         )
         assert result["name"] == "DEV-01"
         assert result["regions"] == [["digitalocean", "lon1"]]
@@ -113,45 +204,670 @@ class TestLoadDeploymentState:
             load_deployment_state("NONEXISTENT")
 
 
-class TestUpdateDeploymentState:
-    def test_merges_updates_into_existing_state(self, mock_s3):
-        existing_state = {
-            "name": "DEV-01",
-            "regions": [["digitalocean", "lon1"]],
-            "bootstrap_ip": "10.0.0.1",
+class TestStateSchema:
+    LEGACY = {
+        "name": "DEV-01",
+        "regions": [["digitalocean", "lon1"]],
+        "bootstrap_ip": "10.0.0.100",
+        "vm_ips": {"digitalocean/lon1": ["10.0.0.1", "10.0.0.2"]},
+    }
+
+    def _only_legacy_object(self, mock_s3):
+        def get_object(Bucket, Key, **conditions):
+            if Key.endswith(".json.gz"):
+                raise mock_s3.exceptions.NoSuchKey("not found")
+            return _legacy_object(self.LEGACY)
+
+        mock_s3.get_object.side_effect = get_object
+
+    def test_legacy_object_is_read_and_upgraded(self, mock_s3):
+        self._only_legacy_object(mock_s3)
+
+        state = load_deployment_state("DEV-01")
+
+        assert state["schema_version"] == STATE_SCHEMA_VERSION
+        assert state["hosts"] == {
+            "digitalocean/lon1": {"10.0.0.1": [None] * 5, "10.0.0.2": [None] * 5}
         }
-        mock_body = MagicMock()
-        mock_body.read.return_value = json.dumps(existing_state).encode()
-        mock_s3.get_object.return_value = {"Body": mock_body}
+        assert "vm_ips" not in state
+        assert state["bootstrap_ip"] == "10.0.0.100"
 
-        update_deployment_state("DEV-01", {"bootstrap_port": 5000})
+    def test_first_write_replaces_legacy_object(self, mock_s3):
+        self._only_legacy_object(mock_s3)
 
-        mock_s3.put_object.assert_called_once()
-        body = json.loads(mock_s3.put_object.call_args.kwargs["Body"])
-        assert body["name"] == "DEV-01"
-        assert body["bootstrap_ip"] == "10.0.0.1"
-        assert body["bootstrap_port"] == 5000
+        compact_deployment_state("DEV-01")
 
-    def test_overwrites_existing_keys(self, mock_s3):
-        existing_state = {
-            "name": "DEV-01",
-            "node_count": 3,
+        put = _snapshot_put(mock_s3)
+        assert put["IfNoneMatch"] == "*"
+        assert _put_body(mock_s3)["hosts"]["digitalocean/lon1"]["10.0.0.1"] == [None] * 5
+        mock_s3.delete_object.assert_called_once_with(
+            Bucket=S3_BUCKET, Key=f"{S3_KEY_PREFIX}/DEV-01.json"
+        )
+
+    def test_newer_schema_is_refused(self, mock_s3):
+        mock_s3.get_object.return_value = _s3_object({"schema_version": 99, "name": "DEV-01"})
+
+        with pytest.raises(RuntimeError, match="upgrade saorsa-deploy"):
+            load_deployment_state("DEV-01")
+
+    def test_save_keeps_provisioning_of_unchanged_hosts(self, mock_s3):
+        mock_s3.get_object.return_value = _s3_object(
+            {
+                "schema_version": STATE_SCHEMA_VERSION,
+                "name": "DEV-01",
+                "host_fields": HOST_FIELDS,
+                "hosts": {
+                    "digitalocean/lon1": {
+                        "10.0.0.1": [11, "vol-1", [12000], "abc123", "2026-01-01T00:00:00+00:00"],
+                        "10.0.0.2": [12, "vol-2", [12000], "abc123", "2026-01-01T00:00:00+00:00"],
+                    }
+                },
+            }
+        )
+
+        save_deployment_state(
+            "DEV-01",
+            [("digitalocean", "lon1")],
+            {},
+            "10.0.0.100",
+            hosts=[
+                Host("10.0.0.1", "digitalocean/lon1", 11, "vol-1"),
+                # Same IP on a recreated droplet: nothing has been provisioned on it yet
+                Host("10.0.0.2", "digitalocean/lon1", 99, "vol-9"),
+            ],
+        )
+
+        hosts = _put_body(mock_s3)["hosts"]["digitalocean/lon1"]
+        assert hosts["10.0.0.1"] == [11, "vol-1", [12000], "abc123", "2026-01-01T00:00:00+00:00"]
+        assert hosts["10.0.0.2"] == [99, "vol-9", None, None, None]
+
+
+class TestDeploymentStateCache:
+    STATE = {
+        "schema_version": STATE_SCHEMA_VERSION,
+        "name": "DEV-01",
+        "regions": [["digitalocean", "lon1"]],
+        "hosts": {},
+    }
+
+    def test_unchanged_state_is_served_from_cache(self, mock_s3):
+        mock_s3.get_object.return_value = _s3_object(self.STATE)
+        load_deployment_state("DEV-01")
+
+        mock_s3.get_object.reset_mock()
+        mock_s3.get_object.side_effect = _not_modified()
+        result = load_deployment_state("DEV-01")
+
+        assert result == self.STATE
+        assert mock_s3.get_object.call_args.kwargs["IfNoneMatch"] == '"etag-1"'
+
+    def test_changed_state_is_downloaded_and_recached(self, mock_s3):
+        mock_s3.get_object.return_value = _s3_object(self.STATE)
+        load_deployment_state("DEV-01")
+
+        changed = {**self.STATE, "bootstrap_ip": "10.0.0.9"}
+        mock_s3.get_object.return_value = _s3_object(changed, etag='"etag-2"')
+        assert load_deployment_state("DEV-01") == changed
+
+        mock_s3.get_object.side_effect = _not_modified()
+        assert load_deployment_state("DEV-01") == changed
+        assert mock_s3.get_object.call_args.kwargs["IfNoneMatch"] == '"etag-2"'
+
+    def test_writes_refresh_cache_from_put_etag(self, mock_s3):
+        mock_s3.get_object.side_effect = _no_such_key(mock_s3)
+        save_deployment_state(
+            name="DEV-01",
+            regions=[("digitalocean", "lon1")],
+            terraform_variables={},
+            bootstrap_ip="10.0.0.1",
+            hosts=[],
+        )
+        mock_s3.get_object.side_effect = _not_modified()
+
+        result = load_deployment_state("DEV-01")
+
+        assert mock_s3.get_object.call_args.kwargs["IfNoneMatch"] == '"put-etag"'
+        assert result["bootstrap_ip"] == "10.0.0.1"
+
+    def test_delete_drops_cache(self, mock_s3):
+        mock_s3.get_object.return_value = _s3_object(self.STATE)
+        load_deployment_state("DEV-01")
+
+        delete_deployment_state("DEV-01")
+
+        mock_s3.get_object.reset_mock()
+        load_deployment_state("DEV-01")
+        assert "IfNoneMatch" not in mock_s3.get_object.call_args.kwargs
+
+    def test_not_found_drops_cache(self, mock_s3):
+        mock_s3.get_object.return_value = _s3_object(self.STATE)
+        load_deployment_state("DEV-01")
+
+        mock_s3.get_object.side_effect = mock_s3.exceptions.NoSuchKey("not found")
+        with pytest.raises(RuntimeError):
+            load_deployment_state("DEV-01")
+
+        mock_s3.get_object.side_effect = None
+        mock_s3.get_object.reset_mock()
+        load_deployment_state("DEV-01")
+        assert "IfNoneMatch" not in mock_s3.get_object.call_args.kwargs
+
+
+class TestConcurrentWrites:
+    @pytest.fixture(autouse=True)
+    def no_backoff(self, monkeypatch):
+        monkeypatch.setattr("saorsa_deploy.state.WRITE_RETRY_BASE_DELAY", 0)
+
+    def test_save_is_conditional_on_read_etag(self, mock_s3):
+        mock_s3.get_object.return_value = _s3_object({"name": "DEV-01"}, etag='"etag-1"')
+
+        save_deployment_state("DEV-01", [], {}, "10.0.0.1", hosts=[])
+
+        assert _snapshot_put(mock_s3)["IfMatch"] == '"etag-1"'
+
+    def test_first_save_only_creates(self, mock_s3):
+        mock_s3.get_object.side_effect = _no_such_key(mock_s3)
+
+        save_deployment_state("DEV-01", [], {}, "10.0.0.1", hosts=[])
+
+        assert _snapshot_put(mock_s3)["IfNoneMatch"] == "*"
+
+    def test_conflict_rereads_and_merges_the_other_writers_update(self, mock_s3):
+        base = {"name": "DEV-01", "node_counts": {}}
+        other = {"name": "DEV-01", "node_counts": {"digitalocean/nyc1": 3}}
+        mock_s3.get_object.side_effect = [
+            _s3_object(base, etag='"etag-1"'),
+            _s3_object(other, etag='"etag-2"'),
+        ]
+        # The journal event, then the snapshot twice
+        mock_s3.put_object.side_effect = [{}, _conflict(), {"ETag": '"etag-3"'}]
+
+        save_deployment_state("DEV-01", [], {}, "10.0.0.1", hosts=[])
+
+        assert mock_s3.put_object.call_count == 3
+        assert _snapshot_put(mock_s3)["IfMatch"] == '"etag-2"'
+        assert _put_body(mock_s3)["node_counts"] == {"digitalocean/nyc1": 3}
+
+    def test_save_keeps_fields_written_by_other_commands(self, mock_s3):
+        mock_s3.get_object.return_value = _s3_object(
+            {"name": "DEV-01", "bootstrap_ip": "10.0.0.1", "bootstrap_port": 12000}
+        )
+
+        save_deployment_state("DEV-01", [], {}, "10.0.0.2", hosts=[])
+
+        body = _put_body(mock_s3)
+        assert body["bootstrap_ip"] == "10.0.0.2"
+        assert body["bootstrap_port"] == 12000
+
+    def test_gives_up_after_repeated_conflicts(self, mock_s3):
+        mock_s3.get_object.return_value = _s3_object({"name": "DEV-01"})
+        mock_s3.put_object.side_effect = _conflict()
+
+        with pytest.raises(RuntimeError, match="kept changing"):
+            compact_deployment_state("DEV-01")
+
+        assert mock_s3.put_object.call_count == MAX_WRITE_ATTEMPTS
+
+    def test_other_errors_are_not_retried(self, mock_s3):
+        mock_s3.get_object.return_value = _s3_object({"name": "DEV-01"})
+        mock_s3.put_object.side_effect = ClientError(
+            {"Error": {"Code": "AccessDenied", "Message": "denied"}}, "PutObject"
+        )
+
+        with pytest.raises(ClientError):
+            update_deployment_state("DEV-01", {"node_count": 5})
+        assert mock_s3.put_object.call_count == 1
+
+    def test_update_of_missing_deployment_raises(self, mock_s3):
+        mock_s3.get_object.side_effect = _no_such_key(mock_s3)
+
+        with pytest.raises(RuntimeError, match="No deployment state found"):
+            update_deployment_state("DEV-01", {"node_count": 5})
+        mock_s3.put_object.assert_not_called()
+
+
+class TestMergeState:
+    def test_nested_dicts_merge_field_by_field(self):
+        base = {"vm_ips": {"digitalocean/lon1": ["10.0.0.1"]}, "engine": "per-region"}
+        merged = merge_state(base, {"vm_ips": {"digitalocean/nyc1": ["10.0.0.2"]}})
+        assert merged["vm_ips"] == {
+            "digitalocean/lon1": ["10.0.0.1"],
+            "digitalocean/nyc1": ["10.0.0.2"],
         }
-        mock_body = MagicMock()
-        mock_body.read.return_value = json.dumps(existing_state).encode()
-        mock_s3.get_object.return_value = {"Body": mock_body}
+        assert merged["engine"] == "per-region"
 
-        update_deployment_state("DEV-01", {"node_count": 5})
+    def test_non_dict_values_are_replaced(self):
+        merged = merge_state({"regions": [["digitalocean", "lon1"]]}, {"regions": []})
+        assert merged["regions"] == []
 
-        body = json.loads(mock_s3.put_object.call_args.kwargs["Body"])
-        assert body["node_count"] == 5
+    def test_base_is_not_modified(self):
+        base = {"vm_ips": {"a": [1]}}
+        merge_state(base, {"vm_ips": {"b": [2]}})
+        assert base == {"vm_ips": {"a": [1]}}
 
 
 class TestDeleteDeploymentState:
     def test_deletes_from_s3(self, mock_s3):
         delete_deployment_state("DEV-01")
 
-        mock_s3.delete_object.assert_called_once_with(
+        mock_s3.delete_objects.assert_called_once_with(
             Bucket=S3_BUCKET,
-            Key=f"{S3_KEY_PREFIX}/DEV-01.json",
+            Delete={
+                "Objects": [
+                    {"Key": f"{S3_KEY_PREFIX}/DEV-01.json.gz"},
+                    {"Key": f"{S3_KEY_PREFIX}/DEV-01.json"},
+                ],
+                "Quiet": True,
+            },
+        )
+
+
+class TestLoadTerraformOutputs:
+    def test_decodes_output_values(self, mock_s3):
+        tf_state = {
+            "version": 4,
+            "outputs": {
+                "droplet_ips": {"value": ["10.0.0.1"], "type": ["list", "string"]},
+                "droplet_ids": {"value": [123], "type": ["list", "number"]},
+            },
+        }
+        mock_s3.get_object.return_value = {
+            "Body": MagicMock(read=MagicMock(return_value=json.dumps(tf_state).encode()))
+        }
+
+        outputs = load_terraform_outputs("saorsa-deploy/do-lon1.tfstate")
+
+        mock_s3.get_object.assert_called_once_with(
+            Bucket=S3_BUCKET, Key="saorsa-deploy/do-lon1.tfstate"
         )
+        assert outputs == {"droplet_ips": ["10.0.0.1"], "droplet_ids": [123]}
+
+    def test_missing_state_object_has_no_outputs(self, mock_s3):
+        error_class = type("NoSuchKey", (Exception,), {})
+        mock_s3.exceptions.NoSuchKey = error_class
+        mock_s3.get_object.side_effect = error_class("not found")
+
+        assert load_terraform_outputs("saorsa-deploy/do-lon1.tfstate") == {}
+
+
+class TestDeleteTerraformStates:
+    def test_deletes_all_keys_in_one_request(self, mock_s3):
+        delete_terraform_states(["saorsa-deploy/do-lon1.tfstate", "saorsa-deploy/do-nyc1.tfstate"])
+
+        mock_s3.delete_objects.assert_called_once_with(
+            Bucket=S3_BUCKET,
+            Delete={
+                "Objects": [
+                    {"Key": "saorsa-deploy/do-lon1.tfstate"},
+                    {"Key": "saorsa-deploy/do-nyc1.tfstate"},
+                ],
+                "Quiet": True,
+            },
+        )
+
+    def test_no_keys_makes_no_request(self, mock_s3):
+        delete_terraform_states([])
+        mock_s3.delete_objects.assert_not_called()
+
+
+def _not_found(operation):
+    return ClientError({"Error": {"Code": "404", "Message": "Not Found"}}, operation)
+
+
+class TestMoveTerraformState:
+    def test_copies_then_deletes_legacy_key(self, mock_s3):
+        mock_s3.head_object.side_effect = _not_found("HeadObject")
+
+        assert move_terraform_state(
+            "saorsa-deploy/do-lon1.tfstate", "saorsa-deploy/do-X-lon1.tfstate"
+        )
+
+        mock_s3.copy_object.assert_called_once_with(
+            Bucket=S3_BUCKET,
+            Key="saorsa-deploy/do-X-lon1.tfstate",
+            CopySource={"Bucket": S3_BUCKET, "Key": "saorsa-deploy/do-lon1.tfstate"},
+        )
+        mock_s3.delete_object.assert_called_once_with(
+            Bucket=S3_BUCKET, Key="saorsa-deploy/do-lon1.tfstate"
+        )
+
+    def test_existing_new_key_is_left_alone(self, mock_s3):
+        assert not move_terraform_state("old.tfstate", "new.tfstate")
+        mock_s3.copy_object.assert_not_called()
+        mock_s3.delete_object.assert_not_called()
+
+    def test_missing_legacy_key_moves_nothing(self, mock_s3):
+        mock_s3.head_object.side_effect = _not_found("HeadObject")
+        mock_s3.copy_object.side_effect = ClientError(
+            {"Error": {"Code": "NoSuchKey", "Message": "missing"}}, "CopyObject"
+        )
+
+        assert not move_terraform_state("old.tfstate", "new.tfstate")
+        mock_s3.delete_object.assert_not_called()
+
+
+class FakeS3:
+    """In-memory bucket with the conditional reads and writes S3 supports."""
+
+    class exceptions:
+        NoSuchKey = type("NoSuchKey", (Exception,), {})
+
+    PAGE_SIZE = 2
+
+    def __init__(self):
+        self.objects = {}
+        self.calls = []
+        self._etags = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _error(self, code, operation):
+        return ClientError({"Error": {"Code": code, "Message": code}}, operation)
+
+    def get_object(self, Bucket, Key, IfNoneMatch=None):
+        with self._lock:
+            self.calls.append(("get", Key))
+            if Key not in self.objects:
+                raise self.exceptions.NoSuchKey(Key)
+            body, etag, modified = self.objects[Key]
+            if IfNoneMatch == etag:
+                raise self._error("304", "GetObject")
+            return {"Body": io.BytesIO(body), "ETag": etag, "LastModified": modified}
+
+    def head_object(self, Bucket, Key):
+        with self._lock:
+            self.calls.append(("head", Key))
+            if Key not in self.objects:
+                raise self._error("404", "HeadObject")
+            return {"ETag": self.objects[Key][1]}
+
+    def put_object(self, Bucket, Key, Body, IfMatch=None, IfNoneMatch=None, **kwargs):
+        with self._lock:
+            self.calls.append(("put", Key))
+            existing = self.objects.get(Key)
+            if (IfNoneMatch == "*" and existing) or (
+                IfMatch and (existing is None or existing[1] != IfMatch)
+            ):
+                raise self._error("PreconditionFailed", "PutObject")
+            etag = f'"{next(self._etags)}"'
+            body = Body if isinstance(Body, bytes) else Body.encode()
+            self.objects[Key] = (body, etag, datetime(2026, 1, 1, tzinfo=timezone.utc))
+            return {"ETag": etag}
+
+    def delete_object(self, Bucket, Key):
+        with self._lock:
+            self.objects.pop(Key, None)
+
+    def delete_objects(self, Bucket, Delete):
+        for obj in Delete["Objects"]:
+            self.delete_object(Bucket, obj["Key"])
+
+    def get_paginator(self, operation):
+        return self
+
+    def paginate(self, Bucket, Prefix, StartAfter=""):
+        keys = sorted(k for k in self.objects if k.startswith(Prefix) and k > StartAfter)
+        for start in range(0, len(keys), self.PAGE_SIZE):
+            self.calls.append(("list", Prefix))
+            yield {
+                "Contents": [
+                    {"Key": k, "LastModified": self.objects[k][2]}
+                    for k in keys[start : start + self.PAGE_SIZE]
+                ]
+            }
+
+
+@pytest.fixture
+def fake_s3(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr("saorsa_deploy.state.WRITE_RETRY_BASE_DELAY", 0)
+    fake = FakeS3()
+    with patch("saorsa_deploy.state.s3_client", return_value=fake):
+        yield fake
+
+
+def _save(name, regions=("lon1",), vms_per_region=2):
+    save_deployment_state(
+        name,
+        [("digitalocean", r) for r in regions],
+        {"name": name},
+        "10.0.0.100",
+        hosts=[
+            Host(f"10.{i}.0.{n}", f"digitalocean/{r}")
+            for i, r in enumerate(regions)
+            for n in range(vms_per_region)
+        ],
+    )
+
+
+def _index(fake_s3):
+    return json.loads(fake_s3.objects[S3_INDEX_KEY][0])["deployments"]
+
+
+class TestDeploymentIndex:
+    def test_save_adds_an_index_entry(self, fake_s3):
+        _save("DEV-01", regions=("lon1", "nyc1"), vms_per_region=3)
+
+        entry = _index(fake_s3)["DEV-01"]
+        assert entry["regions"] == 2
+        assert entry["vms"] == 6
+        assert entry["created_at"]
+        assert entry["binary_source"] is None
+
+    def test_resaving_keeps_created_time(self, fake_s3):
+        _save("DEV-01")
+        created_at = _index(fake_s3)["DEV-01"]["created_at"]
+        with patch("saorsa_deploy.state._now", return_value="2099-01-01T00:00:00+00:00"):
+            _save("DEV-01", vms_per_region=5)
+
+        assert _index(fake_s3)["DEV-01"]["created_at"] == created_at
+        assert _index(fake_s3)["DEV-01"]["vms"] == 5
+
+    def test_update_of_indexed_field_refreshes_entry(self, fake_s3):
+        _save("DEV-01")
+        update_deployment_state("DEV-01", {"binary_source": "v1.2.3"})
+        assert _index(fake_s3)["DEV-01"]["binary_source"] == "v1.2.3"
+
+    def test_other_updates_leave_index_alone(self, fake_s3):
+        _save("DEV-01")
+        fake_s3.calls.clear()
+
+        update_deployment_state("DEV-01", {"bootstrap_port": 5000})
+
+        assert not any(key == S3_INDEX_KEY for _, key in fake_s3.calls)
+
+    def test_delete_removes_entry(self, fake_s3):
+        _save("DEV-01")
+        _save("DEV-02")
+
+        delete_deployment_state("DEV-01")
+
+        assert list(_index(fake_s3)) == ["DEV-02"]
+
+    def test_concurrent_saves_all_reach_the_index(self, fake_s3):
+        names = [f"DEV-{i:02d}" for i in range(12)]
+        with ThreadPoolExecutor(max_workers=12) as pool:
+            list(pool.map(_save, names))
+
+        assert sorted(_index(fake_s3)) == names
+
+
+class TestListDeployments:
+    def test_reads_the_index_in_one_request(self, fake_s3):
+        _save("DEV-01")
+        _save("DEV-02", regions=("lon1", "nyc1"))
+        fake_s3.calls.clear()
+
+        deployments = list_deployments()
+
+        assert fake_s3.calls == [("get", S3_INDEX_KEY)]
+        assert deployments["DEV-02"]["vms"] == 4
+
+    def test_without_index_scans_documents_and_creates_index(self, fake_s3):
+        _save("DEV-01")
+        fake_s3.objects[f"{S3_KEY_PREFIX}/OLD-01.json"] = (
+            json.dumps(
+                {
+                    "name": "OLD-01",
+                    "regions": [["digitalocean", "lon1"], ["digitalocean", "nyc1"]],
+                    "vm_ips": {"digitalocean/lon1": ["10.0.0.1"], "digitalocean/nyc1": ["1"]},
+                },
+                indent=2,
+            ).encode(),
+            '"old"',
+            datetime(2025, 6, 1, tzinfo=timezone.utc),
+        )
+        del fake_s3.objects[S3_INDEX_KEY]
+
+        deployments = list_deployments()
+
+        assert list(deployments) == ["DEV-01", "OLD-01"]
+        assert deployments["OLD-01"] == {
+            "regions": 2,
+            "vms": 2,
+            "created_at": "2025-06-01T00:00:00+00:00",
+            "binary_source": None,
+        }
+        assert _index(fake_s3) == deployments
+
+    def test_no_deployments(self, fake_s3):
+        assert list_deployments() == {}
+
+
+class TestJournal:
+    def test_update_appends_a_small_event_instead_of_rewriting_state(self, fake_s3):
+        _save("DEV-01", vms_per_region=50)
+        snapshot = fake_s3.objects[f"{S3_KEY_PREFIX}/DEV-01.json.gz"]
+
+        update_deployment_state("DEV-01", {"bootstrap_port": 5000}, command="provision-genesis")
+
+        assert fake_s3.objects[f"{S3_KEY_PREFIX}/DEV-01.json.gz"] == snapshot
+        [event_key] = [
+            k
+            for k in fake_s3.objects
+            if k.startswith(f"{S3_KEY_PREFIX}/DEV-01.journal/")
+            and json.loads(fake_s3.objects[k][0])["command"] == "provision-genesis"
+        ]
+        assert len(fake_s3.objects[event_key][0]) < 200
+
+    def test_load_replays_events_on_the_snapshot(self, fake_s3):
+        _save("DEV-01")
+        update_deployment_state("DEV-01", {"bootstrap_port": 5000})
+        update_deployment_state("DEV-01", {"node_count": 3})
+        update_deployment_state("DEV-01", {"node_count": 5})
+
+        state = load_deployment_state("DEV-01")
+
+        assert state["bootstrap_port"] == 5000
+        assert state["node_count"] == 5
+        assert state["bootstrap_ip"] == "10.0.0.100"
+
+    def test_updates_from_concurrent_commands_all_apply(self, fake_s3):
+        _save("DEV-01", regions=("lon1", "nyc1", "ams3"))
+
+        def provision(region):
+            update_deployment_state("DEV-01", {"node_counts": {f"digitalocean/{region}": 2}})
+
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            list(pool.map(provision, ["lon1", "nyc1", "ams3"]))
+
+        assert load_deployment_state("DEV-01")["node_counts"] == {
+            "digitalocean/lon1": 2,
+            "digitalocean/nyc1": 2,
+            "digitalocean/ams3": 2,
+        }
+
+    def test_compaction_folds_events_into_the_snapshot(self, fake_s3):
+        _save("DEV-01")
+        update_deployment_state("DEV-01", {"bootstrap_port": 5000})
+
+        compact_deployment_state("DEV-01")
+        fake_s3.calls.clear()
+        state = load_deployment_state("DEV-01")
+
+        assert state["bootstrap_port"] == 5000
+        # Only the snapshot was read, and the journal was not listed
+        assert [c for c in fake_s3.calls if c[0] in ("get", "list")] == [
+            ("get", f"{S3_KEY_PREFIX}/DEV-01.json.gz")
+        ]
+
+    def test_events_are_numbered_in_write_order(self, fake_s3):
+        _save("DEV-01")
+        update_deployment_state("DEV-01", {"bootstrap_port": 5000})
+        update_deployment_state("DEV-01", {"node_count": 3})
+
+        assert [k for k in fake_s3.objects if ".journal/" in k] == [
+            f"{S3_KEY_PREFIX}/DEV-01.journal/{n:012d}.json" for n in (1, 2, 3)
+        ]
+
+    def test_event_written_from_a_stale_snapshot_is_not_lost(self, fake_s3):
+        _save("DEV-01")
+        update_deployment_state("DEV-01", {"bootstrap_port": 5000})
+        stale = load_deployment_state("DEV-01")
+        update_deployment_state("DEV-01", {"node_count": 3})
+        compact_deployment_state("DEV-01")
+
+        # A writer still holding the older snapshot appends after the compaction
+        with patch("saorsa_deploy.state._fetch_deployment_state", return_value=(stale, None)):
+            update_deployment_state("DEV-01", {"node_count": 5})
+
+        assert load_deployment_state("DEV-01")["node_count"] == 5
+
+    def test_writer_that_loses_a_number_takes_the_next(self, fake_s3):
+        _save("DEV-01")
+        put_object = fake_s3.put_object
+
+        def racing_put(Bucket, Key, Body, **kwargs):
+            if Key.endswith("000000000002.json") and Key not in fake_s3.objects:
+                # Another command takes the same number first
+                put_object(Bucket, Key, json.dumps({"updates": {"node_count": 3}}))
+            return put_object(Bucket, Key, Body, **kwargs)
+
+        with patch.object(fake_s3, "put_object", side_effect=racing_put):
+            update_deployment_state("DEV-01", {"bootstrap_port": 5000})
+
+        state = load_deployment_state("DEV-01")
+        assert state["node_count"] == 3
+        assert state["bootstrap_port"] == 5000
+
+    def test_load_compacts_a_long_tail(self, fake_s3, monkeypatch):
+        monkeypatch.setattr("saorsa_deploy.state.COMPACT_AFTER_EVENTS", 3)
+        _save("DEV-01")
+        for port in (5000, 5001, 5002):
+            update_deployment_state("DEV-01", {"bootstrap_port": port})
+
+        load_deployment_state("DEV-01")
+
+        snapshot = json.loads(
+            gzip.decompress(fake_s3.objects[f"{S3_KEY_PREFIX}/DEV-01.json.gz"][0])
+        )
+        assert snapshot["bootstrap_port"] == 5002
+
+    def test_save_folds_pending_events(self, fake_s3):
+        _save("DEV-01")
+        update_deployment_state("DEV-01", {"bootstrap_port": 5000})
+
+        _save("DEV-01", vms_per_region=3)
+
+        snapshot = json.loads(
+            gzip.decompress(fake_s3.objects[f"{S3_KEY_PREFIX}/DEV-01.json.gz"][0])
+        )
+        assert snapshot["bootstrap_port"] == 5000
+        assert load_deployment_state("DEV-01")["bootstrap_port"] == 5000
+
+    def test_events_are_kept_as_an_audit_trail(self, fake_s3):
+        _save("DEV-01")
+        update_deployment_state("DEV-01", {"bootstrap_port": 5000}, command="provision-genesis")
+        compact_deployment_state("DEV-01")
+
+        events = load_deployment_events("DEV-01")
+
+        assert [e["command"] for e in events] == ["infra", "provision-genesis"]
+        assert all(e["at"] for e in events)
+
+    def test_delete_removes_the_journal(self, fake_s3):
+        _save("DEV-01")
+        update_deployment_state("DEV-01", {"bootstrap_port": 5000})
+
+        delete_deployment_state("DEV-01")
+
+        assert [k for k in fake_s3.objects if k.startswith(S3_KEY_PREFIX)] == []
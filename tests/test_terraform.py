@@ -1,17 +1,21 @@
 import json
 import os
 import subprocess
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
 import pytest
+from botocore.exceptions import ClientError
 
 from saorsa_deploy.terraform import (
     TerraformRunConfig,
     build_apply_args,
     build_destroy_args,
     build_init_args,
-    build_output_args,
+    build_plan_args,
+    get_plugin_cache_dir,
     prepare_workspace,
+    prewarm_workspace,
+    resolve_parallelism,
     run_terraform,
     run_terraform_destroy,
 )
@@ -30,6 +34,25 @@ def tf_source(tmp_path):
     return src
 
 
+@pytest.fixture(autouse=True)
+def plugin_cache(tmp_path, monkeypatch):
+    cache = tmp_path / "plugin-cache"
+    monkeypatch.setenv("TF_PLUGIN_CACHE_DIR", str(cache))
+    return cache
+
+
+@pytest.fixture(autouse=True)
+def terraform_version():
+    with patch("saorsa_deploy.terraform.get_terraform_version", return_value="1.9.0"):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def tf_outputs():
+    with patch("saorsa_deploy.terraform.load_terraform_outputs", return_value={}) as mock_outputs:
+        yield mock_outputs
+
+
 @pytest.fixture
 def workspace(tmp_path):
     return tmp_path / "workspaces" / "digitalocean-lon1"
@@ -56,6 +79,59 @@ def _make_completed_process(returncode=0, stdout="", stderr=""):
     return subprocess.CompletedProcess(args=[], returncode=returncode, stdout=stdout, stderr=stderr)
 
 
+def _make_popen(lines=None, returncode=0, stderr=""):
+    """Build a fake Popen whose stdout yields the given -json event lines."""
+    proc = MagicMock()
+    proc.stdout = iter(lines or [])
+    proc.stderr = iter([stderr] if stderr else [])
+    proc.wait.return_value = returncode
+    return proc
+
+
+def _event(event_type, message="", **fields):
+    return json.dumps({"@message": message, "type": event_type, **fields}) + "\n"
+
+
+def _hook(addr, elapsed=None):
+    hook = {"resource": {"addr": addr}, "action": "create"}
+    if elapsed is not None:
+        hook["elapsed_seconds"] = elapsed
+    return hook
+
+
+_PLAN_EVENTS = [
+    _event("version", "Terraform 1.9.0"),
+    _event(
+        "planned_change",
+        "digitalocean_droplet.node_vm[0]: Plan to create",
+        change={"resource": {"addr": "digitalocean_droplet.node_vm[0]"}, "action": "create"},
+    ),
+    _event(
+        "planned_change",
+        "digitalocean_volume.node_storage[0]: Plan to create",
+        change={"resource": {"addr": "digitalocean_volume.node_storage[0]"}, "action": "create"},
+    ),
+    _event(
+        "change_summary",
+        "Plan: 2 to add, 0 to change, 0 to destroy.",
+        changes={"add": 2, "change": 0, "remove": 0, "operation": "plan"},
+    ),
+]
+
+_APPLY_EVENTS = [
+    _event("apply_start", hook=_hook("digitalocean_droplet.node_vm[0]")),
+    _event("apply_start", hook=_hook("digitalocean_volume.node_storage[0]")),
+    _event("apply_complete", hook=_hook("digitalocean_volume.node_storage[0]", 3)),
+    _event("apply_progress", hook=_hook("digitalocean_droplet.node_vm[0]", 10)),
+    _event("apply_complete", hook=_hook("digitalocean_droplet.node_vm[0]", 42)),
+    _event(
+        "change_summary",
+        "Apply complete! Resources: 2 added, 0 changed, 0 destroyed.",
+        changes={"add": 2, "change": 0, "remove": 0, "operation": "apply"},
+    ),
+]
+
+
 class TestPrepareWorkspace:
     def test_copies_tf_files_to_workspace(self, config):
         prepare_workspace(config)
@@ -75,6 +151,135 @@ class TestPrepareWorkspace:
         prepare_workspace(config)
         assert not (config.workspace_dir / "notes.txt").exists()
 
+    def test_copies_provider_lock_file(self, config):
+        (config.tf_source_dir / ".terraform.lock.hcl").write_text("# lock")
+        prepare_workspace(config)
+        assert (config.workspace_dir / ".terraform.lock.hcl").read_text() == "# lock"
+
+    def test_first_prepare_requires_init(self, config):
+        assert prepare_workspace(config) is True
+
+
+class TestWorkspaceFingerprint:
+    @patch("saorsa_deploy.terraform.subprocess.Popen")
+    @patch("saorsa_deploy.terraform.subprocess.run")
+    def _run(self, config, mock_run, mock_popen):
+        def run(args, **kwargs):
+            if args[1] == "init":
+                (config.workspace_dir / ".terraform").mkdir(exist_ok=True)
+            return _make_completed_process()
+
+        mock_run.side_effect = run
+        mock_popen.return_value = _make_popen()
+        run_terraform(config)
+        return [call.args[0][1] for call in mock_run.call_args_list]
+
+    def test_unchanged_workspace_skips_init(self, config):
+        assert self._run(config) == ["init"]
+        assert self._run(config) == []
+
+    def test_changed_manifest_is_recopied_and_reinitialised(self, config):
+        self._run(config)
+        (config.tf_source_dir / "main.tf").write_text("# main v2")
+        assert self._run(config) == ["init"]
+        assert (config.workspace_dir / "main.tf").read_text() == "# main v2"
+
+    def test_only_changed_files_are_copied(self, config):
+        self._run(config)
+        (config.workspace_dir / "variables.tf").write_text("# touched in workspace")
+        (config.tf_source_dir / "main.tf").write_text("# main v2")
+        prepare_workspace(config)
+        assert (config.workspace_dir / "variables.tf").read_text() == "# touched in workspace"
+
+    def test_removed_manifest_is_removed_from_workspace(self, config):
+        self._run(config)
+        (config.tf_source_dir / "outputs.tf").unlink()
+        assert self._run(config) == ["init"]
+        assert not (config.workspace_dir / "outputs.tf").exists()
+
+    def test_changed_state_key_reinitialises(self, config):
+        self._run(config)
+        config.state_key = "saorsa-deploy/do-other.tfstate"
+        assert self._run(config) == ["init"]
+
+    def test_changed_terraform_version_reinitialises(self, config):
+        self._run(config)
+        with patch("saorsa_deploy.terraform.get_terraform_version", return_value="1.10.0"):
+            assert self._run(config) == ["init"]
+
+    def test_prewarmed_workspace_skips_init(self, config):
+        with patch("saorsa_deploy.terraform.subprocess.run") as mock_run:
+
+            def run(args, **kwargs):
+                (config.workspace_dir / ".terraform").mkdir(exist_ok=True)
+                return _make_completed_process()
+
+            mock_run.side_effect = run
+            assert prewarm_workspace(config) is True
+        assert self._run(config) == []
+
+    def test_failed_prewarm_is_repeated_by_the_run(self, config):
+        with patch("saorsa_deploy.terraform.subprocess.run") as mock_run:
+            mock_run.return_value = _make_completed_process(returncode=1)
+            assert prewarm_workspace(config) is False
+        assert self._run(config) == ["init"]
+
+    def test_failed_init_is_retried(self, config):
+        with patch("saorsa_deploy.terraform.subprocess.run") as mock_run:
+            mock_run.return_value = _make_completed_process(returncode=1)
+            run_terraform(config)
+        assert self._run(config) == ["init"]
+
+
+class TestPluginCache:
+    def test_honours_existing_tf_plugin_cache_dir(self, plugin_cache):
+        assert get_plugin_cache_dir() == plugin_cache
+
+    def test_defaults_under_xdg_cache_home(self, tmp_path, monkeypatch):
+        monkeypatch.delenv("TF_PLUGIN_CACHE_DIR")
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "xdg"))
+        assert get_plugin_cache_dir() == tmp_path / "xdg" / "saorsa-deploy" / "terraform-plugins"
+
+    @patch("saorsa_deploy.terraform.subprocess.Popen")
+    @patch("saorsa_deploy.terraform.subprocess.run")
+    def test_init_and_apply_use_plugin_cache(self, mock_run, mock_popen, config, plugin_cache):
+        mock_run.return_value = _make_completed_process()
+        mock_popen.return_value = _make_popen()
+        run_terraform(config)
+
+        assert plugin_cache.is_dir()
+        assert mock_run.call_args_list[0].kwargs["env"]["TF_PLUGIN_CACHE_DIR"] == str(plugin_cache)
+        assert mock_popen.call_args.kwargs["env"]["TF_PLUGIN_CACHE_DIR"] == str(plugin_cache)
+
+    @patch("saorsa_deploy.terraform.subprocess.Popen")
+    @patch("saorsa_deploy.terraform.subprocess.run")
+    def test_later_workspaces_get_first_inits_lock_file(
+        self, mock_run, mock_popen, config, tmp_path
+    ):
+        lock_files_seen_by_init = []
+
+        def fake_run(args, cwd, **kwargs):
+            lock_file = os.path.join(cwd, ".terraform.lock.hcl")
+            lock_files_seen_by_init.append(os.path.exists(lock_file))
+            if not os.path.exists(lock_file):
+                with open(lock_file, "w") as f:
+                    f.write('provider "registry.terraform.io/digitalocean/digitalocean" {}')
+            return _make_completed_process()
+
+        mock_run.side_effect = fake_run
+        mock_popen.return_value = _make_popen()
+        run_terraform(config)
+
+        config.region = "ams3"
+        config.workspace_dir = tmp_path / "workspaces" / "digitalocean-ams3"
+        config.state_key = "saorsa-deploy/do-ams3.tfstate"
+        run_terraform(config)
+
+        assert lock_files_seen_by_init == [False, True]
+        assert (config.workspace_dir / ".terraform.lock.hcl").read_text() == (
+            'provider "registry.terraform.io/digitalocean/digitalocean" {}'
+        )
+
 
 class TestBuildInitArgs:
     def test_includes_backend_config_key(self, config):
@@ -83,18 +288,21 @@ class TestBuildInitArgs:
             "terraform",
             "init",
             "-input=false",
+            "-reconfigure",
             "-backend-config=key=saorsa-deploy/do-lon1.tfstate",
         ]
 
 
-class TestBuildApplyArgs:
+class TestBuildPlanArgs:
     def test_includes_variables_sorted(self, config):
-        args = build_apply_args(config)
+        args = build_plan_args(config)
         assert args == [
             "terraform",
-            "apply",
-            "-auto-approve",
+            "plan",
             "-input=false",
+            "-json",
+            "-detailed-exitcode",
+            "-out=saorsa.tfplan",
             "-var=attached_volume_size=20",
             "-var=name=TEST",
             "-var=region=lon1",
@@ -103,25 +311,59 @@ class TestBuildApplyArgs:
 
     def test_no_variables(self, config):
         config.variables = {}
+        args = build_plan_args(config)
+        assert args == [
+            "terraform",
+            "plan",
+            "-input=false",
+            "-json",
+            "-detailed-exitcode",
+            "-out=saorsa.tfplan",
+        ]
+
+    def test_includes_parallelism(self, config):
+        config.parallelism = 30
+        args = build_plan_args(config)
+        assert args[6] == "-parallelism=30"
+
+
+class TestBuildApplyArgs:
+    def test_applies_saved_plan(self, config):
         args = build_apply_args(config)
         assert args == [
             "terraform",
             "apply",
-            "-auto-approve",
             "-input=false",
+            "-json",
+            "saorsa.tfplan",
         ]
 
+    def test_includes_parallelism_before_plan_file(self, config):
+        config.parallelism = 30
+        args = build_apply_args(config)
+        assert args[-2:] == ["-parallelism=30", "saorsa.tfplan"]
+
 
-class TestBuildOutputArgs:
-    def test_returns_correct_args(self):
-        args = build_output_args()
-        assert args == ["terraform", "output", "-json"]
+class TestResolveParallelism:
+    def test_budget_shared_between_concurrent_runs(self):
+        assert resolve_parallelism(60, concurrent_runs=5, api_budget=50) == 10
+
+    def test_single_run_gets_whole_budget(self):
+        assert resolve_parallelism(480, concurrent_runs=1, api_budget=50) == 50
+
+    def test_capped_at_resource_count(self):
+        assert resolve_parallelism(3, concurrent_runs=1, api_budget=50) == 3
+
+    def test_never_below_one(self):
+        assert resolve_parallelism(60, concurrent_runs=100, api_budget=50) == 1
 
 
 class TestRunTerraform:
+    @patch("saorsa_deploy.terraform.subprocess.Popen")
     @patch("saorsa_deploy.terraform.subprocess.run")
-    def test_calls_init_with_correct_args(self, mock_run, config):
+    def test_calls_init_with_correct_args(self, mock_run, mock_popen, config):
         mock_run.return_value = _make_completed_process()
+        mock_popen.return_value = _make_popen()
         run_terraform(config)
 
         init_call = mock_run.call_args_list[0]
@@ -129,32 +371,59 @@ class TestRunTerraform:
             "terraform",
             "init",
             "-input=false",
+            "-reconfigure",
             "-backend-config=key=saorsa-deploy/do-lon1.tfstate",
         ]
         assert init_call.kwargs["cwd"] == str(config.workspace_dir)
         assert init_call.kwargs["capture_output"] is True
         assert init_call.kwargs["text"] is True
 
+    @patch("saorsa_deploy.terraform.subprocess.Popen")
     @patch("saorsa_deploy.terraform.subprocess.run")
-    def test_calls_apply_with_correct_args(self, mock_run, config):
+    def test_calls_plan_then_applies_saved_plan(self, mock_run, mock_popen, config):
         mock_run.return_value = _make_completed_process()
+        mock_popen.side_effect = [_make_popen(returncode=2), _make_popen()]
         run_terraform(config)
 
-        apply_call = mock_run.call_args_list[1]
+        plan_call, apply_call = mock_popen.call_args_list
+        assert plan_call.args[0] == build_plan_args(config)
         assert apply_call.args[0] == [
             "terraform",
             "apply",
-            "-auto-approve",
             "-input=false",
-            "-var=attached_volume_size=20",
-            "-var=name=TEST",
-            "-var=region=lon1",
-            "-var=vm_count=2",
+            "-json",
+            "saorsa.tfplan",
         ]
+        assert apply_call.kwargs["cwd"] == str(config.workspace_dir)
+
+    @patch("saorsa_deploy.terraform.subprocess.Popen")
+    @patch("saorsa_deploy.terraform.subprocess.run")
+    def test_no_changes_skips_apply(self, mock_run, mock_popen, config, tf_outputs):
+        tf_outputs.return_value = {"droplet_ips": ["10.0.0.1"]}
+        mock_run.return_value = _make_completed_process()
+        mock_popen.return_value = _make_popen(returncode=0)
+        result = run_terraform(config)
+
+        assert mock_popen.call_count == 1
+        assert mock_popen.call_args.args[0][1] == "plan"
+        assert result.success is True
+        assert result.unchanged is True
+        assert result.outputs["droplet_ips"] == ["10.0.0.1"]
+
+    @patch("saorsa_deploy.terraform.subprocess.Popen")
+    @patch("saorsa_deploy.terraform.subprocess.run")
+    def test_changes_are_not_marked_unchanged(self, mock_run, mock_popen, config):
+        mock_run.return_value = _make_completed_process()
+        mock_popen.side_effect = [_make_popen(returncode=2), _make_popen()]
+        result = run_terraform(config)
+        assert result.success is True
+        assert result.unchanged is False
 
+    @patch("saorsa_deploy.terraform.subprocess.Popen")
     @patch("saorsa_deploy.terraform.subprocess.run")
-    def test_passes_do_token_as_tf_var(self, mock_run, config):
+    def test_passes_do_token_as_tf_var(self, mock_run, mock_popen, config):
         mock_run.return_value = _make_completed_process()
+        mock_popen.return_value = _make_popen()
         original = os.environ.get("DO_TOKEN")
         try:
             os.environ["DO_TOKEN"] = "test-token-123"
@@ -162,22 +431,26 @@ class TestRunTerraform:
 
             init_call = mock_run.call_args_list[0]
             assert init_call.kwargs["env"]["TF_VAR_do_token"] == "test-token-123"
+            assert mock_popen.call_args.kwargs["env"]["TF_VAR_do_token"] == "test-token-123"
         finally:
             if original is None:
                 os.environ.pop("DO_TOKEN", None)
             else:
                 os.environ["DO_TOKEN"] = original
 
+    @patch("saorsa_deploy.terraform.subprocess.Popen")
     @patch("saorsa_deploy.terraform.subprocess.run")
-    def test_successful_run_returns_success(self, mock_run, config):
+    def test_successful_run_returns_success(self, mock_run, mock_popen, config):
         mock_run.return_value = _make_completed_process()
+        mock_popen.return_value = _make_popen()
         result = run_terraform(config)
         assert result.success is True
         assert result.provider == "digitalocean"
         assert result.region == "lon1"
 
+    @patch("saorsa_deploy.terraform.subprocess.Popen")
     @patch("saorsa_deploy.terraform.subprocess.run")
-    def test_init_failure_returns_failure_without_apply(self, mock_run, config):
+    def test_init_failure_returns_failure_without_apply(self, mock_run, mock_popen, config):
         mock_run.return_value = _make_completed_process(
             returncode=1, stdout="init failed", stderr="init error"
         )
@@ -185,64 +458,150 @@ class TestRunTerraform:
         assert result.success is False
         assert result.stderr == "init error"
         assert mock_run.call_count == 1
+        mock_popen.assert_not_called()
 
+    @patch("saorsa_deploy.terraform.subprocess.Popen")
     @patch("saorsa_deploy.terraform.subprocess.run")
-    def test_apply_failure_returns_failure(self, mock_run, config):
-        mock_run.side_effect = [
-            _make_completed_process(),  # init succeeds
-            _make_completed_process(returncode=1, stderr="apply error"),  # apply fails
+    def test_plan_failure_returns_failure_without_apply(self, mock_run, mock_popen, config):
+        mock_run.return_value = _make_completed_process()
+        mock_popen.return_value = _make_popen(returncode=1, stderr="plan error")
+        result = run_terraform(config)
+        assert result.success is False
+        assert result.stderr == "plan error"
+        assert mock_run.call_count == 1
+        assert mock_popen.call_count == 1
+
+    @patch("saorsa_deploy.terraform.subprocess.Popen")
+    @patch("saorsa_deploy.terraform.subprocess.run")
+    def test_apply_failure_returns_failure(self, mock_run, mock_popen, config):
+        mock_run.return_value = _make_completed_process()
+        mock_popen.side_effect = [
+            _make_popen(returncode=2),
+            _make_popen(returncode=1, stderr="apply error"),
         ]
         result = run_terraform(config)
         assert result.success is False
         assert result.stderr == "apply error"
-        assert mock_run.call_count == 2
+        assert mock_run.call_count == 1
+
+    @patch("saorsa_deploy.terraform.subprocess.Popen")
+    @patch("saorsa_deploy.terraform.subprocess.run")
+    def test_apply_failure_reports_diagnostics(self, mock_run, mock_popen, config):
+        mock_run.return_value = _make_completed_process()
+        mock_popen.return_value = _make_popen(
+            lines=[
+                _event(
+                    "diagnostic",
+                    "Error: Error creating droplet",
+                    diagnostic={
+                        "severity": "error",
+                        "summary": "Error creating droplet",
+                        "detail": "422 size unavailable",
+                    },
+                )
+            ],
+            returncode=1,
+        )
+        result = run_terraform(config)
+        assert result.success is False
+        assert "Error creating droplet" in result.stderr
+        assert "422 size unavailable" in result.stderr
 
+    @patch("saorsa_deploy.terraform.subprocess.Popen")
     @patch("saorsa_deploy.terraform.subprocess.run")
-    def test_workspace_files_exist_after_run(self, mock_run, config):
+    def test_workspace_files_exist_after_run(self, mock_run, mock_popen, config):
         mock_run.return_value = _make_completed_process()
+        mock_popen.return_value = _make_popen()
         run_terraform(config)
         assert (config.workspace_dir / "main.tf").exists()
 
+    @patch("saorsa_deploy.terraform.subprocess.Popen")
     @patch("saorsa_deploy.terraform.subprocess.run")
-    def test_captures_terraform_outputs(self, mock_run, config):
-        output_json = json.dumps(
-            {
-                "droplet_ips": {"value": ["10.0.0.1", "10.0.0.2"]},
-                "droplet_ids": {"value": [123, 456]},
-                "volume_ids": {"value": ["vol-1", "vol-2"]},
-            }
-        )
-        mock_run.side_effect = [
-            _make_completed_process(),  # init
-            _make_completed_process(),  # apply
-            _make_completed_process(stdout=output_json),  # output
-        ]
+    def test_reads_outputs_from_state_object(self, mock_run, mock_popen, config, tf_outputs):
+        tf_outputs.return_value = {
+            "droplet_ips": ["10.0.0.1", "10.0.0.2"],
+            "droplet_ids": [123, 456],
+            "volume_ids": ["vol-1", "vol-2"],
+        }
+        mock_run.return_value = _make_completed_process()
+        mock_popen.return_value = _make_popen()
         result = run_terraform(config)
         assert result.success is True
         assert result.outputs["droplet_ips"] == ["10.0.0.1", "10.0.0.2"]
         assert result.outputs["droplet_ids"] == [123, 456]
-        assert mock_run.call_count == 3
+        tf_outputs.assert_called_once_with("saorsa-deploy/do-lon1.tfstate")
+        # init is the only non-streamed terraform command
+        assert mock_run.call_count == 1
 
+    @patch("saorsa_deploy.terraform.subprocess.Popen")
     @patch("saorsa_deploy.terraform.subprocess.run")
-    def test_output_failure_still_succeeds(self, mock_run, config):
-        mock_run.side_effect = [
-            _make_completed_process(),  # init
-            _make_completed_process(),  # apply
-            _make_completed_process(returncode=1),  # output fails
-        ]
+    def test_output_read_failure_still_succeeds(self, mock_run, mock_popen, config, tf_outputs):
+        tf_outputs.side_effect = ClientError(
+            {"Error": {"Code": "AccessDenied", "Message": "denied"}}, "GetObject"
+        )
+        mock_run.return_value = _make_completed_process()
+        mock_popen.return_value = _make_popen()
         result = run_terraform(config)
         assert result.success is True
         assert result.outputs == {}
 
+    @patch("saorsa_deploy.terraform.subprocess.Popen")
+    @patch("saorsa_deploy.terraform.subprocess.run")
+    def test_calls_init_plan_apply_in_order(self, mock_run, mock_popen, config):
+        calls = []
+        mock_run.side_effect = lambda args, **_: (
+            calls.append(args[1]) or (_make_completed_process())
+        )
+        mock_popen.side_effect = lambda args, **_: (
+            calls.append(args[1]) or _make_popen(returncode=2 if args[1] == "plan" else 0)
+        )
+        run_terraform(config)
+
+        assert calls == ["init", "plan", "apply"]
+
+    @patch("saorsa_deploy.terraform.subprocess.Popen")
     @patch("saorsa_deploy.terraform.subprocess.run")
-    def test_calls_init_apply_output_in_order(self, mock_run, config):
+    def test_streams_progress_and_resource_timings(self, mock_run, mock_popen, config):
         mock_run.return_value = _make_completed_process()
+        mock_popen.side_effect = [
+            _make_popen(lines=_PLAN_EVENTS, returncode=2),
+            _make_popen(lines=_APPLY_EVENTS),
+        ]
+        updates = []
+
+        result = run_terraform(config, on_progress=updates.append)
+
+        assert updates[-1].planned == 2
+        assert updates[-1].completed == 2
+        assert updates[-1].slowest_resource == "digitalocean_droplet.node_vm[0]"
+        assert updates[-1].slowest_seconds == 42
+        assert result.resource_timings == {
+            "digitalocean_droplet.node_vm[0]": 42.0,
+            "digitalocean_volume.node_storage[0]": 3.0,
+        }
+        assert "Apply complete! Resources: 2 added, 0 changed, 0 destroyed." in result.stdout
+
+    @pytest.mark.parametrize(
+        "returncodes",
+        [[0], [1], [2, 0], [2, 1]],
+        ids=["no-changes", "plan-failure", "applied", "apply-failure"],
+    )
+    @patch("saorsa_deploy.terraform.subprocess.Popen")
+    @patch("saorsa_deploy.terraform.subprocess.run")
+    def test_saved_plan_is_always_removed(self, mock_run, mock_popen, config, returncodes):
+        mock_run.return_value = _make_completed_process()
+        procs = iter([_make_popen(returncode=code) for code in returncodes])
+
+        def popen(args, **kwargs):
+            if args[1] == "plan":
+                (config.workspace_dir / "saorsa.tfplan").write_text("plan")
+            return next(procs)
+
+        mock_popen.side_effect = popen
         run_terraform(config)
 
-        assert mock_run.call_count == 3
-        assert mock_run.call_args_list[0].args[0][1] == "init"
-        assert mock_run.call_args_list[1].args[0][1] == "apply"
-        assert mock_run.call_args_list[2].args[0][1] == "output"
+        assert mock_popen.call_count == len(returncodes)
+        assert not (config.workspace_dir / "saorsa.tfplan").exists()
 
 
 class TestBuildDestroyArgs:
@@ -253,6 +612,7 @@ class TestBuildDestroyArgs:
             "destroy",
             "-auto-approve",
             "-input=false",
+            "-json",
             "-var=attached_volume_size=20",
             "-var=name=TEST",
             "-var=region=lon1",
@@ -267,66 +627,79 @@ class TestBuildDestroyArgs:
             "destroy",
             "-auto-approve",
             "-input=false",
+            "-json",
         ]
 
+    def test_includes_parallelism(self, config):
+        config.parallelism = 12
+        args = build_destroy_args(config)
+        assert "-parallelism=12" in args
+
 
 class TestRunTerraformDestroy:
+    @patch("saorsa_deploy.terraform.subprocess.Popen")
     @patch("saorsa_deploy.terraform.subprocess.run")
-    def test_calls_init_then_destroy(self, mock_run, config):
+    def test_calls_init_then_destroy(self, mock_run, mock_popen, config):
         mock_run.return_value = _make_completed_process()
+        mock_popen.return_value = _make_popen()
         run_terraform_destroy(config)
 
-        assert mock_run.call_count == 2
-        init_call = mock_run.call_args_list[0]
-        assert init_call.args[0][1] == "init"
-        destroy_call = mock_run.call_args_list[1]
-        assert destroy_call.args[0][1] == "destroy"
+        assert mock_run.call_count == 1
+        assert mock_run.call_args.args[0][1] == "init"
+        assert mock_popen.call_args.args[0][1] == "destroy"
 
+    @patch("saorsa_deploy.terraform.subprocess.Popen")
     @patch("saorsa_deploy.terraform.subprocess.run")
-    def test_calls_destroy_with_correct_args(self, mock_run, config):
+    def test_calls_destroy_with_correct_args(self, mock_run, mock_popen, config):
         mock_run.return_value = _make_completed_process()
+        mock_popen.return_value = _make_popen()
         run_terraform_destroy(config)
 
-        destroy_call = mock_run.call_args_list[1]
-        assert destroy_call.args[0] == [
+        assert mock_popen.call_args.args[0] == [
             "terraform",
             "destroy",
             "-auto-approve",
             "-input=false",
+            "-json",
             "-var=attached_volume_size=20",
             "-var=name=TEST",
             "-var=region=lon1",
             "-var=vm_count=2",
         ]
 
+    @patch("saorsa_deploy.terraform.subprocess.Popen")
     @patch("saorsa_deploy.terraform.subprocess.run")
-    def test_successful_destroy_returns_success(self, mock_run, config):
+    def test_successful_destroy_returns_success(self, mock_run, mock_popen, config):
         mock_run.return_value = _make_completed_process()
+        mock_popen.return_value = _make_popen()
         result = run_terraform_destroy(config)
         assert result.success is True
         assert result.provider == "digitalocean"
         assert result.region == "lon1"
 
+    @patch("saorsa_deploy.terraform.subprocess.Popen")
     @patch("saorsa_deploy.terraform.subprocess.run")
-    def test_init_failure_skips_destroy(self, mock_run, config):
+    def test_init_failure_skips_destroy(self, mock_run, mock_popen, config):
         mock_run.return_value = _make_completed_process(returncode=1, stderr="init error")
         result = run_terraform_destroy(config)
         assert result.success is False
         assert mock_run.call_count == 1
+        mock_popen.assert_not_called()
 
+    @patch("saorsa_deploy.terraform.subprocess.Popen")
     @patch("saorsa_deploy.terraform.subprocess.run")
-    def test_destroy_failure_returns_failure(self, mock_run, config):
-        mock_run.side_effect = [
-            _make_completed_process(),
-            _make_completed_process(returncode=1, stderr="destroy error"),
-        ]
+    def test_destroy_failure_returns_failure(self, mock_run, mock_popen, config):
+        mock_run.return_value = _make_completed_process()
+        mock_popen.return_value = _make_popen(returncode=1, stderr="destroy error")
         result = run_terraform_destroy(config)
         assert result.success is False
         assert result.stderr == "destroy error"
 
+    @patch("saorsa_deploy.terraform.subprocess.Popen")
     @patch("saorsa_deploy.terraform.subprocess.run")
-    def test_passes_do_token_as_tf_var(self, mock_run, config):
+    def test_passes_do_token_as_tf_var(self, mock_run, mock_popen, config):
         mock_run.return_value = _make_completed_process()
+        mock_popen.return_value = _make_popen()
         original = os.environ.get("DO_TOKEN")
         try:
             os.environ["DO_TOKEN"] = "test-token-456"